@@ -0,0 +1,277 @@
+"""Seeded benchmarks for the hot paths of the simulators and the trace tools.
+
+Every case runs in a fresh worker process so its peak memory is its own.
+Results go to a JSON file; pass an earlier one with --baseline to flag cases
+that got slower or bigger than the threshold allows.
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --nodes 10 1000 50000 --trace-mb 1 1024 --baseline baseline.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak memory is simply not reported there
+    resource = None
+
+from engine import Simulation
+from route_engine import RouteEngine
+from trace_analyzer import TraceAnalyzer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+AWK_SCRIPT = os.path.join(SCRIPT_DIR, "performance.awk")
+
+NODE_COUNTS = [10, 100, 1000, 10000, 50000]
+TRACE_SIZES_MB = [1, 16, 128]
+COMMUNICATION_RANGE = 150
+MEAN_DEGREE = 10  # The area grows with the node count so the density stays the same
+DSDV_MAX_NODES = 1000  # Distance-vector tables are n x n, so larger runs are skipped
+
+
+def scenario(node_count, seed, protocol="proactive"):
+    side = math.sqrt(node_count * math.pi * COMMUNICATION_RANGE ** 2 / MEAN_DEGREE)
+    return Simulation(node_count=node_count, communication_range=COMMUNICATION_RANGE,
+                      bounds=(0, 0, side, side), seed=seed, protocol=protocol)
+
+
+def query_count(node_count):
+    """Route queries per case, fewer for big networks where each one walks the whole graph."""
+    return max(10, min(1000, 2000000 // node_count))
+
+
+def bench_neighbors(node_count, seed):
+    sim = scenario(node_count, seed)
+    ticks = max(3, min(100, 200000 // node_count))
+    started = time.perf_counter()
+    for _ in range(ticks):
+        sim.move_nodes()
+    return time.perf_counter() - started, ticks, {"edges": sim.topology.edge_count()}
+
+
+def bench_queries(node_count, seed, protocol, query):
+    sim = scenario(node_count, seed, protocol)
+    rng = random.Random(seed)
+    queries = query_count(node_count)
+    elapsed = 0.0
+    for _ in range(5):
+        sim.move_nodes()  # Fresh topology, so nothing is answered from a previous round
+        pairs = [rng.sample(sim.nodes, 2) for _ in range(queries // 5 or 1)]
+        started = time.perf_counter()
+        for source, destination in pairs:
+            query(sim, source, destination)
+        elapsed += time.perf_counter() - started
+    return elapsed, 5 * (queries // 5 or 1), {}
+
+
+def bench_find_route(node_count, seed):
+    return bench_queries(node_count, seed, "proactive", Simulation.shortest_path)
+
+
+def bench_hop_count(node_count, seed):
+    return bench_queries(node_count, seed, "proactive", Simulation.get_hop_count)
+
+
+def bench_engine_route(node_count, seed, strategy, weight="hops"):
+    def query(sim, source, destination):
+        return RouteEngine(sim.hop_table, sim.communication_range, strategy, weight).route(source, destination)
+    return bench_queries(node_count, seed, "proactive", query)
+
+
+def bench_bidirectional_route(node_count, seed):
+    return bench_engine_route(node_count, seed, "bidirectional")
+
+
+def bench_astar_route(node_count, seed):
+    return bench_engine_route(node_count, seed, "astar", "distance")
+
+
+def bench_greedy_route(node_count, seed):
+    return bench_engine_route(node_count, seed, "greedy")
+
+
+def bench_discover_route(node_count, seed):
+    return bench_queries(node_count, seed, "reactive", Simulation.discover_route)
+
+
+def bench_stimulate_routing(node_count, seed):
+    started = time.perf_counter()
+    sim = scenario(node_count, seed, "dsdv")  # Includes the initial convergence
+    setup = time.perf_counter() - started
+    started = time.perf_counter()
+    rounds, messages = sim.stimulate_routing()
+    return time.perf_counter() - started, 1, {"initial_convergence": setup, "rounds": rounds, "messages": messages}
+
+
+def write_synthetic_trace(path, size, seed):
+    """Write an NS2 wireless trace of about ``size`` bytes: two TCP flows over two hops plus AODV traffic."""
+    rng = random.Random(seed)
+    now = 10.0
+    uid = 0
+    with open(path + ".tmp", "w") as f:
+        while f.tell() < size:
+            lines = []
+            for _ in range(1000):
+                now += 0.001
+                uid += 1
+                src, dst = (0, 1) if uid % 2 else (3, 4)
+                header = f"------- [{src}:0 {dst}:0 32 0] [{uid} 0] 0 0"
+                lines.append(f"s {now:.9f} _{src}_ AGT  --- {uid} tcp 1040 [0 0 0 0] {header}\n")
+                lines.append(f"s {now:.9f} _{src}_ RTR  --- {uid} tcp 1060 [0 0 0 0] {header}\n")
+                for hop in (7, 8):
+                    lines.append(f"r {now + 0.002:.9f} _{hop}_ RTR  --- {uid} tcp 1060 [13a {hop} 0 800] {header}\n")
+                    lines.append(f"f {now + 0.002:.9f} _{hop}_ RTR  --- {uid} tcp 1060 [13a {hop} 0 800] {header}\n")
+                if rng.random() < 0.05:
+                    lines.append(f"s {now:.9f} _2_ RTR  --- {uid + 10 ** 9} AODV 48 [0 0 0 0] ------- "
+                                 f"[2:255 -1:255 30 0] [0x2 1 1 [1 0] [0 4]] (REQUEST)\n")
+                if rng.random() < 0.9:
+                    arrival = now + 0.02 + rng.random() * 0.01
+                    lines.append(f"r {arrival:.9f} _{dst}_ RTR  --- {uid} tcp 1060 [13a 1 0 800] {header}\n")
+                    lines.append(f"r {arrival:.9f} _{dst}_ AGT  --- {uid} tcp 1060 [13a 1 0 800] {header}\n")
+                else:
+                    lines.append(f"D {now + 0.01:.9f} _5_ RTR  NRTE {uid} tcp 1060 [0 0 0 0] {header}\n")
+            f.write("".join(lines))
+    os.replace(path + ".tmp", path)
+
+
+def bench_trace_analyzer(trace, seed):
+    size = os.path.getsize(trace)
+    started = time.perf_counter()
+    report = TraceAnalyzer().analyze_file(trace)
+    return time.perf_counter() - started, size, {"pdr": report["total"]["pdr"]}
+
+
+def bench_performance_awk(trace, seed):
+    size = os.path.getsize(trace)
+    started = time.perf_counter()
+    subprocess.run(["awk", "-f", AWK_SCRIPT, trace], check=True, stdout=subprocess.DEVNULL,
+                   cwd=os.path.dirname(trace))  # performance.awk writes performance.txt next to the trace
+    return time.perf_counter() - started, size, {}
+
+
+NODE_CASES = {
+    "update_neighbors": bench_neighbors,
+    "find_route": bench_find_route,
+    "get_hop_count": bench_hop_count,
+    "bidirectional_route": bench_bidirectional_route,
+    "astar_route": bench_astar_route,
+    "greedy_route": bench_greedy_route,
+    "discover_route": bench_discover_route,
+    "stimulate_routing": bench_stimulate_routing,
+}
+TRACE_CASES = {
+    "trace_analyzer": bench_trace_analyzer,
+    "performance_awk": bench_performance_awk,
+}
+
+
+def run_case(name, argument, seed, repeat):
+    """Run one case ``repeat`` times in this process and keep the fastest run."""
+    case = NODE_CASES.get(name) or TRACE_CASES[name]
+    best = None
+    for _ in range(repeat):
+        elapsed, ops, extra = case(argument, seed)
+        if best is None or elapsed < best[0]:
+            best = (elapsed, ops, extra)
+    elapsed, ops, extra = best
+    result = {"wall_time": elapsed, "ops": ops, "ops_per_second": ops / elapsed if elapsed > 0 else 0.0}
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux; awk runs as a child process
+        usage = resource.RUSAGE_CHILDREN if name == "performance_awk" else resource.RUSAGE_SELF
+        result["peak_mb"] = resource.getrusage(usage).ru_maxrss / 1024
+    result.update(extra)
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return "case: what got worse" lines for every result beyond ``threshold`` of the baseline."""
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for field in ("wall_time", "peak_mb"):
+            if result.get(field) is None or not old.get(field):
+                continue
+            ratio = result[field] / old[field]
+            if ratio > 1 + threshold:
+                regressions.append(f"{key}: {field} {old[field]:.4g} -> {result[field]:.4g} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark neighbor discovery, routing and trace analysis.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=NODE_COUNTS, help="node counts to run")
+    parser.add_argument("--trace-mb", type=float, nargs="+", default=TRACE_SIZES_MB,
+                        help="sizes of the synthetic traces in MB")
+    parser.add_argument("--cases", nargs="+", choices=sorted(NODE_CASES) + sorted(TRACE_CASES),
+                        help="only run these cases")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the fastest one counts")
+    parser.add_argument("--trace-dir", default="bench_traces", help="where the synthetic traces are kept")
+    parser.add_argument("--output", help="write the results as JSON to this file (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="earlier results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown or memory growth before a case is flagged (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    cases = set(args.cases or list(NODE_CASES) + list(TRACE_CASES))
+    if "performance_awk" in cases and shutil.which("awk") is None:
+        print("awk not found, skipping performance_awk")
+        cases.discard("performance_awk")
+
+    jobs = []
+    for name in NODE_CASES:
+        if name in cases:
+            for node_count in args.nodes:
+                if name == "stimulate_routing" and node_count > DSDV_MAX_NODES:
+                    continue
+                jobs.append((f"{name}/nodes={node_count}", name, node_count))
+    if cases & set(TRACE_CASES):
+        os.makedirs(args.trace_dir, exist_ok=True)
+        for size_mb in args.trace_mb:
+            trace = os.path.abspath(os.path.join(args.trace_dir, f"synthetic_{size_mb:g}mb_{args.seed}.tr"))
+            if not os.path.exists(trace):
+                print(f"Writing {trace}")
+                write_synthetic_trace(trace, int(size_mb * 1024 * 1024), args.seed)
+            for name in TRACE_CASES:
+                if name in cases:
+                    jobs.append((f"{name}/mb={size_mb:g}", name, trace))
+
+    results = {}
+    for key, name, argument in jobs:
+        # A new worker per case keeps peak memory and caches from leaking between cases
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_case, name, argument, args.seed, args.repeat).result()
+        results[key] = result
+        peak = f", peak {result['peak_mb']:.0f} MB" if "peak_mb" in result else ""
+        print(f"{key}: {result['wall_time']:.4f}s, {result['ops_per_second']:.4g} ops/s{peak}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                                "seed": args.seed, "repeat": args.repeat},
+                       "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+INFINITY = float("inf")
+
+
+class DistanceVector:
+    """DSDV-style proactive routing driven by triggered, incremental updates.
+
+    Every node keeps (next_hop, hops, sequence number) per destination. Only
+    the destination itself issues new even sequence numbers; a node that
+    loses the next hop of a route advertises it with infinite hops and the
+    next odd sequence number, so stale routes are replaced instead of counted
+    to infinity. After a topology change only the entries that actually
+    changed are advertised, round by round, until no node has anything left
+    to send. ``rounds``, ``messages`` and ``entries`` count the control
+    traffic that took.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.tables = {node: {node: (node, 0, 0)} for node in nodes}  # node -> destination -> entry
+        self.pending = {}  # node -> destinations whose entries changed since its last update
+        self.broken = set()  # Destinations that need a fresh sequence number
+        self.rounds = 0
+        self.messages = 0
+        self.entries = 0
+
+    def receive(self, node, sender, destination, hops, seqno):
+        """Apply one advertised entry at ``node``; return True if its table changed."""
+        if destination is node:
+            return False
+        hops += 1
+        table = self.tables[node]
+        current = table.get(destination)
+        if current is None:
+            if hops == INFINITY:
+                return False  # Nothing to forget
+        else:
+            next_hop, current_hops, current_seqno = current
+            if seqno < current_seqno or (seqno == current_seqno and hops >= current_hops):
+                return False
+            if hops == INFINITY and next_hop is not sender and current_hops != INFINITY:
+                return False  # A break elsewhere does not invalidate a route that avoids it
+        table[destination] = (sender, hops, seqno)
+        self.pending.setdefault(node, set()).add(destination)
+        return True
+
+    def link_up(self, node_a, node_b):
+        """Both ends of a new link send each other their full table once."""
+        for node, neighbor in ((node_a, node_b), (node_b, node_a)):
+            table = list(self.tables[neighbor].items())
+            self.messages += 1
+            self.entries += len(table)
+            for destination, (_, hops, seqno) in table:
+                self.receive(node, neighbor, destination, hops, seqno)
+
+    def link_down(self, node_a, node_b):
+        """Invalidate every route over a broken link at both of its ends."""
+        for node, lost_hop in ((node_a, node_b), (node_b, node_a)):
+            table = self.tables[node]
+            changed = [destination for destination, (next_hop, hops, _) in table.items()
+                       if next_hop is lost_hop and hops != INFINITY]
+            for destination in changed:
+                table[destination] = (lost_hop, INFINITY, table[destination][2] + 1)
+            if changed:
+                self.pending.setdefault(node, set()).update(changed)
+                self.broken.update(changed)
+
+    def topology_changed(self, added, broken):
+        for node_a, node_b in broken:
+            self.link_down(node_a, node_b)
+        for node_a, node_b in added:
+            self.link_up(node_a, node_b)
+
+    def refresh(self):
+        """Periodic update: every node advertises itself with a new sequence number."""
+        for node in self.nodes:
+            self.broken.add(node)
+
+    def converge(self, max_rounds=None):
+        """Exchange triggered updates until nothing changes; return (rounds, messages)."""
+        # A destination whose routes broke answers with a new sequence number,
+        # standing in for its next periodic DSDV update
+        for destination in self.broken:
+            _, _, seqno = self.tables[destination][destination]
+            self.tables[destination][destination] = (destination, 0, seqno + 2 - seqno % 2)
+            self.pending.setdefault(destination, set()).add(destination)
+        self.broken.clear()
+
+        rounds = 0
+        messages = 0
+        while self.pending and (max_rounds is None or rounds < max_rounds):
+            rounds += 1
+            # Everyone sends what it knew at the start of the round
+            tables = self.tables
+            updates = []
+            for node, destinations in self.pending.items():
+                if node.neighbors:
+                    table = tables[node]
+                    updates.append((node, [(destination,) + table[destination][1:] for destination in destinations]))
+            self.pending = pending = {}
+            for node, entries in updates:
+                messages += 1
+                self.entries += len(entries)
+                for neighbor in node.neighbors:
+                    # Same rules as ``receive``, inlined since this is where all the time goes
+                    table = tables[neighbor]
+                    changed = None
+                    for destination, hops, seqno in entries:
+                        if destination is neighbor:
+                            continue
+                        hops += 1
+                        current = table.get(destination)
+                        if current is None:
+                            if hops == INFINITY:
+                                continue
+                        else:
+                            next_hop, current_hops, current_seqno = current
+                            if seqno < current_seqno or (seqno == current_seqno and hops >= current_hops):
+                                continue
+                            if hops == INFINITY and next_hop is not node and current_hops != INFINITY:
+                                continue
+                        table[destination] = (node, hops, seqno)
+                        if changed is None:
+                            changed = pending.setdefault(neighbor, set())
+                        changed.add(destination)
+
+        self.rounds += rounds
+        self.messages += messages
+        return rounds, messages
+
+    def hop_count(self, source, destination):
+        """Advertised hops from source to destination, or None if it has no valid route."""
+        entry = self.tables[source].get(destination)
+        if entry is None or entry[1] == INFINITY:
+            return None
+        return entry[1]
+
+    def next_hop(self, source, destination):
+        entry = self.tables[source].get(destination)
+        if entry is None or entry[1] == INFINITY:
+            return None
+        return entry[0]
+
+    def path(self, source, destination):
+        """Follow next hops from source to destination, or None if the routes do not get there."""
+        path = [source]
+        node = source
+        while node is not destination:
+            node = self.next_hop(node, destination)
+            if node is None or len(path) > len(self.nodes):
+                return None
+            path.append(node)
+        return path
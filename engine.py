@@ -0,0 +1,489 @@
+"""Headless MANET simulation core shared by the Tkinter GUIs.
+
+Run it directly to simulate a scenario without a display:
+
+    python engine.py --nodes 5000 --ticks 200 --protocol reactive --flows 10
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from collections import deque
+
+from distance_vector import DistanceVector
+from event_log import DEBUG, LEVELS, EventLog
+from hop_table import HopTable
+from instrumentation import Profiler
+from mobility import MODELS, ScheduledMobility
+from route_engine import STRATEGIES, WEIGHTS, RouteEngine
+from scenario import load_scenario
+from topology import Topology
+
+ACTIVE_ROUTE_TIMEOUT = 10.0  # Seconds an AODV route stays valid after its last use
+
+
+class Node:
+    # Fixed slots instead of a per-node __dict__ keep 50k-node scenarios small
+    __slots__ = ("node_id", "x", "y", "routes", "neighbors", "rreq_id", "routing_timeout", "seen_rreqs",
+                 "precursors")
+
+    def __init__(self, node_id, x, y):
+        self.node_id = node_id
+        self.x = x
+        self.y = y
+        self.routes = {}  # Routing table (destination_node -> next_hop)
+        self.neighbors = set()
+        self.rreq_id = 0  # Unique RREQ ID for this node to prevent duplicates
+        self.routing_timeout = {}  # Timeout for routes
+        self.seen_rreqs = {}  # Originator id -> highest RREQ ID already forwarded
+        self.precursors = {}  # Destination -> nodes using this node as next hop towards it
+
+    def add_neighbor(self, neighbor):
+        self.neighbors.add(neighbor)
+
+    def distance_to(self, other_node):
+        return math.sqrt((self.x - other_node.x) ** 2 + (self.y - other_node.y) ** 2)
+
+    def clear_routes(self):
+        """Clear all routes."""
+        self.routes.clear()
+        self.routing_timeout.clear()
+
+    def install_route(self, destination, next_hop, expires):
+        """Install or refresh an AODV route that is valid until ``expires``."""
+        old_hop = self.routes.get(destination)
+        if old_hop is not None and old_hop is not next_hop:
+            old_hop.precursors.get(destination, set()).discard(self)
+        self.routes[destination] = next_hop
+        self.routing_timeout[destination] = expires
+        next_hop.precursors.setdefault(destination, set()).add(self)
+
+    def valid_next_hop(self, destination, now):
+        """Next hop of an unexpired route to ``destination``, or None."""
+        next_hop = self.routes.get(destination)
+        if next_hop is None:
+            return None
+        if self.routing_timeout.get(destination, 0) < now:
+            self.drop_route(destination)
+            return None
+        return next_hop
+
+    def drop_route(self, destination):
+        next_hop = self.routes.pop(destination, None)
+        self.routing_timeout.pop(destination, None)
+        if next_hop is not None:
+            next_hop.precursors.get(destination, set()).discard(self)
+        return next_hop
+
+
+def path_to_string(path):
+    return " -> ".join(f"Node {node.node_id}" for node in path)
+
+
+class Simulation:
+    """Node store, neighbor discovery, mobility and routing without any GUI.
+
+    ``bounds`` is the (min_x, min_y, max_x, max_y) area nodes live in and
+    ``events`` is the EventLog receiving the protocol messages the GUIs display.
+    With the reactive ``protocol``, ``route_cache`` turns on AODV route state:
+    discovered routes are installed hop by hop, reused until they expire, and
+    torn down with RERRs when a link on them breaks. The "dsdv" protocol runs
+    the distance-vector tables in ``distance_vector`` and lets them converge
+    with triggered updates after every topology change; "proactive" reads
+    routes straight from the ideal hop table, or, with a ``route_strategy``
+    other than "table", searches them per query with a RouteEngine under
+    ``route_weight`` (see route_engine.py). A ``scenario`` (see scenario.py)
+    replaces the node count, the area, the random placement and the mobility
+    model with its recorded positions and setdest schedule, and its seed is
+    used unless ``seed`` is given.
+    """
+
+    def __init__(self, node_count=15, communication_range=150, bounds=(50, 50, 700, 400),
+                 mobility="waypoint", tick_seconds=0.5, seed=None, events=None,
+                 protocol="proactive", route_cache=True, scenario=None, route_strategy="table",
+                 route_weight="hops"):
+        if scenario is not None:
+            node_count = len(scenario)
+            bounds = scenario.bounds
+            seed = scenario.seed if seed is None else seed
+        self.scenario = scenario
+        self.protocol = protocol
+        self.route_cache = route_cache and protocol == "reactive"
+        self.communication_range = communication_range
+        self.bounds = bounds
+        self.tick_seconds = tick_seconds
+        self.rng = random.Random(seed)
+        self.events = events if events is not None else EventLog()
+        self.events.clock = lambda: self.sim_time
+        self.profiler = Profiler()  # Disabled until a view or --profile turns it on
+
+        self.nodes = []
+        if scenario is not None:
+            self.create_nodes(node_count, scenario.positions.tolist())
+        else:
+            self.create_nodes(node_count)
+        self.topology = Topology(self.nodes, communication_range)
+        self.topology.subscribe(self.topology_changed)
+        self.hop_table = HopTable(self.nodes)
+        self.route_engine = None
+        if route_strategy != "table":
+            self.route_engine = RouteEngine(self.hop_table, communication_range, route_strategy, route_weight)
+        self.distance_vector = DistanceVector(self.nodes) if protocol == "dsdv" else None
+        if scenario is not None:
+            self.mobility = ScheduledMobility(scenario.positions, bounds, scenario.move_time, scenario.move_node,
+                                              scenario.move_target, scenario.move_speed)
+        else:
+            self.mobility = MODELS[mobility](
+                [(node.x, node.y) for node in self.nodes], bounds, seed=self.rng.getrandbits(32)
+            )
+
+        self.tick_count = 0
+        self.sim_time = 0.0
+        self.stats = {"link_ups": 0, "link_breaks": 0, "route_requests": 0, "routes_found": 0,
+                      "route_hops": 0, "rreq_forwards": 0, "discoveries": 0,
+                      "cache_hits": 0, "rerr_messages": 0, "dv_convergences": 0,
+                      "dv_rounds": 0, "dv_max_rounds": 0}
+        self.update_neighbors()
+        self.stats["link_ups"] = 0  # The initial topology is not churn
+        self.topology.churn.clear()
+        if self.distance_vector:
+            # Like the links, the first convergence is reported apart from the churn
+            rounds, _ = self.distance_vector.converge()
+            self.initial_convergence = (rounds, self.distance_vector.messages, self.distance_vector.entries)
+
+    def create_nodes(self, node_count, positions=None):
+        """Place the nodes at ``positions``, or at random spots drawn from the seeded generator."""
+        if positions is not None:
+            self.nodes.extend(Node(node_id, x, y) for node_id, (x, y) in enumerate(positions, 1))
+            return
+        min_x, min_y, max_x, max_y = self.bounds
+        for node_id in range(1, node_count + 1):
+            x = self.rng.randint(int(min_x), int(max_x))
+            y = self.rng.randint(int(min_y), int(max_y))
+            node = Node(node_id, x, y)
+            self.nodes.append(node)
+
+    @property
+    def edges(self):
+        """Undirected links as (node_a, node_b) with node_a.node_id < node_b.node_id."""
+        return self.topology.edges
+
+    def update_neighbors(self, positions=None):
+        """Apply the link changes since the last call; return True if there were any.
+
+        ``positions`` are the node coordinates as an (n, 2) array, if the caller has them at hand.
+        """
+        return bool(self.topology.update(positions))
+
+    def topology_changed(self, delta):
+        self.profiler.mark("neighbors")
+        self.stats["link_ups"] += len(delta.added)
+        self.stats["link_breaks"] += len(delta.broken)
+        self.hop_table.invalidate()  # Cached hop counts are only stale if a link changed
+        if self.route_cache:
+            self.handle_link_breaks(delta.broken)
+        if self.distance_vector:
+            self.distance_vector.topology_changed(delta.added, delta.broken)
+
+    def set_bounds(self, bounds):
+        self.bounds = bounds
+        self.mobility.set_bounds(bounds)
+
+    def move_nodes(self, dt=None):
+        """Advance mobility by ``dt`` seconds (one tick by default) and refresh the topology."""
+        dt = self.tick_seconds if dt is None else dt
+        positions = self.mobility.step(dt)
+        # By column, as a list per row would give the garbage collector 50k containers to track
+        for node, x, y in zip(self.nodes, positions[:, 0].tolist(), positions[:, 1].tolist()):
+            node.x = x
+            node.y = y
+        self.profiler.mark("mobility")
+        changed = self.update_neighbors(positions)
+        # With changes, the subscribers already charged the link diff to "neighbors"
+        self.profiler.mark("routing" if changed else "neighbors")
+        return changed
+
+    def tick(self):
+        if self.move_nodes() and self.distance_vector:
+            self.converge_routing()
+            self.profiler.mark("routing")
+        self.tick_count += 1
+        self.sim_time += self.tick_seconds
+
+    def node_by_id(self, node_id):
+        return self.nodes[node_id - 1]
+
+    # Proactive routing
+
+    def shortest_path(self, source, destination):
+        """Route from the hop table (fewest hops) or from the route engine if one is set, or None."""
+        self.stats["route_requests"] += 1
+        if self.route_engine is not None:
+            path = self.route_engine.route(source, destination)
+        else:
+            path = self.hop_table.path(source, destination)
+        if path is not None:
+            self.stats["routes_found"] += 1
+            self.stats["route_hops"] += len(path) - 1
+        return path
+
+    def get_hop_count(self, source, destination):
+        """Hop count between source and destination, or None if they are not connected."""
+        return (self.distance_vector or self.hop_table).hop_count(source, destination)
+
+    def converge_routing(self):
+        """Run distance-vector updates to a fixed point; return (rounds, messages)."""
+        rounds, messages = self.distance_vector.converge()
+        if rounds:
+            self.stats["dv_convergences"] += 1
+            self.stats["dv_rounds"] += rounds
+            self.stats["dv_max_rounds"] = max(self.stats["dv_max_rounds"], rounds)
+        return rounds, messages
+
+    def stimulate_routing(self):
+        """Force a periodic update from every node and let the tables converge again."""
+        self.distance_vector.refresh()
+        return self.converge_routing()
+
+    def distance_vector_path(self, source, destination):
+        self.stats["route_requests"] += 1
+        path = self.distance_vector.path(source, destination)
+        if path is not None:
+            self.stats["routes_found"] += 1
+            self.stats["route_hops"] += len(path) - 1
+        return path
+
+    # Reactive routing
+
+    def cached_path(self, source, destination):
+        """Follow unexpired next hops from source to destination; None if the chain is broken."""
+        now = self.sim_time
+        path = [source]
+        node = source
+        while node is not destination:
+            next_hop = node.valid_next_hop(destination, now)
+            if next_hop is None or next_hop not in node.neighbors or len(path) > len(self.nodes):
+                return None
+            path.append(next_hop)
+            node = next_hop
+        return path
+
+    def install_path(self, path):
+        """Set up forward and reverse routes along ``path`` the way RREP/RREQ processing does."""
+        expires = self.sim_time + ACTIVE_ROUTE_TIMEOUT
+        source, destination = path[0], path[-1]
+        for i in range(len(path) - 1):
+            path[i].install_route(destination, path[i + 1], expires)
+            path[i + 1].install_route(source, path[i], expires)
+
+    def discover_route(self, source, destination):
+        """Return a route from source to destination, flooding an RREQ if no cached route is usable."""
+        self.stats["route_requests"] += 1
+        events = self.events
+
+        if self.route_cache:
+            path = self.cached_path(source, destination)
+            if path is not None:
+                self.install_path(path)  # Using a route refreshes its lifetime
+                self.stats["cache_hits"] += 1
+                self.stats["routes_found"] += 1
+                self.stats["route_hops"] += len(path) - 1
+                events.emit(f"Using cached route: {path_to_string(path)}", kind="route",
+                            path=[hop.node_id for hop in path])
+                return path
+
+        self.stats["discoveries"] += 1
+        trace_rreq = events.enabled(DEBUG)
+        source.rreq_id += 1
+        originator = source.node_id
+        rreq_id = source.rreq_id
+        source.seen_rreqs[originator] = rreq_id
+        parents = {source: None}  # Reverse path pointers set up by the RREQ
+        queue = deque([source])
+        events.emit(f"Node {source.node_id} is sending RREQ to find a route to Node {destination.node_id}.",
+                    kind="route", source=source.node_id, destination=destination.node_id)
+
+        while queue:
+            node = queue.popleft()
+
+            # The destination answers, and so does any node with a fresh route to it
+            tail = None
+            if node is destination:
+                tail = [destination]
+            elif self.route_cache and node is not source:
+                tail = self.cached_path(node, destination)
+            if tail is not None:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                path.reverse()
+                path.extend(tail[1:])
+                if self.route_cache:
+                    self.install_path(path)
+                events.emit(f"Route found: {path_to_string(path)}", kind="route",
+                            path=[hop.node_id for hop in path])
+                self.stats["routes_found"] += 1
+                self.stats["route_hops"] += len(path) - 1
+                return path
+
+            # Simulate forwarding RREQ by intermediate nodes, dropping duplicates by RREQ ID
+            for neighbor in node.neighbors:
+                if neighbor.seen_rreqs.get(originator, 0) >= rreq_id:
+                    continue
+                neighbor.seen_rreqs[originator] = rreq_id
+                parents[neighbor] = node
+                queue.append(neighbor)
+                self.stats["rreq_forwards"] += 1
+                if trace_rreq:
+                    events.emit(f"Node {node.node_id} forwards RREQ to Node {neighbor.node_id}.", DEBUG,
+                                kind="rreq", sender=node.node_id, receiver=neighbor.node_id)
+
+        events.emit("No path found.", kind="route", path=None)
+        return None  # No path found
+
+    def handle_link_breaks(self, broken):
+        """Invalidate routes over broken links and propagate RERRs to their precursors."""
+        events = self.events
+        for node_a, node_b in broken:
+            for node, next_hop in ((node_a, node_b), (node_b, node_a)):
+                lost = [destination for destination, hop in node.routes.items() if hop is next_hop]
+                queue = deque((node, destination) for destination in lost)
+                while queue:
+                    current, destination = queue.popleft()
+                    current.drop_route(destination)
+                    precursors = current.precursors.pop(destination, ())
+                    if not precursors:
+                        continue
+                    self.stats["rerr_messages"] += 1
+                    if events.enabled(DEBUG):
+                        events.emit(f"Node {current.node_id} sends RERR: Node {destination.node_id} unreachable.",
+                                    DEBUG, kind="rerr", sender=current.node_id, destination=destination.node_id)
+                    for precursor in precursors:
+                        if precursor.routes.get(destination) is current:
+                            queue.append((precursor, destination))
+
+    def route(self, source, destination):
+        if self.protocol == "proactive":
+            return self.shortest_path(source, destination)
+        if self.protocol == "dsdv":
+            return self.distance_vector_path(source, destination)
+        return self.discover_route(source, destination)
+
+    def route_entries(self):
+        """Number of valid routing table entries across all nodes."""
+        if self.distance_vector:
+            return sum(len(table) for table in self.distance_vector.tables.values()) - len(self.nodes)
+        return sum(len(node.routes) for node in self.nodes)
+
+    def counters(self):
+        return {"edges": self.topology.edge_count(), "route_entries": self.route_entries(),
+                "rreq_forwards": self.stats["rreq_forwards"]}
+
+    def metrics(self):
+        node_count = len(self.nodes)
+        churn = self.topology.churn
+        found = self.stats["routes_found"]
+        metrics = {
+            "nodes": node_count,
+            "ticks": self.tick_count,
+            "sim_time": self.sim_time,
+            "edges": self.topology.edge_count(),
+            "mean_degree": 2 * self.topology.edge_count() / node_count if node_count else 0.0,
+            "components": self.topology.component_count(),
+            "largest_component": self.topology.largest_component(),
+            "max_link_churn": max((added + broken for added, broken in churn), default=0),
+            **self.stats,
+            "route_success": found / self.stats["route_requests"] if self.stats["route_requests"] else 0.0,
+            "mean_hops": self.stats["route_hops"] / found if found else 0.0,
+        }
+        if self.distance_vector:
+            rounds, messages, entries = self.initial_convergence
+            metrics["dv_initial_rounds"] = rounds
+            metrics["dv_initial_messages"] = messages
+            metrics["dv_messages"] = self.distance_vector.messages - messages
+            metrics["dv_entries"] = self.distance_vector.entries - entries
+        return metrics
+
+    def run(self, ticks, flows=0):
+        """Run ``ticks`` mobility ticks as fast as possible.
+
+        ``flows`` random source/destination pairs are picked once and each of
+        them sends (and so needs a route) on every tick. A scenario brings its
+        own flows, which are used when ``flows`` is 0.
+        """
+        if not flows and self.scenario is not None:
+            pairs = [(self.nodes[src], self.nodes[dst]) for src, dst in self.scenario.flows]
+        else:
+            pairs = [self.rng.sample(self.nodes, 2) for _ in range(flows)]
+        started = time.perf_counter()
+        profiler = self.profiler
+        for _ in range(ticks):
+            profiler.begin_frame()
+            self.tick()
+            for source, destination in pairs:
+                self.route(source, destination)
+            profiler.mark("routing")
+            if profiler.enabled:
+                profiler.end_frame(**self.counters())
+        elapsed = time.perf_counter() - started
+        metrics = self.metrics()
+        metrics["wall_time"] = elapsed
+        metrics["ticks_per_second"] = ticks / elapsed if elapsed > 0 else 0.0
+        return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the MANET model headless and print its metrics as JSON.")
+    parser.add_argument("--nodes", type=int, default=50, help="number of nodes")
+    parser.add_argument("--ticks", type=int, default=100, help="number of mobility ticks to run")
+    parser.add_argument("--range", type=float, default=150, dest="communication_range", help="radio range")
+    parser.add_argument("--width", type=float, default=700, help="width of the area")
+    parser.add_argument("--height", type=float, default=400, help="height of the area")
+    parser.add_argument("--mobility", choices=sorted(MODELS), default="waypoint", help="mobility model")
+    parser.add_argument("--tick-seconds", type=float, default=0.5, help="simulated time per tick")
+    parser.add_argument("--protocol", choices=["proactive", "dsdv", "reactive"], default="proactive")
+    parser.add_argument("--flows", type=int, default=0, help="random flows that send on every tick")
+    parser.add_argument("--route", choices=["table"] + STRATEGIES, default="table",
+                        help="how proactive routes are found: the cached hop table or a per-query search")
+    parser.add_argument("--weight", choices=sorted(WEIGHTS), default="hops",
+                        help="link weight for --route dijkstra and astar")
+    parser.add_argument("--no-route-cache", action="store_true",
+                        help="flood a new RREQ for every reactive send instead of reusing routes")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--scenario", help="scenario file from scenario.py (overrides --nodes, --width, --height "
+                                           "and --mobility, and brings its seed and flows)")
+    parser.add_argument("--output", help="write the metrics to this file instead of stdout")
+    parser.add_argument("--events", help="stream the event log to this JSON-lines file")
+    parser.add_argument("--profile", help="write per-tick phase timings to this CSV (or .json) file")
+    parser.add_argument("--log-level", choices=sorted(LEVELS, key=LEVELS.get), default="INFO",
+                        help="lowest event level to record")
+    args = parser.parse_args(argv)
+
+    sim = Simulation(
+        node_count=args.nodes, communication_range=args.communication_range,
+        bounds=(0, 0, args.width, args.height), mobility=args.mobility,
+        tick_seconds=args.tick_seconds, seed=args.seed, protocol=args.protocol,
+        route_cache=not args.no_route_cache, route_strategy=args.route, route_weight=args.weight,
+        events=EventLog(level=LEVELS[args.log_level], jsonl_path=args.events),
+        scenario=load_scenario(args.scenario) if args.scenario else None
+    )
+    sim.profiler.enabled = bool(args.profile)
+    metrics = sim.run(args.ticks, flows=args.flows)
+    if args.profile:
+        sim.profiler.export(args.profile)
+    sim.events.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(metrics, f, indent=2)
+    else:
+        json.dump(metrics, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import json
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+class EventLog:
+    """Structured simulation event log with a bounded ring buffer.
+
+    Events are plain dicts. The last ``capacity`` of them are kept in
+    ``events``; the ones no view has picked up yet wait in a second bounded
+    queue that ``drain`` empties, so a burst of messages costs a deque append
+    each instead of a widget update. Optionally every event is also streamed
+    to a JSON-lines file for offline analysis.
+    """
+
+    def __init__(self, capacity=1000, level=INFO, jsonl_path=None, clock=None):
+        self.level = level
+        self.events = deque(maxlen=capacity)
+        self.pending = deque(maxlen=capacity)
+        self.clock = clock or (lambda: 0.0)  # Simulated time stamped on every event
+        self.sequence = 0
+        self.dropped = 0  # Pending events pushed out before a view drained them
+        self.stream = open(jsonl_path, "w") if jsonl_path else None
+
+    def enabled(self, level):
+        """Cheap check so callers can skip formatting messages nobody will see."""
+        return level >= self.level
+
+    def emit(self, message, level=INFO, kind="status", **fields):
+        if level < self.level:
+            return
+        self.sequence += 1
+        event = {
+            "seq": self.sequence,
+            "time": self.clock(),
+            "wall": time.time(),
+            "level": LEVEL_NAMES.get(level, str(level)),
+            "kind": kind,
+            "message": message,
+        }
+        event.update(fields)
+        self.events.append(event)
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(event)
+        if self.stream:
+            self.stream.write(json.dumps(event) + "\n")
+
+    def drain(self):
+        """Return and forget the events not handed out yet.
+
+        Pops one event at a time, so a simulation thread can keep emitting
+        while a view drains without events slipping between copy and clear.
+        """
+        pending = self.pending
+        events = []
+        while pending:
+            events.append(pending.popleft())
+        return events
+
+    def clear(self):
+        self.events.clear()
+        self.pending.clear()
+
+    def close(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+
+class TextLogView:
+    """Batches log events into a Tk Text widget once per frame.
+
+    ``flush`` is rescheduled with ``after`` every ``interval_ms`` and writes
+    all pending events with a single insert, trimming the widget to the last
+    ``max_lines`` lines so it never grows without bound.
+    """
+
+    def __init__(self, log, widget, root, interval_ms=100, max_lines=2000, read_only=False):
+        self.log = log
+        self.widget = widget
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_lines = max_lines
+        self.read_only = read_only
+        self.flush()
+
+    def flush(self):
+        events = self.log.drain()
+        if events:
+            if self.read_only:
+                self.widget.config(state="normal")
+            if self.log.dropped:
+                self.widget.insert("end", f"... {self.log.dropped} messages skipped ...\n")
+                self.log.dropped = 0
+            self.widget.insert("end", "".join(event["message"] + "\n" for event in events))
+            # Keep the widget bounded by deleting everything above the last max_lines lines
+            self.widget.delete("1.0", f"end-{self.max_lines + 1}l")
+            self.widget.see("end")
+            if self.read_only:
+                self.widget.config(state="disabled")
+        self.root.after(self.interval_ms, self.flush)
+
+    def clear(self):
+        self.log.clear()
+        if self.read_only:
+            self.widget.config(state="normal")
+        self.widget.delete("1.0", "end")
+        if self.read_only:
+            self.widget.config(state="disabled")
@@ -1,25 +1,215 @@
-import matplotlib.pyplot as plt
-
-# Read the results from throughput.txt
-results = {}
-with open("performance.txt", "r") as f:
-    for line in f:
-        if ":" in line:
-            key, value = line.strip().split(": ")
-            results[key] = float(value)
-
-# Data for plotting
-metrics = ["Throughput (kbps)", "PDR (%)", "Average Delay (s)", "Packet Loss (%)", "Overhead (%)"]
-values = [results["Throughput (kbps)"], results["PDR (%)"], results["Average Delay (s)"], results["Packet Loss (%)"], results["Overhead (%)"]]
-
-# Create the plot
-plt.figure(figsize=(10, 6))
-plt.bar(metrics, values, color=['blue', 'green', 'red', 'purple', 'orange'])
-plt.title("Network Performance Metrics")
-plt.xlabel("Metric")
-plt.ylabel("Value")
-plt.xticks(rotation=45)
-plt.tight_layout()
-
-# Show the plot
-plt.show()
+"""Plot performance metrics from one or many runs.
+
+Inputs can be performance.txt files (from performance.awk or
+trace_analyzer), JSON reports (trace_analyzer --json, packet_sim --json),
+sweep result.json files or a whole sweep store directory. Every metric gets
+its own chart, so kbps, percent and seconds never share an axis. Runs that
+carry sweep parameters are plotted against the node count, one series per
+setting of the other parameters (protocol, flows), with the mean and a 95%
+confidence interval over seeds; other runs become one bar each, and are
+reported rather than plotted when mixed with sweep results. Charts are rendered headless with Agg, in parallel.
+
+    python graph.py                                   # performance.txt -> plots/
+    python graph.py sweep_results --formats png svg --jobs 8
+"""
+
+import argparse
+import json
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# Field name -> (label in performance.txt, axis label)
+METRICS = {
+    "throughput_kbps": ("Throughput (kbps)", "Throughput (kbps)"),
+    "pdr": ("PDR (%)", "Packet delivery ratio (%)"),
+    "avg_delay": ("Average Delay (s)", "Average delay (s)"),
+    "loss": ("Packet Loss (%)", "Packet loss (%)"),
+    "overhead": ("Overhead (%)", "Routing overhead (%)"),
+}
+COLORS = ["#1f77b4", "#2ca02c", "#d62728", "#9467bd", "#ff7f0e", "#8c564b", "#e377c2", "#17becf"]
+
+# Two-sided 95% Student t critical values by degrees of freedom
+T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def read_performance(path):
+    results = {}
+    with open(path, "r") as f:
+        for line in f:
+            if ":" in line:
+                key, value = line.strip().split(": ")
+                results[key] = float(value)
+    return {field: results[label] for field, (label, _) in METRICS.items() if label in results}
+
+
+def load_run(path):
+    """Return (params, metrics) for one result file; params is empty unless it came from a sweep."""
+    if not path.endswith(".json"):
+        return {}, read_performance(path)
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("status", "ok") != "ok" or "total" not in data.get("report", data):
+        return None
+    total = data.get("report", data)["total"]
+    return data.get("params", {}), {field: total[field] for field in METRICS if field in total}
+
+
+def find_runs(inputs):
+    """Expand directories (sweep stores) into their result.json files."""
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                result = os.path.join(path, name, "result.json")
+                if os.path.exists(result):
+                    paths.append(result)
+        else:
+            paths.append(path)
+    return paths
+
+
+def confidence_interval(values):
+    """Mean and half-width of the 95% confidence interval (0 for a single value)."""
+    count = len(values)
+    mean = sum(values) / count
+    if count < 2:
+        return mean, 0.0
+    sd = math.sqrt(sum((value - mean) ** 2 for value in values) / (count - 1))
+    t = T_95[count - 2] if count - 2 < len(T_95) else 1.96
+    return mean, t * sd / math.sqrt(count)
+
+
+def setting_text(value):
+    """Short legend text of one sweep parameter value; flow pairs read as on the sweep command line."""
+    if isinstance(value, list):
+        return ",".join(setting_text(item).replace(",", ":") if isinstance(item, list) else str(item)
+                        for item in value)
+    return str(value)
+
+
+def split_runs(runs):
+    """Split (label, params, metrics) runs into sweep runs (with protocol and node count) and plain ones."""
+    sweep = [run for run in runs if "protocol" in run[1] and "nodes" in run[1]]
+    plain = [run for run in runs if not ("protocol" in run[1] and "nodes" in run[1])]
+    return sweep, plain
+
+
+def build_charts(runs):
+    """Turn (label, params, metrics) runs into one picklable chart spec per metric.
+
+    Sweep runs are averaged over seeds only: every other parameter (protocol,
+    flows, ...) picks the series, so points that differ in more than the seed
+    are never pooled. The legend names the protocol plus any parameter that
+    varies. Plain runs are only charted when there are no sweep runs; the
+    caller reports them otherwise.
+    """
+    sweep, plain = split_runs(runs)
+    # Parameters besides the seed and the node count (the x axis) that differ between sweep runs
+    settings = defaultdict(set)
+    for _, params, _ in sweep:
+        for key, value in params.items():
+            if key not in ("seed", "nodes"):
+                settings[key].add(json.dumps(value, sort_keys=True))
+    varying = [key for key in sorted(settings) if key != "protocol" and len(settings[key]) > 1]
+    charts = []
+    for field, (_, axis_label) in METRICS.items():
+        if sweep:
+            samples = defaultdict(list)  # (series, nodes) -> values over seeds
+            for _, params, metrics in sweep:
+                if field in metrics:
+                    name = " ".join([str(params["protocol"])] +
+                                    [f"{key}={setting_text(params.get(key))}" for key in varying])
+                    samples[(name, params["nodes"])].append(metrics[field])
+            series = defaultdict(list)
+            for (name, nodes), values in sorted(samples.items()):
+                mean, half_width = confidence_interval(values)
+                series[name].append((nodes, mean, half_width, len(values)))
+            charts.append({"kind": "lines", "field": field, "ylabel": axis_label, "series": dict(series),
+                           "legend": ", ".join(["Protocol"] + varying)})
+        else:
+            bars = [(label, metrics[field]) for label, _, metrics in plain if field in metrics]
+            charts.append({"kind": "bars", "field": field, "ylabel": axis_label, "bars": bars})
+    return charts
+
+
+def render_chart(chart, out_dir, formats, show=False):
+    """Draw one chart and save it in every format; returns the written paths."""
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")  # No display needed, and much faster to start
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    if chart["kind"] == "lines":
+        for i, (name, points) in enumerate(sorted(chart["series"].items())):
+            nodes, means, errors, _ = zip(*points)
+            ax.errorbar(nodes, means, yerr=errors, marker="o", capsize=4, label=name,
+                        color=COLORS[i % len(COLORS)])
+        ax.set_xlabel("Number of nodes")
+        ax.set_title(f"{chart['ylabel']}: mean and 95% CI over seeds")
+        ax.legend(title=chart["legend"])
+        ax.grid(True, alpha=0.3)
+    else:
+        labels = [label for label, _ in chart["bars"]]
+        ax.bar(labels, [value for _, value in chart["bars"]],
+               color=[COLORS[i % len(COLORS)] for i in range(len(labels))])
+        ax.tick_params(axis="x", rotation=45)
+        ax.set_title(chart["ylabel"])
+    ax.set_ylabel(chart["ylabel"])
+    fig.tight_layout()
+
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{chart['field']}.{fmt}")
+        fig.savefig(path)
+        paths.append(path)
+    if show:
+        plt.show()
+    plt.close(fig)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plot performance metrics of one or many runs.")
+    parser.add_argument("inputs", nargs="*", default=["performance.txt"],
+                        help="performance.txt files, JSON reports, sweep result.json files or sweep stores")
+    parser.add_argument("--out-dir", default="plots", help="directory the charts are written to")
+    parser.add_argument("--formats", nargs="+", default=["png"], choices=["png", "svg", "pdf"])
+    parser.add_argument("--jobs", type=int, default=None, help="charts rendered in parallel (default: all cores)")
+    parser.add_argument("--show", action="store_true", help="also open each chart in a window")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for path in find_runs(args.inputs):
+        loaded = load_run(path)
+        if loaded is None:
+            print(f"Skipping {path}: failed run")
+            continue
+        params, metrics = loaded
+        label = os.path.basename(os.path.dirname(path)) if path.endswith("result.json") else path
+        runs.append((label, params, metrics))
+    if not runs:
+        parser.error("no results to plot")
+
+    sweep, plain = split_runs(runs)
+    if sweep and plain:
+        print(f"Warning: not plotting {len(plain)} runs without sweep parameters next to the sweep results "
+              f"({', '.join(label for label, _, _ in plain)}); plot them separately")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    charts = build_charts(runs)
+    if args.show or len(charts) == 1 or args.jobs == 1:
+        written = [render_chart(chart, args.out_dir, args.formats, args.show) for chart in charts]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            written = list(pool.map(render_chart, charts, [args.out_dir] * len(charts),
+                                    [args.formats] * len(charts)))
+    print(f"{len(runs)} runs, {sum(len(paths) for paths in written)} charts written to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+from collections import OrderedDict
+
+import numpy as np
+
+UNREACHABLE = -1
+DENSE_LIMIT = 2048  # Up to this many nodes the whole table is kept as n x n matrices
+MAX_CACHED_ROWS = 256  # Rows kept for larger networks, most recently used first
+
+
+def csr_adjacency(nodes, index):
+    """Adjacency of ``nodes`` as CSR (offsets, indices) int32 arrays built from their neighbor sets."""
+    degrees = np.fromiter((len(node.neighbors) for node in nodes), dtype=np.int32, count=len(nodes))
+    offsets = np.zeros(len(nodes) + 1, dtype=np.int32)
+    np.cumsum(degrees, out=offsets[1:])
+    indices = np.fromiter((index[neighbor] for node in nodes for neighbor in node.neighbors),
+                          dtype=np.int32, count=int(offsets[-1]))
+    return offsets, indices
+
+
+def csr_from_pairs(first, second, count):
+    """CSR (offsets, indices) adjacency of ``count`` nodes linked by the index pairs ``first``/``second``."""
+    sources = np.concatenate((first, second))
+    targets = np.concatenate((second, first))
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=count), out=offsets[1:])
+    return offsets, targets[np.argsort(sources, kind="stable")]
+
+
+def csr_expand(offsets, indices, frontier):
+    """Neighbors of all ``frontier`` nodes from a CSR adjacency, and how many each node has."""
+    starts = offsets[frontier]
+    counts = offsets[frontier + 1] - starts
+    total = int(counts.sum())
+    positions = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+    return indices[positions], counts
+
+
+def batched_hop_counts(offsets, indices, sources, count):
+    """Hop counts from each of ``sources`` over a CSR adjacency, as a (len(sources), count) int32 array.
+
+    All sources are searched together, one frontier expansion per level.
+    Node ``v`` lands in column ``v % count``, so several graphs of ``count``
+    nodes stacked into one adjacency, none linked to another, can be searched
+    in one go.
+    """
+    hops = np.full((len(sources), count), UNREACHABLE, dtype=np.int32)
+    flat = hops.reshape(-1)
+    claims = np.empty(len(flat), dtype=np.int64)
+    owners = np.arange(len(sources), dtype=np.int64)
+    frontier = np.asarray(sources, dtype=np.int64)
+    flat[owners * count + frontier % count] = 0
+    level = 0
+    while frontier.size:
+        level += 1
+        reached, counts = csr_expand(offsets, indices, frontier)
+        # One key per (source, node) pair, so every search only sees its own visited nodes
+        keys = np.repeat(owners, counts) * count + reached % count
+        new = flat[keys] == UNREACHABLE
+        keys, reached = keys[new], reached[new]
+        # A pair reached several times keeps whichever claim lands last, which drops the repeats without sorting
+        order = np.arange(len(keys))
+        claims[keys] = order
+        once = claims[keys] == order
+        keys = keys[once]
+        flat[keys] = level
+        owners, frontier = keys // count, reached[once]
+    return hops
+
+
+def component_labels(offsets, indices):
+    """Label of every node of a CSR adjacency: the lowest node index in its connected component.
+
+    Labels spread like a BFS from every node at once; a node only passes
+    its label on in the round after it got a lower one.
+    """
+    labels = np.arange(len(offsets) - 1)
+    frontier = labels
+    while frontier.size:
+        reached, counts = csr_expand(offsets, indices, frontier)
+        offered = np.repeat(labels[frontier], counts)
+        lower = offered < labels[reached]
+        np.minimum.at(labels, reached[lower], offered[lower])
+        frontier = np.unique(reached[lower])
+    return labels
+
+
+class HopTable:
+    """Shared all-pairs hop count and next-hop table.
+
+    Rows are filled lazily with one BFS per source and cached until the
+    topology changes, so asking for every (source, destination) pair costs one
+    BFS per source instead of one BFS per pair. Each row also keeps the BFS
+    parent pointers so full paths can be rebuilt without searching again.
+
+    The BFS runs level by level over a CSR copy of the adjacency with NumPy,
+    and rows are int32 arrays. Networks of up to ``DENSE_LIMIT`` nodes keep
+    dense n x n hop, next-hop and parent matrices; larger ones keep only the
+    ``MAX_CACHED_ROWS`` most recently used rows, so memory stays bounded.
+    """
+
+    def __init__(self, nodes, dense_limit=DENSE_LIMIT, max_rows=MAX_CACHED_ROWS):
+        self.nodes = nodes
+        self.index = {node: i for i, node in enumerate(nodes)}
+        self.max_rows = max_rows
+        count = len(nodes)
+        self.dense = count <= dense_limit
+        self.matrices = None  # Dense hops, next hops and parents, allocated on first use
+        self.filled = np.zeros(count, dtype=bool) if self.dense else None
+        self.rows = OrderedDict()  # source index -> (hops, next_hops, parents), sparse mode only
+        self.adjacency = None  # CSR (offsets, indices), rebuilt after every topology change
+
+    def invalidate(self):
+        """Drop every cached row; call whenever the edge set changed."""
+        self.adjacency = None
+        self.rows.clear()
+        if self.dense:
+            self.filled[:] = False
+
+    def csr(self):
+        """The CSR (offsets, indices) adjacency, built from the neighbor sets on first use after a change."""
+        if self.adjacency is None:
+            self.adjacency = csr_adjacency(self.nodes, self.index)
+        return self.adjacency
+
+    def expand(self, frontier):
+        """Neighbors of all ``frontier`` nodes from the CSR adjacency, and how many each node has."""
+        return csr_expand(*self.csr(), frontier)
+
+    def bfs(self, src, hops, next_hops, parents):
+        """Fill the three UNREACHABLE-initialized arrays with the BFS tree rooted at ``src``."""
+        hops[src] = 0
+        next_hops[src] = src
+        frontier = np.array([src], dtype=np.int32)
+        level = 0
+        while frontier.size:
+            level += 1
+            # Gather all neighbors of the frontier along with the node they were reached from
+            reached, counts = self.expand(frontier)
+            if not reached.size:
+                break
+            sources = np.repeat(frontier, counts)
+            new = hops[reached] == UNREACHABLE
+            reached, sources = reached[new], sources[new]
+            reached, first = np.unique(reached, return_index=True)  # Keep the first parent of each node
+            sources = sources[first]
+            hops[reached] = level
+            parents[reached] = sources
+            next_hops[reached] = reached if level == 1 else next_hops[sources]
+            frontier = reached
+
+    def hop_counts(self, sources):
+        """Hop counts from each of ``sources`` to every node, as a (len(sources), n) int32 array.
+
+        All sources are searched together (see ``batched_hop_counts``),
+        which is far cheaper than a BFS per source when only the distances
+        are needed. Nothing is cached.
+        """
+        frontier = np.fromiter((self.index[source] for source in sources), dtype=np.int64, count=len(sources))
+        return batched_hop_counts(*self.csr(), frontier, len(self.nodes))
+
+    def row(self, source):
+        """Return (hops, next_hops, parents) int32 arrays for ``source``, indexed by node position.
+
+        Unreachable destinations have a hop count and next hop of UNREACHABLE.
+        """
+        src = self.index[source]
+        if self.dense:
+            if self.matrices is None:
+                count = len(self.nodes)
+                self.matrices = np.empty((3, count, count), dtype=np.int32)
+            hops, next_hops, parents = self.matrices[:, src]
+            if not self.filled[src]:
+                hops.fill(UNREACHABLE)
+                next_hops.fill(UNREACHABLE)
+                parents.fill(UNREACHABLE)
+                self.bfs(src, hops, next_hops, parents)
+                self.filled[src] = True
+            return hops, next_hops, parents
+
+        cached = self.rows.get(src)
+        if cached is not None:
+            self.rows.move_to_end(src)
+            return cached
+        cached = np.full((3, len(self.nodes)), UNREACHABLE, dtype=np.int32)
+        self.bfs(src, *cached)
+        self.rows[src] = tuple(cached)
+        if len(self.rows) > self.max_rows:
+            self.rows.popitem(last=False)
+        return self.rows[src]
+
+    def compute_all(self):
+        """Fill the whole table at once, one BFS per source."""
+        for node in self.nodes:
+            self.row(node)
+
+    def hop_count(self, source, destination):
+        """Number of hops between two nodes, or None if they are not connected."""
+        hops = int(self.row(source)[0][self.index[destination]])
+        return None if hops == UNREACHABLE else hops
+
+    def next_hop(self, source, destination):
+        """First node on the shortest path, or None if there is no path."""
+        next_hop = int(self.row(source)[1][self.index[destination]])
+        return None if next_hop == UNREACHABLE else self.nodes[next_hop]
+
+    def path(self, source, destination):
+        """Shortest path as a list of nodes from source to destination, or None."""
+        parents = self.row(source)[2]
+        src = self.index[source]
+        current = self.index[destination]
+        if current != src and parents[current] == UNREACHABLE:
+            return None
+        path = [current]
+        while current != src:
+            current = int(parents[current])
+            path.append(current)
+        return [self.nodes[i] for i in reversed(path)]
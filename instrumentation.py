@@ -0,0 +1,125 @@
+import csv
+import json
+import time
+from collections import deque
+
+PHASES = ("mobility", "neighbors", "routing", "render")
+
+
+class Profiler:
+    """Per-frame phase timers and counters for the simulation loop.
+
+    A frame is ``begin_frame``, any number of ``mark(phase)`` calls, each
+    charging the time since the previous mark to ``phase``, and
+    ``end_frame(**counters)``. Finished frames are kept as flat sample dicts
+    (times in milliseconds) for percentiles and export. While disabled every
+    call returns after a single attribute check.
+    """
+
+    def __init__(self, enabled=False, capacity=10000):
+        self.enabled = enabled
+        self.samples = deque(maxlen=capacity)
+        self.frame = 0
+        self.frame_start = None
+        self.interval = None
+        self.last_mark = None
+        self.phases = {}
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        # Time between frame starts includes whatever the GUI toolkit did in between
+        self.interval = (now - self.frame_start) * 1000 if self.frame_start is not None else None
+        self.frame_start = self.last_mark = now
+        self.phases = {}
+
+    def mark(self, phase):
+        if not self.enabled or self.last_mark is None:
+            return
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def end_frame(self, **counters):
+        if not self.enabled or self.last_mark is None:
+            return
+        self.frame += 1
+        sample = {"frame": self.frame, "wall": time.time(),
+                  "frame_ms": (time.perf_counter() - self.frame_start) * 1000, "interval_ms": self.interval}
+        for phase in PHASES:
+            sample[phase + "_ms"] = self.phases.get(phase, 0.0)
+        sample.update(counters)
+        self.samples.append(sample)
+        self.last_mark = None
+
+    def amend(self, frame, **fields):
+        """Add ``fields`` to the finished ``frame``, e.g. render time measured on another thread."""
+        for sample in reversed(list(self.samples)):  # A copy, the simulation thread may be appending
+            if sample["frame"] == frame:
+                sample.update(fields)
+                return
+            if sample["frame"] < frame:
+                return
+
+    def percentile(self, field, percent, window=200):
+        """``percent`` percentile of ``field`` over the last ``window`` frames, or None."""
+        values = sorted(sample[field] for sample in list(self.samples)[-window:] if sample.get(field) is not None)
+        if not values:
+            return None
+        return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+    def export(self, path):
+        """Write the samples as JSON if ``path`` ends in .json, otherwise as CSV."""
+        samples = list(self.samples)
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(samples, f, indent=2)
+            return
+        fields = []
+        for sample in samples:
+            fields.extend(field for field in sample if field not in fields)
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, restval="")
+            writer.writeheader()
+            writer.writerows(samples)
+
+
+class HudOverlay:
+    """Frame time and rolling p50/p95 phase breakdown drawn in a corner of the canvas."""
+
+    def __init__(self, canvas, profiler, color="#e5c07b", font=("Consolas", 9)):
+        self.canvas = canvas
+        self.profiler = profiler
+        self.color = color
+        self.font = font
+        self.item = None
+
+    def text(self):
+        profiler = self.profiler
+        if not profiler.samples:
+            return "Collecting samples..."
+        last = profiler.samples[-1]
+        lines = [f"frame {last['frame_ms']:.1f} ms  p95 {profiler.percentile('frame_ms', 95):.1f} ms"]
+        interval = profiler.percentile("interval_ms", 50)
+        if interval is not None:
+            lines.append(f"interval p50 {interval:.0f} ms")
+        for phase in PHASES:
+            field = phase + "_ms"
+            lines.append(f"{phase:<9} p50 {profiler.percentile(field, 50):6.2f}  p95 {profiler.percentile(field, 95):6.2f}")
+        counters = [f"{key} {value}" for key, value in last.items()
+                    if key not in ("frame", "wall", "frame_ms", "interval_ms") and not key.endswith("_ms")]
+        if counters:
+            lines.append("  ".join(counters))
+        return "\n".join(lines)
+
+    def update(self):
+        if self.item is None:
+            self.item = self.canvas.create_text(10, 10, anchor="nw", fill=self.color, font=self.font, tags="hud")
+        self.canvas.itemconfigure(self.item, text=self.text())
+        self.canvas.tag_raise(self.item)
+
+    def hide(self):
+        if self.item is not None:
+            self.canvas.delete(self.item)
+            self.item = None
@@ -0,0 +1,234 @@
+import numpy as np
+
+# Defaults taken from sim.tcl: nodes pick a speed of 2 + round(rand() * 15) m/s
+# and travel inside a 480 x 380 area.
+MIN_SPEED = 2.0
+MAX_SPEED = 17.0
+
+
+class MobilityModel:
+    """Base class for the batched mobility models.
+
+    Positions are kept in an (n, 2) float array and every model advances all
+    nodes at once in ``step``; nodes never leave the ``bounds`` rectangle
+    (min_x, min_y, max_x, max_y).
+    """
+
+    def __init__(self, positions, bounds, seed=None):
+        self.positions = np.array(positions, dtype=float).reshape(-1, 2)
+        self.bounds = tuple(float(v) for v in bounds)
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def set_bounds(self, bounds):
+        """Change the movement area, pulling nodes back inside it if needed."""
+        self.bounds = tuple(float(v) for v in bounds)
+        min_x, min_y, max_x, max_y = self.bounds
+        np.clip(self.positions[:, 0], min_x, max_x, out=self.positions[:, 0])
+        np.clip(self.positions[:, 1], min_y, max_y, out=self.positions[:, 1])
+
+    def random_points(self, count):
+        min_x, min_y, max_x, max_y = self.bounds
+        points = np.empty((count, 2))
+        points[:, 0] = self.rng.uniform(min_x, max_x, count)
+        points[:, 1] = self.rng.uniform(min_y, max_y, count)
+        return points
+
+    def step(self, dt):
+        """Advance every node by ``dt`` seconds."""
+        raise NotImplementedError
+
+    def reflect(self, headings):
+        """Bounce nodes that crossed the border back inside and mirror their headings."""
+        min_x, min_y, max_x, max_y = self.bounds
+        x = self.positions[:, 0]
+        y = self.positions[:, 1]
+        low_x = x < min_x
+        high_x = x > max_x
+        low_y = y < min_y
+        high_y = y > max_y
+        x[low_x] = 2 * min_x - x[low_x]
+        x[high_x] = 2 * max_x - x[high_x]
+        y[low_y] = 2 * min_y - y[low_y]
+        y[high_y] = 2 * max_y - y[high_y]
+        # A step longer than the area itself can still overshoot after reflecting.
+        np.clip(x, min_x, max_x, out=x)
+        np.clip(y, min_y, max_y, out=y)
+        flip_x = low_x | high_x
+        flip_y = low_y | high_y
+        headings[flip_x] = np.pi - headings[flip_x]
+        headings[flip_y] = -headings[flip_y]
+
+
+class RandomWaypoint(MobilityModel):
+    """Random waypoint model, the one sim.tcl drives through ``setdest``.
+
+    Each node travels in a straight line to a random waypoint at a random
+    speed, pauses there, then picks the next waypoint.
+    """
+
+    def __init__(self, positions, bounds, min_speed=MIN_SPEED, max_speed=MAX_SPEED,
+                 max_pause=0.0, seed=None):
+        super().__init__(positions, bounds, seed)
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self.max_pause = max_pause
+        count = len(self.positions)
+        self.waypoints = self.random_points(count)
+        self.speeds = self.rng.uniform(min_speed, max_speed, count)
+        self.pauses = np.zeros(count)
+
+    def set_bounds(self, bounds):
+        super().set_bounds(bounds)
+        min_x, min_y, max_x, max_y = self.bounds
+        np.clip(self.waypoints[:, 0], min_x, max_x, out=self.waypoints[:, 0])
+        np.clip(self.waypoints[:, 1], min_y, max_y, out=self.waypoints[:, 1])
+
+    def step(self, dt):
+        paused = self.pauses > 0
+        self.pauses[paused] = np.maximum(self.pauses[paused] - dt, 0.0)
+
+        moving = ~paused
+        delta = self.waypoints[moving] - self.positions[moving]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        travel = self.speeds[moving] * dt
+        arrived = travel >= distance
+        # Nodes that reach their waypoint this tick snap onto it; the rest move along the segment.
+        scale = np.where(arrived, 1.0, travel / np.where(distance > 0, distance, 1.0))
+        self.positions[moving] += delta * scale[:, None]
+
+        done = np.flatnonzero(moving)[arrived]
+        if len(done):
+            self.waypoints[done] = self.random_points(len(done))
+            self.speeds[done] = self.rng.uniform(self.min_speed, self.max_speed, len(done))
+            self.pauses[done] = self.rng.uniform(0.0, self.max_pause, len(done))
+        return self.positions
+
+
+class RandomWalk(MobilityModel):
+    """Random walk: nodes keep a random heading and speed for ``epoch`` seconds."""
+
+    def __init__(self, positions, bounds, min_speed=MIN_SPEED, max_speed=MAX_SPEED,
+                 epoch=5.0, seed=None):
+        super().__init__(positions, bounds, seed)
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self.epoch = epoch
+        count = len(self.positions)
+        self.headings = self.rng.uniform(-np.pi, np.pi, count)
+        self.speeds = self.rng.uniform(min_speed, max_speed, count)
+        self.remaining = self.rng.uniform(0.0, epoch, count)  # Stagger the direction changes
+
+    def step(self, dt):
+        self.remaining -= dt
+        expired = np.flatnonzero(self.remaining <= 0)
+        if len(expired):
+            self.headings[expired] = self.rng.uniform(-np.pi, np.pi, len(expired))
+            self.speeds[expired] = self.rng.uniform(self.min_speed, self.max_speed, len(expired))
+            self.remaining[expired] += self.epoch
+
+        travel = self.speeds * dt
+        self.positions[:, 0] += travel * np.cos(self.headings)
+        self.positions[:, 1] += travel * np.sin(self.headings)
+        self.reflect(self.headings)
+        return self.positions
+
+
+class GaussMarkov(MobilityModel):
+    """Gauss-Markov model with temporally correlated speed and heading.
+
+    ``alpha`` is the memory level: 0 gives a memoryless random walk and 1 keeps
+    the initial speed and heading forever.
+    """
+
+    def __init__(self, positions, bounds, mean_speed=(MIN_SPEED + MAX_SPEED) / 2,
+                 speed_sigma=2.0, heading_sigma=0.5, alpha=0.75, seed=None):
+        super().__init__(positions, bounds, seed)
+        self.mean_speed = mean_speed
+        self.speed_sigma = speed_sigma
+        self.heading_sigma = heading_sigma
+        self.alpha = alpha
+        count = len(self.positions)
+        self.speeds = np.full(count, float(mean_speed))
+        self.headings = self.rng.uniform(-np.pi, np.pi, count)
+        self.mean_headings = self.headings.copy()
+
+    def step(self, dt):
+        count = len(self.positions)
+        alpha = self.alpha
+        noise = np.sqrt(1 - alpha * alpha)
+        self.speeds = (alpha * self.speeds + (1 - alpha) * self.mean_speed
+                       + noise * self.rng.normal(0.0, self.speed_sigma, count))
+        np.maximum(self.speeds, 0.0, out=self.speeds)
+        self.headings = (alpha * self.headings + (1 - alpha) * self.mean_headings
+                         + noise * self.rng.normal(0.0, self.heading_sigma, count))
+
+        travel = self.speeds * dt
+        self.positions[:, 0] += travel * np.cos(self.headings)
+        self.positions[:, 1] += travel * np.sin(self.headings)
+        before = self.headings.copy()
+        self.reflect(self.headings)
+        # Nodes bouncing off a border also turn their preferred direction around.
+        bounced = before != self.headings
+        self.mean_headings[bounced] = self.headings[bounced]
+        return self.positions
+
+
+class ScheduledMobility(MobilityModel):
+    """Replays a recorded ``setdest`` schedule, such as the one of a scenario file.
+
+    At ``times[i]`` node ``nodes[i]`` starts heading for ``targets[i]`` at
+    ``speeds[i]`` and stops once it gets there, exactly like NS2 handles
+    ``setdest``. A move that starts in the middle of a step only travels for
+    the rest of that step. ``times`` must be sorted.
+    """
+
+    def __init__(self, positions, bounds, times, nodes, targets, speeds, seed=None):
+        super().__init__(positions, bounds, seed)
+        self.times = times
+        self.nodes = nodes
+        self.targets = targets
+        self.move_speeds = speeds
+        self.next_move = 0
+        self.now = 0.0
+        self.waypoints = self.positions.copy()
+        self.speeds = np.zeros(len(self.positions))
+
+    def step(self, dt):
+        end_time = self.now + dt
+        travel_time = np.full(len(self.positions), dt)
+        last = int(np.searchsorted(self.times, end_time, side="left"))
+        if last > self.next_move:
+            due = slice(self.next_move, last)
+            nodes = np.asarray(self.nodes[due])
+            # Only the last move of a node within one step counts
+            _, reverse_first = np.unique(nodes[::-1], return_index=True)
+            keep = len(nodes) - 1 - reverse_first
+            nodes = nodes[keep]
+            times = np.maximum(np.asarray(self.times[due])[keep], self.now)
+            # Finish the part of the previous leg before the new move starts
+            self.advance(nodes, times - self.now)
+            self.waypoints[nodes] = np.asarray(self.targets[due])[keep]
+            self.speeds[nodes] = np.asarray(self.move_speeds[due])[keep]
+            travel_time[nodes] = end_time - times
+            self.next_move = last
+        self.advance(slice(None), travel_time)
+        self.now = end_time
+        return self.positions
+
+    def advance(self, index, travel_time):
+        """Move the ``index`` nodes toward their waypoints for ``travel_time`` seconds, stopping on arrival."""
+        delta = self.waypoints[index] - self.positions[index]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        travel = self.speeds[index] * travel_time
+        scale = np.where(travel >= distance, 1.0, travel / np.where(distance > 0, distance, 1.0))
+        self.positions[index] += delta * scale[:, None]
+
+
+MODELS = {
+    "waypoint": RandomWaypoint,
+    "walk": RandomWalk,
+    "gauss-markov": GaussMarkov,
+}
@@ -0,0 +1,236 @@
+"""Monte Carlo connectivity and route-length statistics over random topologies.
+
+Every trial drops ``nodes`` nodes uniformly into the area. The trials of a
+chunk are laid out side by side as one graph, far enough apart that no link
+crosses between them, so the links come from a single grid search
+(``spatial_grid.pairs_in_range``) and the components and sampled hop counts
+from a few searches over its CSR adjacency (``hop_table``), all in NumPy.
+Trials run in chunks on a process pool; each chunk has its
+own seed derived from the base seed, the parameter point and the chunk
+number, so results do not depend on the number of workers. Every finished
+chunk is appended to ``chunks.jsonl`` right away (an interrupted run resumes
+from there) and the aggregated histograms are rewritten as chunks come in.
+
+    python monte_carlo.py --nodes 50 100 200 --ranges 100 150 200 250 --trials 2000
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from hop_table import UNREACHABLE, batched_hop_counts, component_labels, csr_from_pairs
+from spatial_grid import pairs_in_range
+
+SUMMARY_FIELDS = ["nodes", "range", "trials", "p_connected", "ci_low", "ci_high", "mean_components",
+                  "mean_largest_fraction", "p_isolated_node", "mean_hops", "max_hops", "p_reachable"]
+LARGEST_BINS = 20  # Histogram bins for the share of nodes in the largest component
+
+
+def run_chunk(node_count, communication_range, width, height, trials, sources, seed, point, chunk):
+    """Run ``trials`` trials of one parameter point and return their aggregated counts."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(point, chunk)))
+    positions = rng.uniform(0.0, 1.0, (trials, node_count, 2)) * (width, height)
+    # Trial t is node t * node_count on; a gap wider than the range keeps each trial's links to itself
+    positions[:, :, 0] += np.arange(trials)[:, None] * (width + 2 * communication_range)
+    total = trials * node_count
+    offsets, indices = csr_from_pairs(*pairs_in_range(positions.reshape(-1, 2), communication_range), total)
+
+    labels = component_labels(offsets, indices)
+    roots = np.flatnonzero(labels == np.arange(total))
+    sizes = np.bincount(labels, minlength=total)[roots]
+    counts = np.bincount(roots // node_count, minlength=trials)  # Components per trial
+    largest = np.zeros(trials, dtype=np.int64)
+    np.maximum.at(largest, roots // node_count, sizes)
+    fractions = largest / node_count
+    isolated = (np.diff(offsets).reshape(trials, node_count) == 0).any(1)
+
+    # One batched BFS from the sampled sources of every trial
+    picked = rng.random((trials, node_count)).argsort(1)[:, :min(sources, node_count)]
+    picked += np.arange(trials)[:, None] * node_count
+    hops = batched_hop_counts(offsets, indices, picked.ravel(), node_count)
+
+    return {
+        "point": point, "chunk": chunk, "trials": trials, "connected": int(np.count_nonzero(counts == 1)),
+        "isolated": int(isolated.sum()), "largest_sum": float(fractions.sum()),
+        "components": np.bincount(counts, minlength=node_count + 1).tolist(),
+        "largest": np.bincount(np.minimum((fractions * LARGEST_BINS).astype(np.int64), LARGEST_BINS - 1),
+                               minlength=LARGEST_BINS).tolist(),
+        "hops": np.bincount(hops[hops > 0], minlength=node_count).tolist(),
+        "unreachable": int(np.count_nonzero(hops == UNREACHABLE)),
+    }
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """95% Wilson score interval of a proportion; stays inside [0, 1] even at 0 or all successes."""
+    if not trials:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+
+class Aggregate:
+    """Running totals of one parameter point, merged from chunk results."""
+
+    def __init__(self, node_count, communication_range):
+        self.node_count = node_count
+        self.communication_range = communication_range
+        self.trials = 0
+        self.connected = 0
+        self.isolated = 0
+        self.largest_sum = 0.0
+        self.components = np.zeros(node_count + 1, dtype=np.int64)
+        self.largest = np.zeros(LARGEST_BINS, dtype=np.int64)
+        self.hops = np.zeros(node_count, dtype=np.int64)
+        self.unreachable = 0
+
+    def add(self, result):
+        self.trials += result["trials"]
+        self.connected += result["connected"]
+        self.isolated += result["isolated"]
+        self.largest_sum += result["largest_sum"]
+        self.components += result["components"]
+        self.largest += result["largest"]
+        self.hops += result["hops"]
+        self.unreachable += result["unreachable"]
+
+    def summary(self):
+        trials = self.trials or 1
+        reachable = int(self.hops.sum())
+        low, high = wilson_interval(self.connected, self.trials)
+        nonzero = np.flatnonzero(self.hops)
+        return {
+            "nodes": self.node_count,
+            "range": self.communication_range,
+            "trials": self.trials,
+            "p_connected": self.connected / trials,
+            "ci_low": low,
+            "ci_high": high,
+            "mean_components": float(np.dot(np.arange(len(self.components)), self.components)) / trials,
+            "mean_largest_fraction": self.largest_sum / trials,
+            "p_isolated_node": self.isolated / trials,
+            "mean_hops": float(np.dot(np.arange(len(self.hops)), self.hops)) / reachable if reachable else 0.0,
+            "max_hops": int(nonzero[-1]) if len(nonzero) else 0,
+            "p_reachable": reachable / (reachable + self.unreachable) if reachable + self.unreachable else 0.0,
+        }
+
+    def histograms(self):
+        """Histograms trimmed to their last non-empty bin."""
+        def trim(values):
+            nonzero = np.flatnonzero(values)
+            return values[:nonzero[-1] + 1].tolist() if len(nonzero) else []
+
+        return {"components": trim(self.components), "hops": trim(self.hops),
+                "largest_fraction": self.largest.tolist(), "unreachable_pairs": self.unreachable}
+
+
+def write_results(aggregates, out_dir):
+    """Rewrite summary.csv and histograms.json from the current totals."""
+    rows = [aggregate.summary() for aggregate in aggregates]
+    with open(os.path.join(out_dir, "summary.csv.tmp"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(os.path.join(out_dir, "summary.csv.tmp"), os.path.join(out_dir, "summary.csv"))
+    histograms = [{"nodes": aggregate.node_count, "range": aggregate.communication_range,
+                   "trials": aggregate.trials, **aggregate.histograms()} for aggregate in aggregates]
+    with open(os.path.join(out_dir, "histograms.json.tmp"), "w") as f:
+        json.dump(histograms, f)
+    os.replace(os.path.join(out_dir, "histograms.json.tmp"), os.path.join(out_dir, "histograms.json"))
+    return rows
+
+
+def run_monte_carlo(points, trials, width, height, out_dir, sources=32, chunk_size=50, seed=1, jobs=None,
+                    flush_every=10):
+    """Run ``trials`` trials for every (nodes, range) point and return the summary rows.
+
+    Chunks already in ``out_dir/chunks.jsonl`` from an earlier run with the
+    same settings are reused instead of being run again.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    settings = {"points": [list(point) for point in points], "trials": trials, "width": width,
+                "height": height, "sources": sources, "chunk_size": chunk_size, "seed": seed}
+    settings_path = os.path.join(out_dir, "settings.json")
+    chunks_path = os.path.join(out_dir, "chunks.jsonl")
+    if os.path.exists(settings_path):
+        with open(settings_path) as f:
+            stale = json.load(f) != settings
+        if stale and os.path.exists(chunks_path):
+            os.remove(chunks_path)  # Those chunks were run with other settings
+    with open(settings_path, "w") as f:
+        json.dump(settings, f, indent=2)
+
+    aggregates = [Aggregate(node_count, communication_range) for node_count, communication_range in points]
+    done = set()
+    if os.path.exists(chunks_path):
+        valid = 0  # Byte offset just past the last complete result
+        with open(chunks_path, "rb") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    break  # A line cut short by an interrupted run
+                if not line.endswith(b"\n"):
+                    break
+                aggregates[result["point"]].add(result)
+                done.add((result["point"], result["chunk"]))
+                valid += len(line)
+        with open(chunks_path, "r+b") as f:
+            f.truncate(valid)  # Drop the partial line so new results are not appended onto it
+
+    tasks = []
+    for point, (node_count, communication_range) in enumerate(points):
+        for chunk, start in enumerate(range(0, trials, chunk_size)):
+            if (point, chunk) not in done:
+                tasks.append((node_count, communication_range, width, height, min(chunk_size, trials - start),
+                              sources, seed, point, chunk))
+    print(f"{len(points)} points x {trials} trials: {len(done)} chunks cached, {len(tasks)} to run")
+
+    with open(chunks_path, "a") as log, ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = [pool.submit(run_chunk, *task) for task in tasks]
+        for finished, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            log.write(json.dumps(result) + "\n")
+            log.flush()
+            aggregates[result["point"]].add(result)
+            if finished % flush_every == 0:
+                write_results(aggregates, out_dir)
+                print(f"[{finished}/{len(futures)}] chunks done")
+    return write_results(aggregates, out_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo connectivity and hop-count statistics.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[50, 100], help="node counts")
+    parser.add_argument("--ranges", type=float, nargs="+", default=[100, 150, 200, 250],
+                        help="communication ranges")
+    parser.add_argument("--trials", type=int, default=1000, help="random topologies per point")
+    parser.add_argument("--width", type=float, default=1000, help="width of the area")
+    parser.add_argument("--height", type=float, default=1000, help="height of the area")
+    parser.add_argument("--sources", type=int, default=32,
+                        help="sources per topology whose hop counts to all nodes are sampled")
+    parser.add_argument("--chunk-size", type=int, default=50, help="trials per task handed to a worker")
+    parser.add_argument("--seed", type=int, default=1, help="base seed")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out-dir", default="monte_carlo", help="where chunks, histograms and the summary go")
+    args = parser.parse_args(argv)
+
+    points = [(node_count, communication_range) for node_count in args.nodes for communication_range in args.ranges]
+    rows = run_monte_carlo(points, args.trials, args.width, args.height, args.out_dir, args.sources,
+                           args.chunk_size, args.seed, args.jobs)
+    for row in rows:
+        print(f"nodes={row['nodes']} range={row['range']:g}: P(connected) {row['p_connected']:.3f} "
+              f"[{row['ci_low']:.3f}, {row['ci_high']:.3f}], components {row['mean_components']:.2f}, "
+              f"mean hops {row['mean_hops']:.2f}")
+    print(f"Summary and histograms written to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""Discrete-event, packet-level simulation on top of the headless engine.
+
+Time only moves from one scheduled event to the next. Mobility ticks, HELLO
+beacons, AODV RREQ/RREP/RERR and CBR data packets are all events, and every
+transmission occupies the sender's interface queue for its air time plus a
+per-hop latency. The report has the same shape as trace_analyzer's, so the
+numbers line up with what performance.awk and graph.py use for NS2 runs.
+
+    python packet_sim.py --nodes 50 --flows 0:1,2:3 --duration 200 --seed 1
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import random
+import sys
+import time
+from collections import defaultdict, deque
+
+from engine import ACTIVE_ROUTE_TIMEOUT, Simulation
+from route_engine import STRATEGIES, WEIGHTS
+from scenario import load_scenario
+from trace_analyzer import FlowStats, build_report, write_performance
+
+BANDWIDTH = 2e6  # Bits per second, the 802.11 data rate NS2 uses by default
+HOP_LATENCY = 0.002  # Seconds of MAC contention, propagation and processing per hop
+QUEUE_LIMIT = 50  # Interface queue length, like val(ifqlen) in sim.tcl
+BUFFER_LIMIT = 64  # Data packets a source holds while it discovers a route
+HELLO_INTERVAL = 1.0
+RREQ_RETRIES = 2
+NET_TRAVERSAL_TIME = 2.8  # AODV default: 2 * NODE_TRAVERSAL_TIME * NET_DIAMETER
+
+# Sizes in bytes, as they show up in NS2 traces
+PACKET_SIZES = {"hello": 44, "rreq": 48, "rrep": 44, "rerr": 32}
+
+
+class Scheduler:
+    """Heap of (time, sequence, callback, args) events run in time order.
+
+    ``run`` executes events as fast as possible, or, with ``warp``, paces them
+    so simulated time advances ``warp`` times faster than the wall clock.
+    """
+
+    def __init__(self):
+        self.queue = []
+        self.now = 0.0
+        self.counter = itertools.count()  # Keeps events at the same time in scheduling order
+        self.processed = 0
+
+    def schedule(self, delay, callback, *args):
+        heapq.heappush(self.queue, (self.now + delay, next(self.counter), callback, args))
+
+    def run(self, until, warp=None):
+        queue = self.queue
+        origin = self.now
+        started = time.perf_counter()
+        while queue and queue[0][0] <= until:
+            when, _, callback, args = heapq.heappop(queue)
+            if warp:
+                wait = started + (when - origin) / warp - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            self.now = when
+            callback(*args)
+            self.processed += 1
+        self.now = until
+
+
+class Packet:
+    __slots__ = ("kind", "size", "source", "destination", "uid", "created", "flow", "hops", "rreq_id",
+                 "unreachable")
+
+    def __init__(self, kind, size, source=None, destination=None, uid=None, created=0.0, flow=None, hops=0,
+                 rreq_id=None, unreachable=()):
+        self.kind = kind
+        self.size = size
+        self.source = source
+        self.destination = destination
+        self.uid = uid
+        self.created = created
+        self.flow = flow
+        self.hops = hops
+        self.rreq_id = rreq_id
+        self.unreachable = unreachable
+
+
+class PacketSimulation:
+    """CBR flows over AODV (or ideal shortest-path routes) with simulated time.
+
+    ``sim`` is an engine.Simulation providing the nodes, their mobility and
+    the links; it is ticked from the event queue every ``tick_seconds``.
+    With ``protocol="aodv"`` routes live in the nodes' routing tables and are
+    discovered, used and broken through real RREQ/RREP/RERR packets; with
+    "proactive" every hop reads the engine's shortest-path table (or asks its
+    route engine, which sees the interface queues for the "queue" weight), so
+    only the HELLO beacons cost anything.
+    """
+
+    def __init__(self, sim, protocol="aodv", bandwidth=BANDWIDTH, hop_latency=HOP_LATENCY,
+                 queue_limit=QUEUE_LIMIT, hello_interval=HELLO_INTERVAL, seed=None):
+        self.sim = sim
+        self.protocol = protocol
+        self.bandwidth = bandwidth
+        self.hop_latency = hop_latency
+        self.queue_limit = queue_limit
+        self.hello_interval = hello_interval
+        self.rng = random.Random(seed)
+        self.scheduler = Scheduler()
+        sim.events.clock = lambda: self.scheduler.now
+
+        self.queues = {node: deque() for node in sim.nodes}  # Interface queues
+        if sim.route_engine is not None:
+            sim.route_engine.queue_length = lambda node: len(self.queues[node])
+        self.busy = set()  # Nodes currently transmitting
+        self.buffers = defaultdict(list)  # (source, destination) -> data packets waiting for a route
+        self.discovering = {}  # (source, destination) -> RREQ ID of the discovery in progress
+        self.flows = defaultdict(FlowStats)
+        self.drops = defaultdict(int)  # (layer, reason) -> data packets dropped
+        self.routing_packets = 0
+        self.routing_bytes = 0
+        self.uids = itertools.count()
+
+        self.scheduler.schedule(sim.tick_seconds, self.tick)
+        if hello_interval:
+            for node in sim.nodes:
+                self.scheduler.schedule(self.rng.uniform(0, hello_interval), self.hello, node)
+
+    @property
+    def now(self):
+        return self.scheduler.now
+
+    def tick(self):
+        self.sim.tick()
+        self.scheduler.schedule(self.sim.tick_seconds, self.tick)
+
+    # Traffic
+
+    def add_flow(self, source, destination, packet_size=512, rate=4.0, start=10.0, stop=None):
+        """Constant bit rate flow sending ``rate`` packets of ``packet_size`` bytes per second."""
+        name = f"{source.node_id - 1}->{destination.node_id - 1} cbr"  # Node indices as in sim.tcl
+        self.scheduler.schedule(start, self.generate, name, source, destination, packet_size, 1.0 / rate, stop)
+
+    def generate(self, name, source, destination, packet_size, interval, stop):
+        if stop is not None and self.now > stop:
+            return
+        stats = self.flows[name]
+        stats.sent += 1
+        if stats.first_send is None:
+            stats.first_send = self.now
+        packet = Packet("data", packet_size, source, destination, next(self.uids), self.now, name)
+        self.route_data(source, packet)
+        self.scheduler.schedule(interval, self.generate, name, source, destination, packet_size, interval, stop)
+
+    def deliver(self, packet):
+        stats = self.flows[packet.flow]
+        delay = self.now - packet.created
+        stats.received += 1
+        stats.bytes_received += packet.size
+        stats.delay_sum += delay
+        if delay > stats.max_delay:
+            stats.max_delay = delay
+        stats.last_receive = self.now
+
+    def drop(self, packet, layer, reason):
+        if packet.kind == "data":
+            self.drops[(layer, reason)] += 1
+
+    # Link layer
+
+    def transmit(self, node, packet, receiver=None):
+        """Queue ``packet`` at ``node``; ``receiver`` None broadcasts it to every neighbor."""
+        queue = self.queues[node]
+        if node in self.busy and len(queue) >= self.queue_limit:
+            self.drop(packet, "IFQ", "IFQ")  # DROP_IFQ_QFULL in NS2 traces
+            return
+        if packet.kind != "data":
+            # Only control packets that actually go out count as overhead
+            self.routing_packets += 1
+            self.routing_bytes += packet.size
+        if node not in self.busy:
+            self.start_transmission(node, packet, receiver)
+            return
+        if packet.kind == "data":
+            queue.append((packet, receiver))
+        else:
+            queue.appendleft((packet, receiver))  # Routing packets jump the queue, like PriQueue
+
+    def start_transmission(self, node, packet, receiver):
+        self.busy.add(node)
+        air_time = packet.size * 8 / self.bandwidth + self.hop_latency
+        self.scheduler.schedule(air_time, self.end_transmission, node, packet, receiver)
+
+    def end_transmission(self, node, packet, receiver):
+        if receiver is None:
+            for neighbor in list(node.neighbors):
+                self.receive(neighbor, node, packet)
+        elif receiver in node.neighbors:
+            self.receive(receiver, node, packet)
+        else:
+            self.link_failed(node, receiver, packet)
+
+        queue = self.queues[node]
+        if queue:
+            self.start_transmission(node, *queue.popleft())
+        else:
+            self.busy.discard(node)
+
+    def receive(self, node, sender, packet):
+        kind = packet.kind
+        if kind == "data":
+            self.route_data(node, packet)
+        elif kind == "rreq":
+            self.receive_rreq(node, sender, packet)
+        elif kind == "rrep":
+            self.receive_rrep(node, sender, packet)
+        elif kind == "rerr":
+            self.receive_rerr(node, sender, packet)
+
+    def hello(self, node):
+        self.transmit(node, Packet("hello", PACKET_SIZES["hello"], node))
+        self.scheduler.schedule(self.hello_interval, self.hello, node)
+
+    # Routing
+
+    def next_hop(self, node, destination):
+        if self.protocol == "proactive":
+            if self.sim.route_engine is not None:
+                # Searched again at every hop, so queue-weighted routes follow the current backlog
+                path = self.sim.route_engine.route(node, destination)
+                return path[1] if path is not None and len(path) > 1 else None
+            return self.sim.hop_table.next_hop(node, destination)
+        next_hop = node.valid_next_hop(destination, self.now)
+        if next_hop is not None:
+            node.install_route(destination, next_hop, self.now + ACTIVE_ROUTE_TIMEOUT)  # Use refreshes it
+        return next_hop
+
+    def route_data(self, node, packet):
+        destination = packet.destination
+        if node is destination:
+            self.deliver(packet)
+            return
+        next_hop = self.next_hop(node, destination)
+        if next_hop is not None:
+            self.transmit(node, packet, next_hop)
+        elif node is packet.source and self.protocol == "aodv":
+            buffer = self.buffers[(node, destination)]
+            if len(buffer) >= BUFFER_LIMIT:
+                self.drop(packet, "RTR", "NRTE")
+                return
+            buffer.append(packet)
+            if (node, destination) not in self.discovering:
+                self.send_rreq(node, destination, 0)
+        else:
+            self.drop(packet, "RTR", "NRTE")
+
+    def link_failed(self, node, receiver, packet):
+        """A unicast found its next hop gone: drop it and tear down the routes over that link."""
+        self.drop(packet, "MAC", "LINK")
+        if self.protocol != "aodv":
+            return
+        lost = [destination for destination, next_hop in node.routes.items() if next_hop is receiver]
+        for destination in lost:
+            node.drop_route(destination)
+        if lost:
+            self.transmit(node, Packet("rerr", PACKET_SIZES["rerr"], node, unreachable=lost))
+
+    def send_rreq(self, node, destination, attempt):
+        node.rreq_id += 1
+        node.seen_rreqs[node.node_id] = node.rreq_id
+        self.discovering[(node, destination)] = node.rreq_id
+        self.transmit(node, Packet("rreq", PACKET_SIZES["rreq"], node, destination, rreq_id=node.rreq_id))
+        # Wait longer after every unanswered attempt, as AODV's binary exponential backoff does
+        self.scheduler.schedule(NET_TRAVERSAL_TIME * 2 ** attempt, self.rreq_timeout, node, destination,
+                                node.rreq_id, attempt)
+
+    def rreq_timeout(self, node, destination, rreq_id, attempt):
+        if self.discovering.get((node, destination)) != rreq_id:
+            return  # Answered already, or superseded by a newer discovery
+        if attempt < RREQ_RETRIES:
+            self.send_rreq(node, destination, attempt + 1)
+            return
+        del self.discovering[(node, destination)]
+        for packet in self.buffers.pop((node, destination), ()):
+            self.drop(packet, "RTR", "NRTE")
+
+    def receive_rreq(self, node, sender, packet):
+        originator = packet.source
+        if node is originator or node.seen_rreqs.get(originator.node_id, 0) >= packet.rreq_id:
+            return  # Duplicate
+        node.seen_rreqs[originator.node_id] = packet.rreq_id
+        node.install_route(originator, sender, self.now + ACTIVE_ROUTE_TIMEOUT)  # Reverse route
+        if node is packet.destination:
+            reply = Packet("rrep", PACKET_SIZES["rrep"], originator, node)
+            self.transmit(node, reply, sender)
+            return
+        self.transmit(node, Packet("rreq", packet.size, originator, packet.destination, hops=packet.hops + 1,
+                                   rreq_id=packet.rreq_id))
+
+    def receive_rrep(self, node, sender, packet):
+        originator, destination = packet.source, packet.destination
+        node.install_route(destination, sender, self.now + ACTIVE_ROUTE_TIMEOUT)  # Forward route
+        if node is originator:
+            self.discovering.pop((node, destination), None)
+            for data in self.buffers.pop((node, destination), ()):
+                self.route_data(node, data)
+            return
+        next_hop = node.valid_next_hop(originator, self.now)
+        if next_hop is None:
+            return  # The reverse route expired before the reply came back
+        self.transmit(node, Packet("rrep", packet.size, originator, destination, hops=packet.hops + 1), next_hop)
+
+    def receive_rerr(self, node, sender, packet):
+        lost = [destination for destination in packet.unreachable if node.routes.get(destination) is sender]
+        for destination in lost:
+            node.drop_route(destination)
+        if lost:
+            self.transmit(node, Packet("rerr", packet.size, node, unreachable=lost))
+
+    # Running
+
+    def run(self, duration, warp=None):
+        started = time.perf_counter()
+        self.scheduler.run(duration, warp)
+        elapsed = time.perf_counter() - started
+        report = build_report(self.flows, self.routing_packets, self.routing_bytes, self.drops)
+        report["events"] = self.scheduler.processed
+        report["wall_time"] = elapsed
+        report["events_per_second"] = self.scheduler.processed / elapsed if elapsed > 0 else 0.0
+        return report
+
+
+def parse_flows(spec):
+    """Turn "0:1,2:3" into [(0, 1), (2, 3)] node indices."""
+    return [tuple(int(node) for node in pair.split(":")) for pair in spec.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Packet-level discrete-event MANET simulation.")
+    parser.add_argument("--nodes", type=int, default=10, help="number of nodes")
+    parser.add_argument("--duration", type=float, default=200.0, help="simulated seconds, like val(stop)")
+    parser.add_argument("--protocol", choices=["aodv", "proactive"], default="aodv")
+    parser.add_argument("--route", choices=["table"] + STRATEGIES, default="table",
+                        help="how proactive routes are found: the cached hop table or a per-hop search")
+    parser.add_argument("--weight", choices=sorted(WEIGHTS), default="hops",
+                        help="link weight for --route dijkstra and astar; 'queue' avoids backlogged nodes")
+    parser.add_argument("--flows", type=parse_flows, default=None,
+                        help="CBR flows as src:dst pairs of node indices (default: 0:1,2:3 or the scenario's)")
+    parser.add_argument("--packet-size", type=int, default=512, help="CBR packet size in bytes")
+    parser.add_argument("--rate", type=float, default=4.0, help="CBR packets per second per flow")
+    parser.add_argument("--start", type=float, default=10.0, help="time the flows start")
+    parser.add_argument("--range", type=float, default=250, dest="communication_range", help="radio range")
+    parser.add_argument("--width", type=float, default=500, help="width of the area")
+    parser.add_argument("--height", type=float, default=500, help="height of the area")
+    parser.add_argument("--tick-seconds", type=float, default=0.5, help="simulated time between mobility steps")
+    parser.add_argument("--bandwidth", type=float, default=BANDWIDTH, help="link rate in bits per second")
+    parser.add_argument("--hello-interval", type=float, default=HELLO_INTERVAL, help="0 disables HELLOs")
+    parser.add_argument("--warp", type=float, default=None,
+                        help="run this many times faster than real time instead of as fast as possible")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--scenario", help="scenario file from scenario.py (overrides --nodes, --width and --height)")
+    parser.add_argument("--performance", default="",
+                        help="also write the totals in the performance.txt format graph.py reads")
+    parser.add_argument("--json", help="write the full report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario) if args.scenario else None
+    sim = Simulation(node_count=args.nodes, communication_range=args.communication_range,
+                     bounds=(0, 0, args.width, args.height), tick_seconds=args.tick_seconds, seed=args.seed,
+                     scenario=scenario, route_strategy=args.route, route_weight=args.weight)
+    packet_sim = PacketSimulation(sim, protocol=args.protocol, bandwidth=args.bandwidth,
+                                  hello_interval=args.hello_interval,
+                                  seed=scenario.seed if scenario and args.seed is None else args.seed)
+    flows = args.flows or (scenario.flows if scenario and scenario.flows else parse_flows("0:1,2:3"))
+    for src, dst in flows:
+        if max(src, dst) >= len(sim.nodes):
+            parser.error(f"flow {src}:{dst} needs at least {max(src, dst) + 1} nodes")
+        packet_sim.add_flow(sim.nodes[src], sim.nodes[dst], args.packet_size, args.rate, args.start)
+    report = packet_sim.run(args.duration, args.warp)
+
+    if args.performance:
+        write_performance(report, args.performance)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    json.dump(report["total"], sys.stdout, indent=2)
+    print()
+    print(f"{report['events']} events in {report['wall_time']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
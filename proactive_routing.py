@@ -1,51 +1,122 @@
+import argparse
+import time
 import tkinter as tk
-import random
-import math
-from collections import deque
-
-class Node:
-    def __init__(self, node_id, x, y):
-        self.node_id = node_id
-        self.x = x
-        self.y = y
-        self.routes = {}  # Routing table (destination_node -> next_hop)
-        self.neighbors = []
-        self.routing_timeout = {}  # Timeout for routes
-
-    def move_randomly(self, max_width, max_height):
-        self.x = random.randint(50, max_width - 50)
-        self.y = random.randint(50, max_height - 50)
-
-    def add_neighbor(self, neighbor):
-        if neighbor not in self.neighbors:
-            self.neighbors.append(neighbor)
-
-    def distance_to(self, other_node):
-        return math.sqrt((self.x - other_node.x) ** 2 + (self.y - other_node.y) ** 2)
-
-    def update_route(self, destination, next_hop):
-        """Update the routing table."""
-        self.routes[destination] = next_hop
-        self.routing_timeout[destination] = 10  # Route timeout (just for simulation)
-        return f"Route to Node {destination.node_id} via Node {next_hop.node_id} added."
-
-    def clear_routes(self):
-        """Clear all routes."""
-        self.routes.clear()
-        self.routing_timeout.clear()
-
-    def set_initial_routes(self, nodes):
-        """Set initial routes to all other nodes."""
-        for node in nodes:
-            if node != self:
-                self.routes[node] = node
-                self.routing_timeout[node] = 10  # Simulating active route
+
+from engine import Simulation
+from event_log import TextLogView
+from instrumentation import HudOverlay
+from renderer import CanvasRenderer
+from scenario import load_scenario
+from sim_worker import SimulationWorker
+from trace_replay import ReplayView, TraceReplay
+
+MOVE_INTERVAL_MS = 500  # Real time between two mobility ticks
+POLL_INTERVAL_MS = 30  # How often the GUI picks up finished ticks and queries
+
+
+class RoutingTableView:
+    """Routing table window that only formats the lines currently on screen.
+
+    The table has one header, one line per destination and a blank separator
+    for every node. Instead of inserting all of them into the Text widget,
+    the view keeps a virtual scroll offset and re-renders the visible slice,
+    so only the routes of the nodes in view are ever looked up. ``table`` is
+    anything with ``hop_count`` and ``next_hop``, such as the distance-vector
+    tables the nodes have learned. With a ``worker`` the lines are looked up
+    on the simulation thread and shown once they are ready.
+    """
+
+    VISIBLE_LINES = 20
+
+    def __init__(self, root, nodes, table, worker=None):
+        self.nodes = nodes
+        self.table = table
+        self.worker = worker
+        self.lines_per_node = len(nodes) + 1  # Header, other nodes, blank line
+        self.total_lines = len(nodes) * self.lines_per_node
+        self.first_line = 0
+
+        # Create a new top-level window for routing tables
+        self.window = tk.Toplevel(root)
+        self.window.title("Routing Tables")
+        self.window.geometry("600x400")  # Set the size of the window
+
+        self.text = tk.Text(
+            self.window, height=self.VISIBLE_LINES, width=70, bg="#1e1e1e", fg="#ffffff", font=("Consolas", 12)
+        )
+        self.text.grid(row=0, column=0, padx=10, pady=10)
+
+        # The scrollbar drives the virtual offset instead of the Text widget itself
+        self.scrollbar = tk.Scrollbar(self.window, command=self.scroll)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.text.bind("<MouseWheel>", lambda event: self.scroll("scroll", -event.delta // 120, "units"))
+        self.text.bind("<Button-4>", lambda event: self.scroll("scroll", -3, "units"))
+        self.text.bind("<Button-5>", lambda event: self.scroll("scroll", 3, "units"))
+
+        self.render()
+
+    def line(self, index):
+        node_pos, offset = divmod(index, self.lines_per_node)
+        node = self.nodes[node_pos]
+        if offset == 0:
+            return f"Node {node.node_id} Routing Table:"
+        if offset == self.lines_per_node - 1:
+            return ""  # Empty line between nodes
+
+        dest_pos = offset - 1
+        if dest_pos >= node_pos:
+            dest_pos += 1  # Skip the node itself
+        destination = self.nodes[dest_pos]
+        hops = self.table.hop_count(node, destination)
+        if hops is None:
+            return f"  Destination Node {destination.node_id}: Unreachable"
+        next_hop = self.table.next_hop(node, destination)
+        return f"  Destination Node {destination.node_id}: Next Hop -> Node {next_hop.node_id}, Hops: {hops}"
+
+    def scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            first_line = int(float(amount) * self.total_lines)
+        else:
+            step = self.VISIBLE_LINES if unit == "pages" else 1
+            first_line = self.first_line + int(amount) * step
+        max_first = max(self.total_lines - self.VISIBLE_LINES, 0)
+        self.first_line = min(max(first_line, 0), max_first)
+        self.render()
+        return "break"
+
+    def lines(self, first_line, last_line):
+        return first_line, last_line, [self.line(i) for i in range(first_line, last_line)]
+
+    def render(self):
+        last_line = min(self.first_line + self.VISIBLE_LINES, self.total_lines)
+        if self.worker:
+            self.worker.call(self.lines, self.first_line, last_line, callback=self.show)
+        else:
+            self.show(self.lines(self.first_line, last_line))
+
+    def show(self, result):
+        first_line, last_line, lines = result
+        if not self.text.winfo_exists():
+            return  # Closed while the lines were being looked up
+        self.text.config(state="normal")
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.config(state="disabled")  # Disable editing the text box
+        if self.total_lines:
+            self.scrollbar.set(first_line / self.total_lines, last_line / self.total_lines)
+
 
 class Network:
-    def __init__(self, root, communication_range=150):
+    def __init__(self, root, communication_range=150, node_count=15, seed=None, scenario=None):
         self.root = root
-        self.nodes = []
-        self.communication_range = communication_range
+        self.sim = Simulation(
+            node_count=node_count, communication_range=communication_range, tick_seconds=MOVE_INTERVAL_MS / 1000,
+            protocol="dsdv", seed=seed, scenario=scenario
+        )
+        self.nodes = self.sim.nodes
+        # Ticks and routing run on the worker thread; the GUI only draws its snapshots
+        self.worker = SimulationWorker(self.sim, MOVE_INTERVAL_MS / 1000)
+        self.snapshot = self.worker.buffer.front
         self.movement_active = False
         self.selected_source = None
         self.selected_destination = None
@@ -58,12 +129,19 @@ class Network:
         self.canvas = tk.Canvas(self.root, bg="#282c34", width=650, height=500, highlightthickness=0)
         self.canvas.grid(row=0, column=0, padx=20, pady=20, rowspan=6, sticky="nsew")
         self.canvas.bind("<Button-1>", self.select_node)
+        if scenario is None:
+            self.canvas.bind("<Configure>", self.resize)  # A scenario keeps its own area
+        self.renderer = CanvasRenderer(self.canvas, node_radius=20, outline_width=3, font=("Arial", 10, "bold"))
+        self.hud = HudOverlay(self.canvas, self.sim.profiler)
+        self.root.bind("<F2>", self.toggle_instrumentation)  # Per-phase timings overlay
+        self.root.bind("<F3>", self.export_profile)
 
         # Status text area
         self.status_text = tk.Text(
             self.root, height=15, width=60, bg="#1e1e1e", fg="#ffffff", font=("Consolas", 12), state="normal"
         )
         self.status_text.grid(row=6, column=0, padx=20, pady=20, sticky="nsew")
+        self.log_view = TextLogView(self.sim.events, self.status_text, self.root, read_only=True)
 
         # Buttons with dark theme
         self.start_button = tk.Button(
@@ -113,62 +191,22 @@ class Network:
         self.root.grid_columnconfigure(0, weight=3)
         self.root.grid_columnconfigure(1, weight=1)
 
-        self.create_nodes()
-        self.update_neighbors()
         self.draw_network()
+        self.worker.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.poll()
 
         # Log initial message
         self.update_status("Hello MANET")
 
-    def create_nodes(self):
-        for node_id in range(1, 16):  # 15 nodes
-            x = random.randint(50, 700)
-            y = random.randint(50, 400)
-            node = Node(node_id, x, y)
-            self.nodes.append(node)
-
-        for node in self.nodes:
-            node.set_initial_routes(self.nodes)
-
-    def update_neighbors(self):
-        for node in self.nodes:
-            node.neighbors = []
-        for i in range(len(self.nodes)):
-            for j in range(i + 1, len(self.nodes)):
-                if self.nodes[i].distance_to(self.nodes[j]) <= self.communication_range:
-                    self.nodes[i].add_neighbor(self.nodes[j])
-                    self.nodes[j].add_neighbor(self.nodes[i])
-
     def draw_network(self):
-        self.canvas.delete("all")
-        for node in self.nodes:
-            fill_color = "#56b6c2"
-            if node == self.selected_source:
-                fill_color = "#e06c75"  # Red for source
-            elif node == self.selected_destination:
-                fill_color = "#98c379"  # Green for destination
-
-            # Drawing a larger node with distinct borders
-            self.canvas.create_oval(
-                node.x - 20, node.y - 20, node.x + 20, node.y + 20,
-                fill=fill_color, outline="#ffffff", width=3  # Increased border width
-            )
-            self.canvas.create_text(node.x, node.y, text=str(node.node_id), fill="#ffffff", font=("Arial", 10, "bold"))
-
-        for node in self.nodes:
-            for neighbor in node.neighbors:
-                self.canvas.create_line(
-                    node.x, node.y, neighbor.x, neighbor.y,
-                    fill="#abb2bf", dash=(4, 2)
-                )
-
-        for i in range(len(self.active_path) - 1):
-            node1 = self.active_path[i]
-            node2 = self.active_path[i + 1]
-            self.canvas.create_line(
-                node1.x, node1.y, node2.x, node2.y,
-                fill="#e06c75", width=3
-            )
+        highlights = {}
+        if self.selected_source:
+            highlights[self.selected_source] = "#e06c75"  # Red for source
+        if self.selected_destination and self.selected_destination != self.selected_source:
+            highlights[self.selected_destination] = "#98c379"  # Green for destination
+        snapshot = self.snapshot
+        self.renderer.render(self.nodes, snapshot.edges, highlights, self.active_path, snapshot.positions)
 
     def select_node(self, event):
         clicked_node = self.get_node_at(event.x, event.y)
@@ -190,31 +228,64 @@ class Network:
         self.draw_network()
 
     def get_node_at(self, x, y):
-        for node in self.nodes:
-            if (node.x - 20 <= x <= node.x + 20) and (node.y - 20 <= y <= node.y + 20):
+        for node, (node_x, node_y) in self.snapshot.positions.items():
+            if (node_x - 20 <= x <= node_x + 20) and (node_y - 20 <= y <= node_y + 20):
                 return node
         return None
 
+    def resize(self, event):
+        self.worker.call(self.sim.set_bounds, (50, 50, event.width - 50, event.height - 50))
+
     def start_movement(self):
         if not self.movement_active:
             self.movement_active = True
             self.update_status("Node movement started.")
             self.active_path = []  # Clear any old path when movement starts
-            self.move_nodes()
+            self.worker.resume()
 
     def stop_movement(self):
         self.movement_active = False
+        self.worker.pause()
         self.update_status("Node movement stopped.")
 
-    def move_nodes(self):
-        if self.movement_active:
-            max_width = self.canvas.winfo_width()
-            max_height = self.canvas.winfo_height()
-            for node in self.nodes:
-                node.move_randomly(max_width, max_height)
-            self.update_neighbors()
+    def poll(self):
+        """Deliver finished queries and draw the newest tick, skipping any the GUI was too slow for."""
+        for callback, result in self.worker.finished():
+            callback(result)
+        snapshot = self.worker.buffer.take()
+        if snapshot is not None:
+            self.snapshot = snapshot
+            started = time.perf_counter()
             self.draw_network()
-            self.root.after(500, self.move_nodes)
+            profiler = self.sim.profiler
+            if snapshot.frame is not None:
+                profiler.amend(snapshot.frame, render_ms=(time.perf_counter() - started) * 1000)
+            if profiler.enabled:
+                self.hud.update()
+        self.root.after(POLL_INTERVAL_MS, self.poll)
+
+    def close(self):
+        self.worker.stop()
+        self.root.destroy()
+
+    def toggle_instrumentation(self, event=None):
+        profiler = self.sim.profiler
+        profiler.enabled = not profiler.enabled
+        if profiler.enabled:
+            self.hud.update()
+            self.update_status("Instrumentation on: F2 hides it, F3 exports the samples.")
+        else:
+            self.hud.hide()
+            self.update_status("Instrumentation off.")
+
+    def export_profile(self, event=None):
+        if not self.sim.profiler.samples:
+            self.update_status("No instrumentation samples yet. Press F2 and start the movement.")
+            return
+        name = time.strftime("profile_%Y%m%d_%H%M%S")
+        self.sim.profiler.export(name + ".csv")
+        self.sim.profiler.export(name + ".json")
+        self.update_status(f"Instrumentation samples written to {name}.csv and {name}.json.")
 
     def send_data(self):
         if not self.selected_source or not self.selected_destination:
@@ -223,8 +294,10 @@ class Network:
         source = self.selected_source
         destination = self.selected_destination
         self.update_status(f"Sending data from Node {source.node_id} to Node {destination.node_id}...")
+        self.worker.call(self.find_route, source, destination, callback=self.show_route)
 
-        path, hop_count = self.find_route(source, destination)
+    def show_route(self, result):
+        path, hop_count = result
         if not path:
             self.update_status("No route found. Message cannot be delivered.")
             return
@@ -234,85 +307,46 @@ class Network:
         self.draw_network()
 
     def find_route(self, source, destination):
-        """ Simple flood-based routing to find the shortest path (in terms of hops). """
-        visited = set()
-        queue = deque([(source, [source], 0)])  # Keep track of the number of hops in the queue
-
-        while queue:
-            current_node, path, hop_count = queue.popleft()
-            if current_node == destination:
-                return path, hop_count
-
-            for neighbor in current_node.neighbors:
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [neighbor], hop_count + 1))
-
-        return None, None  # No path found
+        """Path along the next hops of the distance-vector routing tables."""
+        path = self.sim.route(source, destination)
+        if path is None:
+            return None, None  # No path found
+        return path, len(path) - 1
 
     def clear_logs(self):
-        self.status_text.delete(1.0, tk.END)
+        self.log_view.clear()
 
     def show_routing_tables(self):
-        # Create a new top-level window for routing tables
-        routing_window = tk.Toplevel(self.root)
-        routing_window.title("Routing Tables")
-        routing_window.geometry("600x400")  # Set the size of the window
-
-        # Create a scrollable text widget
-        routing_text = tk.Text(routing_window, height=20, width=70, bg="#1e1e1e", fg="#ffffff", font=("Consolas", 12))
-        routing_text.grid(row=0, column=0, padx=10, pady=10)
-
-        # Add a vertical scrollbar
-        scrollbar = tk.Scrollbar(routing_window, command=routing_text.yview)
-        scrollbar.grid(row=0, column=1, sticky="ns")
-        routing_text.config(yscrollcommand=scrollbar.set)
-
-        # Populate the routing table with paths and costs
-        for node in self.nodes:
-            routing_text.insert(tk.END, f"Node {node.node_id} Routing Table:\n")
-            for destination, next_hop in node.routes.items():
-                # Calculate the number of hops
-                hops = self.get_hop_count(node, destination)
-                routing_text.insert(tk.END, f"  Destination Node {destination.node_id}: Next Hop -> Node {next_hop.node_id}, Hops: {hops}\n")
-            routing_text.insert(tk.END, "\n")  # Add an empty line between nodes
-
-        routing_text.config(state="disabled")  # Disable editing the text box
+        RoutingTableView(self.root, self.nodes, self.sim.distance_vector, self.worker)
 
     def get_hop_count(self, source, destination):
-        """Calculate the hop count between source and destination."""
-        visited = set()
-        queue = deque([(source, 0)])  # Start with hop count of 0
-
-        while queue:
-            current_node, hop_count = queue.popleft()
-            if current_node == destination:
-                return hop_count
-
-            for neighbor in current_node.neighbors:
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append((neighbor, hop_count + 1))
-
-        return 0  # Return infinity if no path is found
+        """Hop count between source and destination, or None if they are not connected."""
+        return self.sim.get_hop_count(source, destination)
 
     def stimulate_routing(self):
-        for node in self.nodes:
-            for neighbor in node.neighbors:
-                for destination, next_hop in neighbor.routes.items():
-                    if destination != node:
-                        node.update_route(destination, neighbor)
-        self.update_status("Routing stimulated and updated across the network.")
+        self.worker.call(self.sim.stimulate_routing, callback=self.show_convergence)
+
+    def show_convergence(self, result):
+        rounds, messages = result
+        self.update_status(f"Routing converged in {rounds} rounds with {messages} control messages.")
 
     def update_status(self, message):
-        self.status_text.config(state="normal")
-        self.status_text.insert(tk.END, message + "\n")
-        self.status_text.see(tk.END)
-        self.status_text.config(state="disabled")
+        self.sim.events.emit(message)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Proactive (DSDV) routing GUI.")
+    parser.add_argument("--nodes", type=int, default=15, help="number of nodes")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, to get the same network again")
+    parser.add_argument("--scenario", help="scenario file from scenario.py to load instead of a random network")
+    parser.add_argument("--replay", help="NS2 .tr or .nam file to replay on the canvas instead of simulating")
+    args = parser.parse_args()
+
     root = tk.Tk()
     root.title("MANET Simulation")
-    app = Network(root)
+    if args.replay:
+        app = ReplayView(root, TraceReplay(args.replay))
+    else:
+        app = Network(root, node_count=args.nodes, seed=args.seed,
+                      scenario=load_scenario(args.scenario) if args.scenario else None)
     root.mainloop()
@@ -1,45 +1,31 @@
+import argparse
+import time
 import tkinter as tk
-import random
-import math
-
-class Node:
-    def __init__(self, node_id, x, y):
-        self.node_id = node_id
-        self.x = x
-        self.y = y
-        self.routes = {}  # Routing table (destination_node -> next_hop)
-        self.neighbors = []
-        self.rreq_id = 0  # Unique RREQ ID for this node to prevent duplicates
-        self.routing_timeout = {}  # Timeout for routes
-
-    def move_randomly(self, max_width, max_height):
-        self.x = random.randint(50, max_width - 50)
-        self.y = random.randint(50, max_height - 50)
-
-    def add_neighbor(self, neighbor):
-        if neighbor not in self.neighbors:
-            self.neighbors.append(neighbor)
-
-    def distance_to(self, other_node):
-        return math.sqrt((self.x - other_node.x) ** 2 + (self.y - other_node.y) ** 2)
-
-    def update_route(self, destination, next_hop):
-        """Update the routing table."""
-        self.routes[destination] = next_hop
-        self.routing_timeout[destination] = 10  # Route timeout (just for simulation)
-        return f"Route to Node {destination.node_id} via Node {next_hop.node_id} added."
-
-    def clear_routes(self):
-        """Clear all routes."""
-        self.routes.clear()
-        self.routing_timeout.clear()
+
+from engine import Simulation, path_to_string
+from event_log import DEBUG, EventLog, TextLogView
+from instrumentation import HudOverlay
+from renderer import CanvasRenderer
+from scenario import load_scenario
+from sim_worker import SimulationWorker
+from trace_replay import ReplayView, TraceReplay
+
+MOVE_INTERVAL_MS = 500  # Real time between two mobility ticks
+POLL_INTERVAL_MS = 30  # How often the GUI picks up finished ticks and route discoveries
 
 
 class Network:
-    def __init__(self, root, communication_range=150):
+    def __init__(self, root, communication_range=150, node_count=19, seed=None, scenario=None):
         self.root = root
-        self.nodes = []
-        self.communication_range = communication_range
+        self.sim = Simulation(
+            node_count=node_count, communication_range=communication_range, tick_seconds=MOVE_INTERVAL_MS / 1000,
+            protocol="reactive", seed=seed, scenario=scenario,
+            events=EventLog(level=DEBUG)  # Show every RREQ forward and RERR
+        )
+        self.nodes = self.sim.nodes
+        # Ticks and route discovery run on the worker thread; the GUI only draws its snapshots
+        self.worker = SimulationWorker(self.sim, MOVE_INTERVAL_MS / 1000)
+        self.snapshot = self.worker.buffer.front
         self.movement_active = False
         self.selected_source = None
         self.selected_destination = None
@@ -49,12 +35,19 @@ class Network:
         self.canvas = tk.Canvas(self.root, bg="#282c34", width=650, height=500, highlightthickness=0)
         self.canvas.grid(row=0, column=0, padx=20, pady=20, rowspan=5, sticky="nsew")
         self.canvas.bind("<Button-1>", self.select_node)
+        if scenario is None:
+            self.canvas.bind("<Configure>", self.resize)  # A scenario keeps its own area
+        self.renderer = CanvasRenderer(self.canvas, node_radius=15, outline_width=2)
+        self.hud = HudOverlay(self.canvas, self.sim.profiler)
+        self.root.bind("<F2>", self.toggle_instrumentation)  # Per-phase timings overlay
+        self.root.bind("<F3>", self.export_profile)
 
         # Adjusted size for message box (smaller)
         self.status_text = tk.Text(
             self.root, height=15, width=60, bg="#1e1e1e", fg="#ffffff", font=("Consolas", 12), state="normal"
         )
         self.status_text.grid(row=0, column=1, padx=20, pady=20, rowspan=5, sticky="nsew")
+        self.log_view = TextLogView(self.sim.events, self.status_text, self.root)
 
         # Buttons remain on the right
         self.start_button = tk.Button(
@@ -87,60 +80,22 @@ class Network:
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_columnconfigure(1, weight=3)
 
-        self.create_nodes()
-        self.update_neighbors()
         self.draw_network()
+        self.worker.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.poll()
 
         # Log initial message
         self.update_status("Hello MANET")
 
-    def create_nodes(self):
-        for node_id in range(1, 20):  # Create 10 nodes
-            x = random.randint(50, 700)
-            y = random.randint(50, 400)
-            node = Node(node_id, x, y)
-            self.nodes.append(node)
-
-    def update_neighbors(self):
-        """Update neighbors for each node based on distance and communication range."""
-        for node in self.nodes:
-            node.neighbors = []
-        for i in range(len(self.nodes)):
-            for j in range(i + 1, len(self.nodes)):
-                if self.nodes[i].distance_to(self.nodes[j]) <= self.communication_range:
-                    self.nodes[i].add_neighbor(self.nodes[j])
-                    self.nodes[j].add_neighbor(self.nodes[i])
-
     def draw_network(self):
-        self.canvas.delete("all")
-        for node in self.nodes:
-            fill_color = "#56b6c2"
-            if node == self.selected_source:
-                fill_color = "#e06c75"  # Red for source
-            elif node == self.selected_destination:
-                fill_color = "#98c379"  # Green for destination
-
-            self.canvas.create_oval(
-                node.x - 15, node.y - 15, node.x + 15, node.y + 15,
-                fill=fill_color, outline="#ffffff", width=2
-            )
-            self.canvas.create_text(node.x, node.y, text=str(node.node_id), fill="#ffffff")
-
-        for node in self.nodes:
-            for neighbor in node.neighbors:
-                self.canvas.create_line(
-                    node.x, node.y, neighbor.x, neighbor.y,
-                    fill="#abb2bf", dash=(4, 2)
-                )
-
-        # Draw active path if it exists
-        for i in range(len(self.active_path) - 1):
-            node1 = self.active_path[i]
-            node2 = self.active_path[i + 1]
-            self.canvas.create_line(
-                node1.x, node1.y, node2.x, node2.y,
-                fill="#e06c75", width=3
-            )
+        highlights = {}
+        if self.selected_source:
+            highlights[self.selected_source] = "#e06c75"  # Red for source
+        if self.selected_destination and self.selected_destination != self.selected_source:
+            highlights[self.selected_destination] = "#98c379"  # Green for destination
+        snapshot = self.snapshot
+        self.renderer.render(self.nodes, snapshot.edges, highlights, self.active_path, snapshot.positions)
 
     def select_node(self, event):
         clicked_node = self.get_node_at(event.x, event.y)
@@ -163,31 +118,64 @@ class Network:
         self.draw_network()
 
     def get_node_at(self, x, y):
-        for node in self.nodes:
-            if (node.x - 15 <= x <= node.x + 15) and (node.y - 15 <= y <= node.y + 15):
+        for node, (node_x, node_y) in self.snapshot.positions.items():
+            if (node_x - 15 <= x <= node_x + 15) and (node_y - 15 <= y <= node_y + 15):
                 return node
         return None
 
+    def resize(self, event):
+        self.worker.call(self.sim.set_bounds, (50, 50, event.width - 50, event.height - 50))
+
     def start_movement(self):
         if not self.movement_active:
             self.movement_active = True
             self.update_status("Node movement started.")
             self.active_path = []  # Clear any old path when movement starts
-            self.move_nodes()
+            self.worker.resume()
 
     def stop_movement(self):
         self.movement_active = False
+        self.worker.pause()
         self.update_status("Node movement stopped.")
 
-    def move_nodes(self):
-        if self.movement_active:
-            max_width = self.canvas.winfo_width()
-            max_height = self.canvas.winfo_height()
-            for node in self.nodes:
-                node.move_randomly(max_width, max_height)
-            self.update_neighbors()
+    def poll(self):
+        """Deliver finished discoveries and draw the newest tick, skipping any the GUI was too slow for."""
+        for callback, result in self.worker.finished():
+            callback(result)
+        snapshot = self.worker.buffer.take()
+        if snapshot is not None:
+            self.snapshot = snapshot
+            started = time.perf_counter()
             self.draw_network()
-            self.root.after(500, self.move_nodes)
+            profiler = self.sim.profiler
+            if snapshot.frame is not None:
+                profiler.amend(snapshot.frame, render_ms=(time.perf_counter() - started) * 1000)
+            if profiler.enabled:
+                self.hud.update()
+        self.root.after(POLL_INTERVAL_MS, self.poll)
+
+    def close(self):
+        self.worker.stop()
+        self.root.destroy()
+
+    def toggle_instrumentation(self, event=None):
+        profiler = self.sim.profiler
+        profiler.enabled = not profiler.enabled
+        if profiler.enabled:
+            self.hud.update()
+            self.update_status("Instrumentation on: F2 hides it, F3 exports the samples.")
+        else:
+            self.hud.hide()
+            self.update_status("Instrumentation off.")
+
+    def export_profile(self, event=None):
+        if not self.sim.profiler.samples:
+            self.update_status("No instrumentation samples yet. Press F2 and start the movement.")
+            return
+        name = time.strftime("profile_%Y%m%d_%H%M%S")
+        self.sim.profiler.export(name + ".csv")
+        self.sim.profiler.export(name + ".json")
+        self.update_status(f"Instrumentation samples written to {name}.csv and {name}.json.")
 
     def send_data(self):
         if not self.selected_source or not self.selected_destination:
@@ -197,9 +185,10 @@ class Network:
         destination = self.selected_destination
         self.update_status(f"Sending data from Node {source.node_id} to Node {destination.node_id}...")
 
-        # Simulate AODV's route discovery process
-        self.update_status(f"Node {source.node_id} is sending RREQ to find a route to Node {destination.node_id}.")
-        path = self.find_route(source, destination)
+        # Simulate AODV on the worker: reuse a cached route or flood an RREQ to discover one
+        self.worker.call(self.find_route, source, destination, callback=self.show_route)
+
+    def show_route(self, path):
         if path:
             self.active_path = path
             self.update_status(f"Data successfully sent along the path: {self.path_to_string(path)}")
@@ -208,49 +197,34 @@ class Network:
         self.draw_network()
 
     def find_route(self, source, destination):
-        visited = set()
-        queue = [[source]]
-        self.update_status(f"Source Node {source.node_id} is looking for a route to Node {destination.node_id}...")
-
-        while queue:
-            path = queue.pop(0)
-            node = path[-1]
-
-            # Check if destination has been reached
-            if node == destination:
-                self.update_status(f"Route found: {self.path_to_string(path)}")
-                return path
-
-            if node not in visited:
-                visited.add(node)
-
-                # Simulate forwarding RREQ by intermediate nodes
-                for neighbor in node.neighbors:
-                    if neighbor not in visited:
-                        new_path = list(path)
-                        new_path.append(neighbor)
-                        queue.append(new_path)
-                        self.update_status(f"Node {node.node_id} forwards RREQ to Node {neighbor.node_id}.")
-
-        self.update_status("No path found.")
-        return None  # No path found
+        return self.sim.discover_route(source, destination)
 
     def path_to_string(self, path):
-        return " -> ".join(f"Node {node.node_id}" for node in path)
+        return path_to_string(path)
 
     def update_status(self, message):
-        self.status_text.insert(tk.END, message + "\n")
-        self.status_text.see(tk.END)
+        self.sim.events.emit(message)
 
     def clear_logs(self):
-        self.status_text.delete(1.0, tk.END)
+        self.log_view.clear()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reactive (AODV) routing GUI.")
+    parser.add_argument("--nodes", type=int, default=19, help="number of nodes")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, to get the same network again")
+    parser.add_argument("--scenario", help="scenario file from scenario.py to load instead of a random network")
+    parser.add_argument("--replay", help="NS2 .tr or .nam file to replay on the canvas instead of simulating")
+    args = parser.parse_args()
+
     root = tk.Tk()
     root.title("MANET Reactive Routing Protocol Simulator")
     root.geometry("900x700")
     root.configure(bg="#282c34")
 
-    network = Network(root)
+    if args.replay:
+        network = ReplayView(root, TraceReplay(args.replay))
+    else:
+        network = Network(root, node_count=args.nodes, seed=args.seed,
+                          scenario=load_scenario(args.scenario) if args.scenario else None)
     root.mainloop()
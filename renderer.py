@@ -0,0 +1,121 @@
+class CanvasRenderer:
+    """Retained-mode drawing of the network on a Tk canvas.
+
+    Canvas items are created once per node and per edge and then only moved
+    with ``canvas.coords``. Each call to ``render`` compares the edge set with
+    the one drawn last time and creates or deletes lines just for the links
+    that appeared or broke, so the cost follows topology churn instead of the
+    size of the network.
+    """
+
+    def __init__(self, canvas, node_radius=20, outline_width=3, font=None,
+                 node_color="#56b6c2", edge_color="#abb2bf", path_color="#e06c75"):
+        self.canvas = canvas
+        self.node_radius = node_radius
+        self.outline_width = outline_width
+        self.font = font
+        self.node_color = node_color
+        self.edge_color = edge_color
+        self.path_color = path_color
+        self.node_items = {}  # node -> (oval item, label item)
+        self.node_state = {}  # node -> (x, y, fill) as last drawn
+        self.edge_items = {}  # (node_a, node_b) -> line item
+        self.path_items = []  # line items of the highlighted path
+        self.drawn_path = []
+
+    def render(self, nodes, edges, highlights=None, path=(), positions=None):
+        """Bring the canvas in line with the given nodes, edges and path.
+
+        ``edges`` holds each undirected link once as a (node_a, node_b) tuple,
+        ``highlights`` maps nodes to a fill color overriding the default one.
+        ``positions`` maps nodes to the (x, y) to draw them at, such as a
+        snapshot taken on a simulation thread; by default it is their current
+        coordinates.
+        """
+        highlights = highlights or {}
+        if positions is None:
+            positions = {node: (node.x, node.y) for node in nodes}
+        moved = self.update_nodes(nodes, highlights, positions)
+        self.update_edges(edges, moved, positions)
+        self.update_path(list(path), moved, positions)
+
+    def update_nodes(self, nodes, highlights, positions):
+        canvas = self.canvas
+        r = self.node_radius
+        moved = set()
+        present = set()
+        for node in nodes:
+            present.add(node)
+            fill = highlights.get(node, self.node_color)
+            x, y = positions[node]
+            state = self.node_state.get(node)
+            if state is None:
+                oval = canvas.create_oval(
+                    x - r, y - r, x + r, y + r,
+                    fill=fill, outline="#ffffff", width=self.outline_width, tags="node"
+                )
+                label = canvas.create_text(
+                    x, y, text=str(node.node_id), fill="#ffffff", font=self.font, tags="node"
+                )
+                self.node_items[node] = (oval, label)
+                moved.add(node)
+            else:
+                oval, label = self.node_items[node]
+                if state[0] != x or state[1] != y:
+                    canvas.coords(oval, x - r, y - r, x + r, y + r)
+                    canvas.coords(label, x, y)
+                    moved.add(node)
+                if state[2] != fill:
+                    canvas.itemconfigure(oval, fill=fill)
+            self.node_state[node] = (x, y, fill)
+
+        for node in [node for node in self.node_items if node not in present]:
+            canvas.delete(*self.node_items.pop(node))
+            del self.node_state[node]
+        return moved
+
+    def update_edges(self, edges, moved, positions):
+        canvas = self.canvas
+        drawn = self.edge_items
+        for edge in [edge for edge in drawn if edge not in edges]:
+            canvas.delete(drawn.pop(edge))
+
+        for edge in edges:
+            node_a, node_b = edge
+            item = drawn.get(edge)
+            if item is None:
+                item = canvas.create_line(
+                    *positions[node_a], *positions[node_b],
+                    fill=self.edge_color, dash=(4, 2), tags="edge"
+                )
+                canvas.tag_lower(item)  # Keep links underneath the nodes
+                drawn[edge] = item
+            elif node_a in moved or node_b in moved:
+                canvas.coords(item, *positions[node_a], *positions[node_b])
+
+    def update_path(self, path, moved, positions):
+        canvas = self.canvas
+        if path != self.drawn_path:
+            if self.path_items:
+                canvas.delete(*self.path_items)
+            self.path_items = []
+            for node1, node2 in zip(path, path[1:]):
+                self.path_items.append(canvas.create_line(
+                    *positions[node1], *positions[node2],
+                    fill=self.path_color, width=3, tags="path"
+                ))
+            self.drawn_path = path
+            return
+
+        for item, (node1, node2) in zip(self.path_items, zip(path, path[1:])):
+            if node1 in moved or node2 in moved:
+                canvas.coords(item, *positions[node1], *positions[node2])
+
+    def clear(self):
+        """Forget every item, e.g. after the canvas was wiped externally."""
+        self.canvas.delete("node", "edge", "path")
+        self.node_items.clear()
+        self.node_state.clear()
+        self.edge_items.clear()
+        self.path_items = []
+        self.drawn_path = []
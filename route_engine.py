@@ -0,0 +1,322 @@
+"""Single-pair route search with pluggable strategies and link weights.
+
+The hop table answers "shortest path in hops" by running a full BFS from the
+source and caching the row, which is the right trade-off when the same
+sources ask again and again. A RouteEngine answers one query at a time and
+stops as soon as the destination is settled:
+
+* ``bfs``: plain breadth-first search in hops.
+* ``bidirectional``: BFS from both ends, always growing the smaller side.
+* ``dijkstra``: cheapest path under the link ``weight``.
+* ``astar``: Dijkstra guided by the straight-line distance to the
+  destination, which never overestimates the remaining cost (see ``WEIGHTS``).
+* ``greedy``: geographic forwarding to the neighbor closest to the
+  destination; cheap and stateless, but it gives up at a local minimum.
+
+All of them keep parent pointers and rebuild the path once at the end
+instead of copying a partial path per queued node, and none of them caches
+anything between queries.
+
+Compare the strategies and weights on the same random queries:
+
+    python route_engine.py --nodes 50000 --width 20000 --height 20000 --queries 100
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import math
+import random
+import time
+
+import numpy as np
+
+from hop_table import UNREACHABLE
+
+MIN_DELIVERY = 0.5  # Modelled delivery ratio of a link at the edge of the radio range
+STRATEGIES = ["bfs", "bidirectional", "dijkstra", "astar", "greedy"]
+
+
+def delivery_ratio(distance, communication_range):
+    """Delivery ratio of a link, falling from 1 next to the sender to MIN_DELIVERY at full range."""
+    return 1.0 - (1.0 - MIN_DELIVERY) * min(distance / communication_range, 1.0) ** 2
+
+
+def link_cost(weight, node, neighbor, communication_range, queue_length=None):
+    """Cost of sending from ``node`` to ``neighbor`` under ``weight``."""
+    if weight == "hops":
+        return 1.0
+    distance = math.hypot(node.x - neighbor.x, node.y - neighbor.y)
+    if weight == "distance":
+        return distance
+    if weight == "etx":
+        # Expected transmissions including the ACK, with the same ratio both ways
+        return 1.0 / delivery_ratio(distance, communication_range) ** 2
+    return 1.0 + (queue_length(neighbor) if queue_length is not None else 0)
+
+
+# Weight -> how many units of cost one meter of straight-line distance costs at least.
+# Every link is at most one range long and costs at least 1 (or its length), so the
+# straight-line distance times this factor is an admissible A* heuristic.
+WEIGHTS = {
+    "hops": lambda communication_range: 1.0 / communication_range,
+    "distance": lambda communication_range: 1.0,
+    "etx": lambda communication_range: 1.0 / communication_range,
+    "queue": lambda communication_range: 1.0 / communication_range,
+}
+
+
+def trace_back(parents, node):
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+class RouteEngine:
+    """Answers route queries with one of STRATEGIES under one of the WEIGHTS.
+
+    The BFS strategies run vectorized over the CSR adjacency of ``table``,
+    the Simulation's HopTable, which rebuilds it after every topology change;
+    the others walk the nodes' neighbor sets and coordinates. ``weight``
+    only matters to ``dijkstra`` and ``astar``; the BFS strategies count
+    hops and ``greedy`` follows geography. ``queue_length(node)`` gives
+    the backlog of a node for the "queue" weight, e.g. the length of its
+    interface queue in the packet simulator.
+    """
+
+    def __init__(self, table, communication_range, strategy="astar", weight="hops", queue_length=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown route strategy {strategy!r}")
+        if weight not in WEIGHTS:
+            raise ValueError(f"unknown link weight {weight!r}")
+        self.table = table
+        self.communication_range = communication_range
+        self.strategy = strategy
+        self.weight = weight
+        self.queue_length = queue_length
+        self.search = getattr(self, strategy)
+        self.settled = 0  # Nodes taken off the frontier, over all queries
+
+    def route(self, source, destination):
+        """Path as a list of nodes from source to destination, or None."""
+        if source is destination:
+            return [source]
+        return self.search(source, destination)
+
+    def cost(self, path, weight=None):
+        """Total cost of ``path`` under ``weight`` (the engine's own by default)."""
+        weight = weight or self.weight
+        return sum(link_cost(weight, a, b, self.communication_range, self.queue_length)
+                   for a, b in zip(path, path[1:]))
+
+    def bfs(self, source, destination):
+        """Level-by-level BFS from the source over the hop table's CSR adjacency."""
+        index = self.table.index
+        parents = np.full(len(self.table.nodes), UNREACHABLE, dtype=np.int32)
+        src, dst = index[source], index[destination]
+        parents[src] = src
+        front = np.array([src], dtype=np.int32)
+        while front.size:
+            self.settled += len(front)
+            front = self.grow(front, parents)
+            if parents[dst] != UNREACHABLE:
+                return self.trace(parents, src, dst)
+        return None
+
+    def bidirectional(self, source, destination):
+        """BFS from both ends one level at a time, always expanding the smaller frontier.
+
+        Two searches of radius d/2 touch far fewer nodes than one of radius d.
+        When they meet, every meeting point is one level deep on the side that
+        just grew, so the path through the one closest to the other end is a
+        shortest one.
+        """
+        count = len(self.table.nodes)
+        ends = [self.table.index[source], self.table.index[destination]]
+        parents = np.full((2, count), UNREACHABLE, dtype=np.int32)
+        depths = np.full((2, count), UNREACHABLE, dtype=np.int32)
+        fronts = []
+        for side, end in enumerate(ends):
+            parents[side, end] = end
+            depths[side, end] = 0
+            fronts.append(np.array([end], dtype=np.int32))
+        levels = [0, 0]
+        while fronts[0].size and fronts[1].size:
+            side = 0 if len(fronts[0]) <= len(fronts[1]) else 1
+            other = 1 - side
+            self.settled += len(fronts[side])
+            levels[side] += 1
+            fronts[side] = self.grow(fronts[side], parents[side])
+            depths[side, fronts[side]] = levels[side]
+            meetings = fronts[side][depths[other, fronts[side]] != UNREACHABLE]
+            if meetings.size:
+                middle = int(meetings[np.argmin(depths[other, meetings])])
+                path = self.trace(parents[0], ends[0], middle)
+                return path + self.trace(parents[1], ends[1], middle)[-2::-1]
+        return None
+
+    def grow(self, front, parents):
+        """Expand ``front`` by one level; fill ``parents`` of the new nodes and return them."""
+        reached, counts = self.table.expand(front)
+        sources = np.repeat(front, counts)
+        new = parents[reached] == UNREACHABLE
+        reached, sources = reached[new], sources[new]
+        # A node reached from several parents keeps whichever write lands; keeping only the entry
+        # that won drops the duplicates without sorting
+        parents[reached] = sources
+        return reached[parents[reached] == sources]
+
+    def trace(self, parents, src, node):
+        path = [node]
+        while node != src:
+            node = int(parents[node])
+            path.append(node)
+        nodes = self.table.nodes
+        return [nodes[i] for i in reversed(path)]
+
+    def dijkstra(self, source, destination):
+        return self.best_first(source, destination, None)
+
+    def astar(self, source, destination):
+        return self.best_first(source, destination, WEIGHTS[self.weight](self.communication_range))
+
+    def best_first(self, source, destination, scale):
+        """Dijkstra, or A* with ``scale`` times the straight-line distance as the heuristic."""
+        weight = self.weight
+        communication_range = self.communication_range
+        queue_length = self.queue_length
+        target_x, target_y = destination.x, destination.y
+
+        def estimate(node):
+            return scale * math.hypot(node.x - target_x, node.y - target_y) if scale else 0.0
+
+        costs = {source: 0.0}
+        parents = {source: None}
+        done = set()
+        order = itertools.count()  # Breaks ties; nodes themselves cannot be compared
+        heap = [(estimate(source), next(order), source)]
+        while heap:
+            _, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            if node is destination:
+                return trace_back(parents, destination)
+            done.add(node)
+            self.settled += 1
+            cost = costs[node]
+            for neighbor in node.neighbors:
+                if neighbor in done:
+                    continue
+                new_cost = cost + link_cost(weight, node, neighbor, communication_range, queue_length)
+                if new_cost < costs.get(neighbor, math.inf):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = node
+                    heapq.heappush(heap, (new_cost + estimate(neighbor), next(order), neighbor))
+        return None
+
+    def greedy(self, source, destination):
+        """Forward to whichever neighbor is closest to the destination; None at a local minimum."""
+        target_x, target_y = destination.x, destination.y
+
+        def remaining(node):
+            return math.hypot(node.x - target_x, node.y - target_y)
+
+        path = [source]
+        node = source
+        while node is not destination:
+            self.settled += 1
+            best = min(node.neighbors, key=remaining, default=None)
+            if best is None or remaining(best) >= remaining(node):
+                return None  # No neighbor gets closer: greedy forwarding is stuck
+            path.append(best)
+            node = best
+        return path
+
+
+def compare(sim, combos, queries, seed=None):
+    """Run every (strategy, weight) in ``combos`` on the same ``queries`` random pairs of ``sim``.
+
+    Each found path is also costed under every weight, so a route picked for
+    short links can be judged by its hop count and its ETX as well. Queue
+    lengths for the "queue" weight are drawn at random once per node.
+    """
+    rng = random.Random(seed)
+    backlog = {node: rng.randrange(50) for node in sim.nodes}
+    pairs = [rng.sample(sim.nodes, 2) for _ in range(queries)]
+    rows = []
+    for strategy, weight in combos:
+        engine = RouteEngine(sim.hop_table, sim.communication_range, "bfs" if strategy == "table" else strategy, weight,
+                             backlog.get)
+        search = engine.route
+        if strategy == "table":
+            sim.hop_table.invalidate()  # Start cold, like after a topology change
+            search = sim.hop_table.path
+        times = []
+        paths = []
+        for source, destination in pairs:
+            started = time.perf_counter()
+            path = search(source, destination)
+            times.append(time.perf_counter() - started)
+            if path is not None:
+                paths.append(path)
+        times.sort()
+        found = len(paths) or 1
+        row = {"strategy": strategy, "weight": weight, "queries": queries,
+               "mean_ms": 1000 * sum(times) / len(times), "p95_ms": 1000 * times[int(0.95 * (len(times) - 1))],
+               "found": len(paths) / queries,
+               "settled": engine.settled / queries if strategy != "table" else None}
+        for metric in WEIGHTS:
+            row[f"mean_{metric}"] = sum(engine.cost(path, metric) for path in paths) / found
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    from engine import Simulation
+    from scenario import load_scenario
+
+    parser = argparse.ArgumentParser(description="Compare route strategies and link weights on random queries.")
+    parser.add_argument("--nodes", type=int, default=1000, help="number of nodes")
+    parser.add_argument("--range", type=float, default=150, dest="communication_range", help="radio range")
+    parser.add_argument("--width", type=float, default=2500, help="width of the area")
+    parser.add_argument("--height", type=float, default=2500, help="height of the area")
+    parser.add_argument("--queries", type=int, default=200, help="random source/destination pairs")
+    parser.add_argument("--strategies", nargs="+", choices=["table"] + STRATEGIES,
+                        default=["table"] + STRATEGIES, help="'table' is the engine's cached hop table")
+    parser.add_argument("--weights", nargs="+", choices=sorted(WEIGHTS), default=["hops", "distance", "etx"],
+                        help="link weights tried with dijkstra and astar")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--scenario", help="scenario file from scenario.py (overrides --nodes, --width, --height)")
+    parser.add_argument("--json", help="also write the rows as JSON to this file")
+    args = parser.parse_args(argv)
+
+    sim = Simulation(node_count=args.nodes, communication_range=args.communication_range,
+                     bounds=(0, 0, args.width, args.height), seed=args.seed,
+                     scenario=load_scenario(args.scenario) if args.scenario else None)
+    combos = []
+    for strategy in args.strategies:
+        weights = args.weights if strategy in ("dijkstra", "astar") else ["hops"]
+        combos.extend((strategy, weight) for weight in weights)
+    rows = compare(sim, combos, args.queries, args.seed)
+
+    def settled(row):
+        return "-" if row["settled"] is None else f"{row['settled']:.0f}"
+
+    print(f"{len(sim.nodes)} nodes, {sim.topology.edge_count()} links, {args.queries} queries")
+    print(f"{'strategy':<14}{'weight':<10}{'mean ms':>9}{'p95 ms':>9}{'found':>8}{'settled':>10}"
+          f"{'hops':>8}{'meters':>10}{'etx':>8}{'queue':>8}")
+    for row in rows:
+        print(f"{row['strategy']:<14}{row['weight']:<10}{row['mean_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+              f"{row['found']:>8.1%}{settled(row):>10}{row['mean_hops']:>8.2f}{row['mean_distance']:>10.0f}"
+              f"{row['mean_etx']:>8.2f}{row['mean_queue']:>8.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
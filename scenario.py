@@ -0,0 +1,222 @@
+"""Binary scenario files shared by the Python engines and NS2.
+
+A scenario fixes everything random about a run: the initial node positions,
+the random-waypoint ``setdest`` schedule, the seed and the flows. It is
+stored like a converted trace: a small JSON header followed by aligned raw
+NumPy arrays, which ``load_scenario`` memory-maps, so even a 50k-node
+scenario loads without parsing anything. ``export`` writes the same scenario
+as an NS2 movement file for ``sim.tcl -scenario``, so both simulators can run
+on identical topologies.
+
+    python scenario.py create big.scn --nodes 50000 --width 15000 --height 15000 --seed 7
+    python scenario.py export big.scn                  # -> big.tcl plus the ns command line
+    python engine.py --scenario big.scn --ticks 100
+"""
+
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+from mobility import MAX_SPEED, MIN_SPEED
+
+MAGIC = b"MANETSCN"
+VERSION = 1
+ALIGNMENT = 64
+
+# Name -> (dtype, columns per row)
+ARRAYS = [
+    ("positions", np.float64, 2),  # Initial (x, y) of every node
+    ("move_time", np.float64, 1),  # setdest schedule, sorted by time
+    ("move_node", np.int32, 1),
+    ("move_target", np.float64, 2),
+    ("move_speed", np.float64, 1),
+]
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class Scenario:
+    """Node positions, setdest schedule, seed and flows of one reproducible run.
+
+    Nodes are numbered from 0 as in NS2; ``flows`` holds (src, dst) pairs of
+    those indices. The schedule says that at ``move_time[i]`` node
+    ``move_node[i]`` heads for ``move_target[i]`` at ``move_speed[i]`` m/s.
+    """
+
+    def __init__(self, positions, move_time, move_node, move_target, move_speed, bounds,
+                 seed=None, duration=200.0, flows=()):
+        self.positions = positions
+        self.move_time = move_time
+        self.move_node = move_node
+        self.move_target = move_target
+        self.move_speed = move_speed
+        self.bounds = tuple(float(v) for v in bounds)
+        self.seed = seed
+        self.duration = duration
+        self.flows = [tuple(flow) for flow in flows]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def save(self, path):
+        """Write the scenario in the binary format ``load_scenario`` reads."""
+        layout = []
+        offset = 0
+        for name, dtype, _ in ARRAYS:
+            length = getattr(self, name).size * np.dtype(dtype).itemsize
+            layout.append({"name": name, "dtype": np.dtype(dtype).str, "offset": offset, "length": length})
+            offset = align(offset + length)
+        header = json.dumps({
+            "version": VERSION,
+            "nodes": len(self),
+            "moves": len(self.move_time),
+            "bounds": self.bounds,
+            "seed": self.seed,
+            "duration": self.duration,
+            "flows": self.flows,
+            "arrays": layout,
+        }).encode()
+        data_start = align(len(MAGIC) + 8 + len(header))
+        with open(path + ".tmp", "wb") as out:
+            out.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+            for entry, (name, dtype, _) in zip(layout, ARRAYS):
+                out.seek(data_start + entry["offset"])
+                out.write(np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes())
+            out.truncate(data_start + offset)
+        os.replace(path + ".tmp", path)
+
+    def export(self, path):
+        """Write the initial positions and the schedule as an NS2 movement file (setdest format)."""
+        with open(path, "w") as f:
+            f.write(f"# {len(self)} nodes in {self.bounds}, seed {self.seed}, flows {self.flows}\n")
+            for i, (x, y) in enumerate(np.asarray(self.positions).tolist()):
+                f.write(f"$node_({i}) set X_ {x:.6f}\n$node_({i}) set Y_ {y:.6f}\n$node_({i}) set Z_ 0.000000\n")
+            moves = zip(np.asarray(self.move_time).tolist(), np.asarray(self.move_node).tolist(),
+                        np.asarray(self.move_target).tolist(), np.asarray(self.move_speed).tolist())
+            for time, node, (x, y), speed in moves:
+                f.write(f'$ns_ at {time:.6f} "$node_({node}) setdest {x:.6f} {y:.6f} {speed:.6f}"\n')
+
+    def ns_command(self, movement_file, protocol="AODV", script="sim.tcl"):
+        """Command line running this scenario in NS2, or None without two flows (sim.tcl needs exactly two)."""
+        if len(self.flows) < 2:
+            return None
+        (src, dst), (src2, dst2) = self.flows[:2]
+        min_x, min_y, max_x, max_y = self.bounds
+        seed = self.seed if self.seed is not None else 1
+        return (f"ns {script} {len(self)} {protocol} {src} {dst} {src2} {dst2} {seed} "
+                f"-scenario {movement_file} -x {max_x:g} -y {max_y:g}")
+
+
+def load_scenario(path):
+    """Memory-map a scenario file; nothing but the header is read until an array is used."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a scenario file")
+        version, header_length = struct.unpack("<II", f.read(8))
+        if version != VERSION:
+            raise ValueError(f"unsupported scenario version {version}")
+        header = json.loads(f.read(header_length))
+    data_start = align(len(MAGIC) + 8 + header_length)
+    arrays = {}
+    for entry, (name, _, width) in zip(header["arrays"], ARRAYS):
+        rows = header["nodes"] if name == "positions" else header["moves"]
+        shape = (rows, width) if width > 1 else (rows,)
+        if rows == 0:
+            arrays[name] = np.zeros(shape, dtype=entry["dtype"])
+            continue
+        arrays[name] = np.memmap(path, dtype=entry["dtype"], mode="r", offset=data_start + entry["offset"],
+                                 shape=shape)
+    return Scenario(bounds=header["bounds"], seed=header["seed"], duration=header["duration"],
+                    flows=header["flows"], **arrays)
+
+
+def generate(node_count, bounds, duration=200.0, seed=None, flows=2, min_speed=MIN_SPEED,
+             max_speed=MAX_SPEED, max_pause=0.0):
+    """Random-waypoint scenario: each node keeps picking a waypoint and a speed until ``duration``.
+
+    All nodes draw their next leg together, so generating a 50k-node
+    scenario takes a handful of vectorized steps per leg instead of a loop
+    over the nodes.
+    """
+    rng = np.random.default_rng(seed)
+    min_x, min_y, max_x, max_y = (float(v) for v in bounds)
+
+    def random_points(count):
+        return np.column_stack((rng.uniform(min_x, max_x, count), rng.uniform(min_y, max_y, count)))
+
+    positions = random_points(node_count)
+    current = positions.copy()
+    clock = np.zeros(node_count)
+    active = np.arange(node_count)
+    legs = []
+    while len(active):
+        targets = random_points(len(active))
+        speeds = rng.uniform(min_speed, max_speed, len(active))
+        legs.append((clock[active], active, targets, speeds))
+        distance = np.hypot(*(targets - current[active]).T)
+        clock[active] += distance / speeds + rng.uniform(0.0, max_pause, len(active))
+        current[active] = targets
+        active = active[clock[active] < duration]
+
+    move_time = np.concatenate([leg[0] for leg in legs])
+    move_node = np.concatenate([leg[1] for leg in legs]).astype(np.int32)
+    order = np.lexsort((move_node, move_time))
+    pairs = [tuple(int(node) for node in rng.choice(node_count, 2, replace=False)) for _ in range(flows)]
+    return Scenario(
+        positions, move_time[order], move_node[order],
+        np.concatenate([leg[2] for leg in legs])[order], np.concatenate([leg[3] for leg in legs])[order],
+        (min_x, min_y, max_x, max_y), seed=seed, duration=duration, flows=pairs,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create, inspect and export reproducible scenarios.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create_cmd = commands.add_parser("create", help="generate a random-waypoint scenario")
+    create_cmd.add_argument("output")
+    create_cmd.add_argument("--nodes", type=int, default=50, help="number of nodes")
+    create_cmd.add_argument("--width", type=float, default=1000, help="width of the area")
+    create_cmd.add_argument("--height", type=float, default=1000, help="height of the area")
+    create_cmd.add_argument("--duration", type=float, default=200.0, help="simulated seconds of movement")
+    create_cmd.add_argument("--flows", type=int, default=2, help="random source/destination pairs")
+    create_cmd.add_argument("--min-speed", type=float, default=MIN_SPEED)
+    create_cmd.add_argument("--max-speed", type=float, default=MAX_SPEED)
+    create_cmd.add_argument("--max-pause", type=float, default=0.0, help="longest pause at a waypoint")
+    create_cmd.add_argument("--seed", type=int, default=None, help="random seed")
+    export_cmd = commands.add_parser("export", help="write an NS2 movement file for sim.tcl")
+    export_cmd.add_argument("scenario")
+    export_cmd.add_argument("-o", "--output", help="movement file (default: <scenario>.tcl)")
+    export_cmd.add_argument("--protocol", default="AODV", help="protocol for the printed ns command")
+    info_cmd = commands.add_parser("info", help="print the header of a scenario")
+    info_cmd.add_argument("scenario")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        scenario = generate(args.nodes, (0, 0, args.width, args.height), args.duration, args.seed, args.flows,
+                            args.min_speed, args.max_speed, args.max_pause)
+        scenario.save(args.output)
+        print(f"{len(scenario)} nodes, {len(scenario.move_time)} moves written to {args.output} "
+              f"({os.path.getsize(args.output)} bytes)")
+        return
+
+    scenario = load_scenario(args.scenario)
+    if args.command == "info":
+        print(json.dumps({"nodes": len(scenario), "moves": len(scenario.move_time), "bounds": scenario.bounds,
+                          "seed": scenario.seed, "duration": scenario.duration, "flows": scenario.flows}, indent=2))
+        return
+
+    output = args.output or os.path.splitext(args.scenario)[0] + ".tcl"
+    scenario.export(output)
+    print(f"Movement file written to {output}")
+    command = scenario.ns_command(output, args.protocol)
+    if command:
+        print(command)
+
+
+if __name__ == "__main__":
+    main()
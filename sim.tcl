@@ -1,6 +1,6 @@
 # Check if the required arguments are passed
 if { [llength $argv] < 2 } {
-    puts "Usage: ns <script.tcl> <Number of Nodes> <Routing Protocol> <Source Node> <Destination Node> <Second Source Node> <Second Destination Node>"
+    puts "Usage: ns <script.tcl> <Number of Nodes> <Routing Protocol> <Source Node> <Destination Node> <Second Source Node> <Second Destination Node> \[Random Seed\] \[-option value ...\]"
     exit 1
 }
 
@@ -11,6 +11,28 @@ set SRC    [lindex $argv 2]
 set DEST   [lindex $argv 3]
 set SRC2  [lindex $argv 4]
 set DEST2  [lindex $argv 5]
+set SEED   [lindex $argv 6]
+
+# Optional "-name value" settings after the seed, e.g. -stream 1 -nam 0 -movement 0
+set opt(trace)     ""         ;# trace destination: a file, a FIFO or "|command"; default <proto>_<nodes>.tr
+set opt(stream)    0          ;# pipe the trace into a live trace_analyzer.py instead of writing it to disk
+set opt(nam)       1          ;# write the .nam animation
+set opt(movement)  1          ;# trace node movements (not needed for the metrics)
+set opt(router)    1          ;# trace routing agents (needed for forwarding and overhead metrics)
+set opt(window)    5          ;# seconds per window of the live metrics
+set opt(abort_pdr) ""         ;# with -stream: stop once the PDR stays below this many percent
+set opt(python)    python3
+set opt(scenario)  ""         ;# movement file from "python scenario.py export": fixed positions and setdests
+set opt(x)         1000       ;# size of the topography; must cover the scenario area
+set opt(y)         1000
+foreach {flag value} [lrange $argv 7 end] {
+    set name [string map {- _} [string trimleft $flag -]]
+    if { ![info exists opt($name)] } {
+        puts "Error: unknown option $flag"
+        exit 1
+    }
+    set opt($name) $value
+}
 
 # Prompt the user for source and destination if not provided
 if { $SRC == "" } {
@@ -50,8 +72,17 @@ if { $SRC2 < 0 || $SRC2 >= $NODES || $DEST2 < 0 || $DEST2 >= $NODES } {
     exit 1
 }
 
+# Seed both the Tcl and the NS2 random generators so runs can be reproduced
+if { $SEED != "" } {
+    expr srand($SEED)
+    global defaultRNG
+    $defaultRNG seed $SEED
+}
+
 # Define the output directory
 set DIR_NAME "./"  ;# Use the current directory or specify your desired directory
+# Directory holding this script and performance.awk, so runs can start from any working directory
+set SCRIPT_DIR [file dirname [file normalize [info script]]]
 
 # Define options
 set val(chan)           Channel/WirelessChannel    ;# channel type
@@ -68,17 +99,27 @@ set val(sr)             $SRC                       ;# source node
 set val(dt)             $DEST                      ;# destination node
 set val(sr2)            $SRC2                       ;# second source node
 set val(dt2)            $DEST2                      ;# second destination node
-set val(x)              1000                       ;# X dimension of topography
-set val(y)              1000                       ;# Y dimension of topography
+set val(x)              $opt(x)                    ;# X dimension of topography
+set val(y)              $opt(y)                    ;# Y dimension of topography
 set val(stop)           200                        ;# time of simulation end
 
 set OUT_NAME "${DIR_NAME}/${PROTO}_${NODES}"
 set ns            [new Simulator]
-set tracefd       [open "$OUT_NAME.tr" w]
-set namtrace      [open "$OUT_NAME.nam" w]
-
+if { $opt(stream) } {
+    # The analyzer prints windowed metrics while the simulation runs and writes the report at the end
+    set opt(trace) "|$opt(python) $SCRIPT_DIR/trace_analyzer.py - --live --window $opt(window) --json $OUT_NAME.json"
+    if { $opt(abort_pdr) != "" } {
+        append opt(trace) " --abort-pdr $opt(abort_pdr)"
+    }
+} elseif { $opt(trace) == "" } {
+    set opt(trace) "$OUT_NAME.tr"
+}
+set tracefd       [open $opt(trace) w]
 $ns trace-all $tracefd
-$ns namtrace-all-wireless $namtrace $val(x) $val(y)
+if { $opt(nam) } {
+    set namtrace      [open "$OUT_NAME.nam" w]
+    $ns namtrace-all-wireless $namtrace $val(x) $val(y)
+}
 
 # set up topography object
 set topo [new Topography]
@@ -100,19 +141,28 @@ $ns node-config -adhocRouting $val(rp) \
     -channel [new $val(chan)] \
     -topoInstance $topo \
     -agentTrace ON \
-    -routerTrace ON \
+    -routerTrace [expr {$opt(router) ? "ON" : "OFF"}] \
     -macTrace OFF \
-    -movementTrace ON
+    -movementTrace [expr {$opt(movement) ? "ON" : "OFF"}]
 
 for {set i 0} {$i < $val(nn) } { incr i } {
     set node_($i) [$ns node]
-    $node_($i) set X_ [ expr 10+round(rand()*480) ]
-    $node_($i) set Y_ [ expr 10+round(rand()*380) ]
-    $node_($i) set Z_ 0.0
 }
 
-for {set i 0} {$i < $val(nn) } { incr i } {
-    $ns at [ expr 15+round(rand()*60) ] "$node_($i) setdest [ expr 10+round(rand()*480) ] [ expr 10+round(rand()*380) ] [ expr 2+round(rand()*15) ]"
+if { $opt(scenario) != "" } {
+    # Same positions and movements as the Python engines running the scenario file
+    set ns_ $ns
+    source $opt(scenario)
+} else {
+    for {set i 0} {$i < $val(nn) } { incr i } {
+        $node_($i) set X_ [ expr 10+round(rand()*480) ]
+        $node_($i) set Y_ [ expr 10+round(rand()*380) ]
+        $node_($i) set Z_ 0.0
+    }
+
+    for {set i 0} {$i < $val(nn) } { incr i } {
+        $ns at [ expr 15+round(rand()*60) ] "$node_($i) setdest [ expr 10+round(rand()*480) ] [ expr 10+round(rand()*380) ] [ expr 2+round(rand()*15) ]"
+    }
 }
 
 $ns at 0.0 "$node_($val(sr)) label SOURCE1"
@@ -166,9 +216,11 @@ $ftp attach-agent $tcp
 $ns at 10.0 "$ftp start"
 
 # Define node initial position in nam
-for {set i 0} {$i < $val(nn)} { incr i } {
-    # 30 defines the node size for nam
-    $ns initial_node_pos $node_($i) 30
+if { $opt(nam) } {
+    for {set i 0} {$i < $val(nn)} { incr i } {
+        # 30 defines the node size for nam
+        $ns initial_node_pos $node_($i) 30
+    }
 }
 
 # Telling nodes when the simulation ends
@@ -177,17 +229,41 @@ for {set i 0} {$i < $val(nn) } { incr i } {
 }
 
 # ending nam and the simulation
-$ns at $val(stop) "$ns nam-end-wireless $val(stop)"
+if { $opt(nam) } {
+    $ns at $val(stop) "$ns nam-end-wireless $val(stop)"
+}
 $ns at $val(stop) "stop"
-$ns at 150 "$ns halt"
 proc stop {} {
-    global ns tracefd namtrace
+    global ns tracefd namtrace OUT_NAME SCRIPT_DIR opt
     $ns flush-trace
     close $tracefd
-    close $namtrace
-    # Run AWK scripts for throughput and RPD, and save outputs to text files
-    exec awk -f performance.awk $OUT_NAME.tr > performance.txt
+    if { $opt(nam) } {
+        close $namtrace
+    }
+    # A streamed trace was analyzed while it was written; only a trace file still needs the AWK script
+    if { $opt(trace) == "$OUT_NAME.tr" } {
+        exec awk -f $SCRIPT_DIR/performance.awk $OUT_NAME.tr
+    }
+    $ns halt
+}
 
+# A streaming reader closes its end when it gives up on the run (or dies), so stop as soon as writes fail
+proc check_reader {} {
+    global ns tracefd opt
+    if { [catch {flush $tracefd}] } {
+        puts "Trace reader is gone, stopping the simulation at [$ns now]s"
+        $ns halt
+        return
+    }
+    $ns at [expr [$ns now] + $opt(window)] "check_reader"
+}
+if { $opt(trace) != "$OUT_NAME.tr" } {
+    $ns at $opt(window) "check_reader"
 }
 
 $ns run
+# Wait for a streaming analyzer to print its report; after an early stop the NAM file is still open too
+catch {close $tracefd}
+if { $opt(nam) } {
+    catch {close $namtrace}
+}
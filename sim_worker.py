@@ -0,0 +1,135 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from event_log import ERROR
+
+# What the GUI draws: node -> (x, y) and the edge set as they were after one tick
+Snapshot = namedtuple("Snapshot", ["tick", "sim_time", "positions", "edges", "frame"])
+
+
+def take_snapshot(sim, frame=None):
+    """Freeze the drawable state of ``sim``.
+
+    Positions are copied; the edge set is shared as is because the topology
+    replaces it on every update instead of changing it in place.
+    """
+    positions = dict(zip(sim.nodes, sim.mobility.positions.tolist()))
+    return Snapshot(sim.tick_count, sim.sim_time, positions, sim.edges, frame)
+
+
+class SnapshotBuffer:
+    """Double buffer between the simulation thread and the GUI thread.
+
+    The worker ``publish``es into the back slot and the GUI ``take``s the
+    latest snapshot into the front slot. A snapshot the GUI had no time to
+    pick up is simply replaced by the next one and counted in ``skipped``,
+    so a slow frame is dropped instead of queueing up behind the others.
+    """
+
+    def __init__(self, snapshot=None):
+        self.lock = threading.Lock()
+        self.front = snapshot
+        self.back = None
+        self.skipped = 0
+
+    def publish(self, snapshot):
+        with self.lock:
+            if self.back is not None:
+                self.skipped += 1
+            self.back = snapshot
+
+    def take(self):
+        """Return the newest snapshot not taken yet, or None."""
+        with self.lock:
+            snapshot, self.back = self.back, None
+        if snapshot is not None:
+            self.front = snapshot
+        return snapshot
+
+
+class SimulationWorker(threading.Thread):
+    """Runs ``sim.tick`` every ``interval`` seconds on its own thread.
+
+    Only this thread touches the simulation once it is started. Anything else
+    that needs it (routing queries, routing tables, convergence) goes through
+    ``call``, which runs the function between two ticks and hands the result
+    back through ``finished``; the GUI calls ``finished`` and
+    ``buffer.take`` from an ``after`` loop. A tick that overruns the interval
+    delays the next one instead of triggering a burst of catch-up ticks.
+    """
+
+    def __init__(self, sim, interval):
+        super().__init__(daemon=True)
+        self.sim = sim
+        self.interval = interval
+        self.buffer = SnapshotBuffer(take_snapshot(sim))
+        self.jobs = queue.Queue()
+        self.results = queue.SimpleQueue()
+        self.running = False
+        self.stopped = False
+
+    def resume(self):
+        self.running = True
+        self.jobs.put(None)  # Wake the thread up if it is idle
+
+    def pause(self):
+        """Stop ticking; a tick in progress still finishes and is published."""
+        self.running = False
+
+    def stop(self):
+        self.stopped = True
+        self.jobs.put(None)
+
+    def call(self, function, *args, callback=None):
+        """Run ``function(*args)`` on the simulation thread; ``callback`` gets the result on the GUI thread."""
+        self.jobs.put((function, args, callback))
+
+    def finished(self):
+        """Return (callback, result) for every call completed since the last time."""
+        done = []
+        while True:
+            try:
+                done.append(self.results.get_nowait())
+            except queue.Empty:
+                return done
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self.stopped:
+            timeout = max(next_tick - time.perf_counter(), 0) if self.running else None
+            try:
+                job = self.jobs.get(timeout=timeout)
+            except queue.Empty:
+                job = None
+            if job is not None:
+                self.run_job(*job)
+                continue
+            if self.stopped or not self.running:
+                continue
+            now = time.perf_counter()
+            if now < next_tick:
+                continue
+            self.step()
+            next_tick = max(next_tick + self.interval, now)
+
+    def run_job(self, function, args, callback):
+        try:
+            result = function(*args)
+        except Exception as error:
+            self.sim.events.emit(f"{function.__name__} failed: {error}", ERROR, kind="error")
+            return
+        if callback is not None:
+            self.results.put((callback, result))
+
+    def step(self):
+        sim = self.sim
+        profiler = sim.profiler
+        profiler.begin_frame()
+        sim.tick()
+        frame = None
+        if profiler.enabled:
+            profiler.end_frame(skipped=self.buffer.skipped, **sim.counters())
+            frame = profiler.frame
+        self.buffer.publish(take_snapshot(sim, frame))
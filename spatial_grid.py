@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+import numpy as np
+
+# Offsets of the cells that still have to be compared with a given cell when
+# every cell pair is visited only once (the other half is covered by the
+# neighbouring cells looking back at us).
+HALF_NEIGHBORHOOD = [(0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+class SpatialGrid:
+    """Uniform grid of square cells used to find nodes within radio range.
+
+    With the cell size equal to the communication range, every node in range
+    of another one lives in the same cell or in one of the eight cells around
+    it, so a range query only looks at a handful of candidates instead of the
+    whole network.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)  # (cell_x, cell_y) -> nodes in that cell
+        self.node_cells = {}  # node -> (cell_x, cell_y)
+
+    def cell_of(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, node):
+        cell = self.cell_of(node.x, node.y)
+        self.cells[cell].add(node)
+        self.node_cells[node] = cell
+
+    def remove(self, node):
+        cell = self.node_cells.pop(node)
+        bucket = self.cells[cell]
+        bucket.discard(node)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, node):
+        """Re-bucket a node after its coordinates changed."""
+        cell = self.cell_of(node.x, node.y)
+        old_cell = self.node_cells.get(node)
+        if old_cell == cell:
+            return
+        if old_cell is not None:
+            self.remove(node)
+        self.cells[cell].add(node)
+        self.node_cells[node] = cell
+
+    def clear(self):
+        self.cells.clear()
+        self.node_cells.clear()
+
+    def nodes_in_range(self, x, y, radius):
+        """Return the nodes within ``radius`` of the point (x, y)."""
+        cx, cy = self.cell_of(x, y)
+        reach = int(-(-radius // self.cell_size))  # ceil without importing math
+        radius_sq = radius * radius
+        found = []
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                bucket = self.cells.get((gx, gy))
+                if not bucket:
+                    continue
+                for node in bucket:
+                    dx = node.x - x
+                    dy = node.y - y
+                    if dx * dx + dy * dy <= radius_sq:
+                        found.append(node)
+        return found
+
+
+def pairs_in_range(positions, radius):
+    """Index pairs (i, j), i < j, of the rows of ``positions`` (n x 2) at most ``radius`` apart.
+
+    Returns two int64 arrays. The points are sorted by the id of their grid
+    cell, with cells as wide as ``radius``, so the points of any cell form
+    one run of the sorted order: every point is only compared with the runs
+    of its own cell and the HALF_NEIGHBORHOOD cells, all at once in numpy.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    if len(positions) < 2:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    cells = np.floor_divide(positions, radius).astype(np.int64)
+    cells -= cells.min(0)
+    # A column on either side of the used ones, so a neighbouring cell never wraps into the next row
+    width = int(cells[:, 0].max()) + 3
+    ids = cells[:, 1] * width + cells[:, 0] + 1
+    order = np.argsort(ids, kind="stable")
+    ids = ids[order]
+    xs, ys = positions[order, 0], positions[order, 1]
+    points = np.arange(len(ids))
+    radius_sq = radius * radius
+    first, second = [], []
+    for dx_cell, dy_cell in HALF_NEIGHBORHOOD:
+        target = ids + dy_cell * width + dx_cell
+        if dx_cell == 0 and dy_cell == 0:
+            low = points + 1  # Only the points after this one in its own cell
+        else:
+            low = np.searchsorted(ids, target, "left")
+        counts = np.maximum(np.searchsorted(ids, target, "right") - low, 0)
+        a = np.repeat(points, counts)
+        b = np.arange(len(a)) - np.repeat(np.cumsum(counts) - counts - low, counts)
+        dx = xs[a] - xs[b]
+        dy = ys[a] - ys[b]
+        close = dx * dx + dy * dy <= radius_sq
+        first.append(order[a[close]])
+        second.append(order[b[close]])
+    first, second = np.concatenate(first), np.concatenate(second)
+    return np.minimum(first, second), np.maximum(first, second)
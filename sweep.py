@@ -0,0 +1,259 @@
+"""Parallel parameter sweeps over sim.tcl with cached results.
+
+Every point of the grid (node count, protocol, flow pairs, seed) runs ``ns``
+in its own directory under the results store, gets analyzed with
+trace_analyzer, and leaves a result.json behind. The trace is streamed to the
+analyzer through a pipe, so a run leaves only a few KB on disk; pass
+--keep-traces to write the .tr and .nam files instead. The directory name is
+a hash of the parameters, of sim.tcl itself and of trace_analyzer.py, so
+re-running a sweep skips every point that already finished, and a changed
+analyzer recomputes the metrics instead of serving stale ones.
+
+    python sweep.py --nodes 10 20 50 --protocols AODV DSDV DSR --flows 0:1,2:3 --seeds 1 2 3
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from trace_analyzer import WINDOW_FIELDS, EarlyAbort, HopelessScenario, TraceAnalyzer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SIM_SCRIPT = os.path.join(SCRIPT_DIR, "sim.tcl")
+ANALYZER_SCRIPT = os.path.join(SCRIPT_DIR, "trace_analyzer.py")
+PROTOCOLS = ["AODV", "OLSR", "DSDV", "DSR"]
+STREAM_WINDOW = 5.0  # Seconds per row of windows.csv in streaming runs
+
+SUMMARY_FIELDS = ["key", "nodes", "protocol", "flows", "seed", "status", "wall_time", "throughput_kbps",
+                  "pdr", "loss", "avg_delay", "overhead", "routing_packets"]
+
+
+def parse_flows(spec):
+    """Turn "0:1,2:3" into [(0, 1), (2, 3)]; sim.tcl takes exactly two flows."""
+    pairs = [tuple(int(node) for node in pair.split(":")) for pair in spec.split(",")]
+    if len(pairs) != 2 or any(len(pair) != 2 for pair in pairs):
+        raise argparse.ArgumentTypeError(f"expected two src:dst pairs, got {spec!r}")
+    return pairs
+
+
+def point_key(point, script_hash):
+    """Stable hash of a sweep point, also covering the simulation script and the analyzer."""
+    blob = json.dumps(point, sort_keys=True) + script_hash
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def build_grid(nodes, protocols, flows, seeds):
+    points = []
+    for node_count, protocol, flow_pairs, seed in itertools.product(nodes, protocols, flows, seeds):
+        if any(node >= node_count for pair in flow_pairs for node in pair):
+            continue  # sim.tcl rejects flows between nodes that do not exist
+        points.append({"nodes": node_count, "protocol": protocol,
+                       "flows": [list(pair) for pair in flow_pairs], "seed": seed})
+    return points
+
+
+def run_point(point, work_dir, ns_binary="ns", script=SIM_SCRIPT, timeout=None, keep_traces=False, abort=None):
+    """Run one simulation in ``work_dir`` and write its result.json there.
+
+    Unless the traces are kept, the trace is streamed to the analyzer through
+    a pipe and never touches the disk. ``abort`` is an optional
+    (min_pdr, after) pair that stops a streamed run once it is hopeless.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    (src, dst), (src2, dst2) = point["flows"]
+    command = [ns_binary, script, str(point["nodes"]), point["protocol"],
+               str(src), str(dst), str(src2), str(dst2), str(point["seed"])]
+    result = {"params": point, "command": command}
+
+    started = time.perf_counter()
+    try:
+        if keep_traces:
+            report, output = run_to_file(command, work_dir, point, timeout)
+        else:
+            report, output = run_streaming(command, work_dir, timeout, abort)
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        result.update(status="error", error=str(exc), wall_time=time.perf_counter() - started)
+        return result
+    result["wall_time"] = time.perf_counter() - started
+
+    if report is None:
+        result.update(status="error", error="no trace written", output=output[-2000:].decode(errors="replace"))
+        return result
+    result["report"] = report
+    result["status"] = "aborted" if "aborted" in report else "ok"
+
+    # Write through a temporary file so an interrupted run never leaves a half-written cache entry
+    path = os.path.join(work_dir, "result.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return result
+
+
+def run_to_file(command, work_dir, point, timeout):
+    """Let ns write its .tr and .nam files, then analyze the trace; returns (report or None, output)."""
+    proc = subprocess.run(command, cwd=work_dir, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT, timeout=timeout)
+    trace = os.path.join(work_dir, f"{point['protocol']}_{point['nodes']}.tr")
+    if not os.path.exists(trace):
+        return None, proc.stdout
+    return TraceAnalyzer().analyze_file(trace), proc.stdout
+
+
+def run_streaming(command, work_dir, timeout, abort):
+    """Pipe the trace of ns straight into the analyzer; returns (report or None, output).
+
+    Only the per-window metrics (windows.csv) and the output of ns (ns.log)
+    are written next to the result.
+    """
+    read_fd, write_fd = os.pipe()
+    command = command + ["-trace", f"/dev/fd/{write_fd}", "-nam", "0", "-movement", "0"]
+    log_path = os.path.join(work_dir, "ns.log")
+    with open(log_path, "wb") as log, open(os.path.join(work_dir, "windows.csv"), "w", newline="") as windows:
+        writer = csv.DictWriter(windows, fieldnames=WINDOW_FIELDS, restval="")
+        writer.writeheader()
+        on_window = writer.writerows
+        if abort:
+            on_window = EarlyAbort(*abort, on_window=on_window)
+        analyzer = TraceAnalyzer(window=STREAM_WINDOW, on_window=on_window)
+        try:
+            proc = subprocess.Popen(command, cwd=work_dir, stdin=subprocess.DEVNULL, stdout=log,
+                                    stderr=subprocess.STDOUT, pass_fds=(write_fd,))
+        except OSError:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)  # Only ns holds the write end, so its exit ends the stream
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, expire) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            with os.fdopen(read_fd, "rb") as stream:
+                report = analyzer.analyze_stream(stream)
+        except HopelessScenario as hopeless:
+            proc.kill()
+            report = analyzer.report()
+            report["aborted"] = {"time": hopeless.time, "reason": str(hopeless)}
+        finally:
+            if timer:
+                timer.cancel()
+            proc.wait()
+    with open(log_path, "rb") as f:
+        output = f.read()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout, output)
+    if not analyzer.flow_names and proc.returncode != 0:
+        return None, output  # ns failed before tracing a single packet
+    return report, output
+
+
+def load_result(work_dir):
+    path = os.path.join(work_dir, "result.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def summary_row(key, result):
+    point = result["params"]
+    row = {"key": key, "nodes": point["nodes"], "protocol": point["protocol"],
+           "flows": " ".join(f"{src}:{dst}" for src, dst in point["flows"]), "seed": point["seed"],
+           "status": result["status"], "wall_time": result.get("wall_time")}
+    if "report" in result:
+        row.update({field: result["report"]["total"].get(field) for field in SUMMARY_FIELDS[7:]})
+    return row
+
+
+def run_sweep(points, store, ns_binary="ns", jobs=None, timeout=None, keep_traces=False, force=False,
+              script=SIM_SCRIPT, abort=None):
+    """Run every point not cached in ``store`` yet and return {key: result} for all of them."""
+    os.makedirs(store, exist_ok=True)
+    # Metrics come from trace_analyzer, so a change to it must not serve results computed by the old one
+    script_hash = file_hash(script) + file_hash(ANALYZER_SCRIPT)
+    if abort and not keep_traces:
+        script_hash += json.dumps(abort)  # An aborted run is a different result than a finished one
+    results = {}
+    pending = {}
+    for point in points:
+        key = point_key(point, script_hash)
+        work_dir = os.path.join(store, key)
+        cached = None if force else load_result(work_dir)
+        if cached is not None:
+            results[key] = cached
+        else:
+            if os.path.isdir(work_dir):
+                shutil.rmtree(work_dir)  # Leftovers of an unfinished or failed run
+            pending[key] = (point, work_dir)
+
+    print(f"{len(points)} points, {len(results)} cached, {len(pending)} to run")
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = {
+            pool.submit(run_point, point, work_dir, ns_binary, script, timeout, keep_traces, abort): key
+            for key, (point, work_dir) in pending.items()
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            results[key] = future.result()
+            point = results[key]["params"]
+            print(f"[{done}/{len(futures)}] {point['protocol']} nodes={point['nodes']} seed={point['seed']}: "
+                  f"{results[key]['status']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run sim.tcl over a parameter grid in parallel.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--protocols", nargs="+", default=PROTOCOLS)
+    parser.add_argument("--flows", type=parse_flows, nargs="+", default=[parse_flows("0:1,2:3")],
+                        help="flow pairs as src:dst,src2:dst2")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1])
+    parser.add_argument("--store", default="sweep_results", help="directory holding the cached results")
+    parser.add_argument("--ns", default="ns", help="ns binary to run")
+    parser.add_argument("--jobs", type=int, default=None, help="parallel simulations (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds before a run is killed")
+    parser.add_argument("--keep-traces", action="store_true",
+                        help="write and keep the .tr and .nam files of each run instead of streaming the trace")
+    parser.add_argument("--abort-pdr", type=float,
+                        help="stop a streamed run once its PDR stays below this many percent")
+    parser.add_argument("--abort-after", type=float, default=30.0,
+                        help="simulated seconds before --abort-pdr is checked")
+    parser.add_argument("--force", action="store_true", help="ignore cached results")
+    args = parser.parse_args(argv)
+
+    points = build_grid(args.nodes, args.protocols, args.flows, args.seeds)
+    results = run_sweep(points, args.store, ns_binary=args.ns, jobs=args.jobs, timeout=args.timeout,
+                        keep_traces=args.keep_traces, force=args.force,
+                        abort=(args.abort_pdr, args.abort_after) if args.abort_pdr is not None else None)
+
+    summary = os.path.join(args.store, "summary.csv")
+    with open(summary, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, restval="")
+        writer.writeheader()
+        for key, result in sorted(results.items(), key=lambda item: (
+                item[1]["params"]["protocol"], item[1]["params"]["nodes"], item[1]["params"]["seed"])):
+            writer.writerow(summary_row(key, result))
+    print(f"Summary written to {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The modules live flat at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FLOWS = [(0, 3, "cbr"), (1, 4, "cbr"), (2, 5, "tcp")]
+
+
+@pytest.fixture
+def agent_trace(tmp_path):
+    """A small seeded old-format wireless trace: three data flows, forwarding, routing and drops.
+
+    Every uid is sent once and received at most once, well within the
+    analyzer's ``max_delay``, so all the tools agree on what was delivered.
+    """
+    rng = random.Random(7)
+    lines = []
+    uid = 0
+    t = 1.0
+    for _ in range(600):
+        t += rng.uniform(0.001, 0.05)
+        uid += 1
+        src, dst, ptype = rng.choice(FLOWS)
+        header = f"------- [{src}:0 {dst}:0 32 0] [0] 0 0"
+        lines.append((t, f"s {t:.9f} _{src}_ AGT  --- {uid} {ptype} 512 [0 0 0 0] {header}"))
+        lines.append((t, f"r {t:.9f} _{src}_ RTR  --- {uid} {ptype} 512 [0 0 0 0] {header}"))
+        hop = rng.randrange(6, 12)
+        forwarded = t + rng.uniform(0.001, 0.01)
+        lines.append((forwarded, f"f {forwarded:.9f} _{hop}_ RTR  --- {uid} {ptype} 532 [13a {hop:x} {src:x} 800] "
+                                 f"{header}"))
+        lines.append((forwarded, f"s {forwarded:.9f} _{hop}_ MAC  --- {uid} {ptype} 584 [13a {dst:x} {hop:x} 800] "
+                                 f"{header}"))
+        chance = rng.random()
+        if chance < 0.8:
+            received = forwarded + rng.uniform(0.001, 0.5)
+            lines.append((received, f"r {received:.9f} _{dst}_ AGT  --- {uid} {ptype} 532 [13a {dst:x} {hop:x} 800] "
+                                    f"------- [{src}:0 {dst}:0 31 {dst}] [0] 1 0"))
+        elif chance < 0.9:
+            lines.append((forwarded, f"D {forwarded:.9f} _{hop}_ RTR  NRTE {uid} {ptype} 532 [0 0 0 0] {header}"))
+        else:
+            lines.append((forwarded, f"D {forwarded:.9f} _{hop}_ IFQ  ARP {uid} {ptype} 532 [0 0 0 0] {header}"))
+        if rng.random() < 0.1:
+            uid += 1
+            node = rng.randrange(12)
+            lines.append((t, f"s {t:.9f} _{node}_ RTR  --- {uid} AODV 48 [0 0 0 0] ------- "
+                             f"[{node}:255 -1:255 30 0] [0x2 1 1 [1 0] [0 4]] (REQUEST)"))
+            lines.append((t, f"D {t:.9f} _{node}_ RTR  TTL {uid} AODV 48 [0 0 0 0] ------- "
+                             f"[{node}:255 -1:255 30 0] [0x2 1 1 [1 0] [0 4]] (REQUEST)"))
+    lines.sort(key=lambda line: line[0])
+    path = tmp_path / "agent.tr"
+    path.write_text("".join(line + "\n" for _, line in lines))
+    return str(path)
@@ -0,0 +1,96 @@
+"""Slow, obviously correct reference versions of what the modules compute."""
+
+import heapq
+import itertools
+import math
+from collections import Counter, defaultdict, deque
+
+ROUTING_TYPES = {"AODV", "AOMDV", "DSDV", "OLSR", "DSR", "message"}
+
+
+def links(points, communication_range):
+    """Set of (i, j) index pairs, i < j, of points at most ``communication_range`` apart."""
+    return {(i, j) for (i, a), (j, b) in itertools.combinations(enumerate(points), 2)
+            if (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 <= communication_range ** 2}
+
+
+def adjacency(count, pairs):
+    neighbors = [set() for _ in range(count)]
+    for i, j in pairs:
+        neighbors[i].add(j)
+        neighbors[j].add(i)
+    return neighbors
+
+
+def bfs(neighbors, source):
+    """{node: hops} of every node reachable from ``source``."""
+    hops = {source: 0}
+    queue = deque([source])
+    while queue:
+        node = queue.popleft()
+        for neighbor in neighbors[node]:
+            if neighbor not in hops:
+                hops[neighbor] = hops[node] + 1
+                queue.append(neighbor)
+    return hops
+
+
+def components(neighbors):
+    """List of node sets, one per connected component."""
+    seen = set()
+    found = []
+    for node in range(len(neighbors)):
+        if node not in seen:
+            members = set(bfs(neighbors, node))
+            seen |= members
+            found.append(members)
+    return found
+
+
+def dijkstra(source, cost):
+    """{node: cost} of the cheapest path to every node reachable over ``node.neighbors``."""
+    costs = {source: 0.0}
+    order = itertools.count()
+    heap = [(0.0, next(order), source)]
+    done = set()
+    while heap:
+        total, _, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        for neighbor in node.neighbors:
+            new = total + cost(node, neighbor)
+            if new < costs.get(neighbor, math.inf):
+                costs[neighbor] = new
+                heapq.heappush(heap, (new, next(order), neighbor))
+    return costs
+
+
+def trace_lines(path):
+    """Old-format trace lines as lists of whitespace-separated fields, timed events only."""
+    with open(path) as f:
+        return [fields for fields in (line.split() for line in f) if fields and fields[0] in "srfDd"]
+
+
+def agent_flows(path, max_delay=30.0):
+    """Per-flow sent, received and delays at the agent layer, plus drop and routing counts."""
+    sends = {}
+    flows = defaultdict(lambda: {"sent": 0, "received": 0, "delays": []})
+    drops = Counter()
+    routing = 0
+    for fields in trace_lines(path):
+        event, time, layer, reason, uid, ptype = fields[0], float(fields[1]), fields[3], fields[4], fields[5], fields[6]
+        if layer == "AGT" and event == "s":
+            flow = f"{fields[13][1:]}->{fields[14]} {ptype}"
+            flows[flow]["sent"] += 1
+            sends[uid] = (flow, time)
+        elif layer == "AGT" and event == "r" and uid in sends:
+            flow, sent = sends.pop(uid)
+            if time - sent <= max_delay:
+                flows[flow]["received"] += 1
+                flows[flow]["delays"].append(time - sent)
+        elif layer == "RTR" and event in "sf" and ptype in ROUTING_TYPES:
+            routing += 1
+        elif event in "Dd" and ptype not in ROUTING_TYPES:
+            drops[f"{layer} {reason}"] += 1
+    return dict(flows), dict(drops), routing
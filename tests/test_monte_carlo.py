@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import naive
+from monte_carlo import LARGEST_BINS, run_chunk
+
+
+def brute_chunk(node_count, communication_range, width, height, trials, sources, seed, point, chunk):
+    """run_chunk one trial and one BFS at a time, drawing the same random numbers."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(point, chunk)))
+    positions = rng.uniform(0.0, 1.0, (trials, node_count, 2)) * (width, height)
+    picked = rng.random((trials, node_count)).argsort(1)[:, :min(sources, node_count)]
+    result = {"connected": 0, "isolated": 0, "largest_sum": 0.0, "components": [0] * (node_count + 1),
+              "largest": [0] * LARGEST_BINS, "hops": [0] * node_count, "unreachable": 0}
+    for trial in range(trials):
+        neighbors = naive.adjacency(node_count, naive.links(positions[trial].tolist(), communication_range))
+        sizes = [len(members) for members in naive.components(neighbors)]
+        fraction = max(sizes) / node_count
+        result["connected"] += len(sizes) == 1
+        result["components"][len(sizes)] += 1
+        result["largest_sum"] += fraction
+        result["largest"][min(int(fraction * LARGEST_BINS), LARGEST_BINS - 1)] += 1
+        result["isolated"] += any(not linked for linked in neighbors)
+        for source in picked[trial].tolist():
+            hops = naive.bfs(neighbors, source)
+            result["unreachable"] += node_count - len(hops)
+            for count in hops.values():
+                if count:
+                    result["hops"][count] += 1
+    return result
+
+
+@pytest.mark.parametrize("args", [(40, 150, 1000, 1000, 7, 8, 1, 0, 0), (60, 250, 1000, 600, 5, 60, 3, 1, 2),
+                                  (25, 90, 500, 500, 9, 4, 2, 0, 1)])
+def test_chunk_matches_one_trial_at_a_time(args):
+    result = run_chunk(*args)
+    expected = brute_chunk(*args)
+    assert result["largest_sum"] == pytest.approx(expected.pop("largest_sum"))
+    assert {key: result[key] for key in expected} == expected
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+import naive
+from engine import Simulation
+from route_engine import RouteEngine, link_cost
+
+
+@pytest.fixture(scope="module")
+def sim():
+    return Simulation(node_count=150, communication_range=130, bounds=(0, 0, 1000, 700), seed=5)
+
+
+def pairs(sim, count=60):
+    rng = random.Random(1)
+    return [tuple(rng.sample(sim.nodes, 2)) for _ in range(count)]
+
+
+def assert_valid(path, source, destination):
+    assert path[0] is source and path[-1] is destination
+    assert all(b in a.neighbors for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("strategy", ["dijkstra", "astar"])
+@pytest.mark.parametrize("weight", ["hops", "distance", "etx"])
+def test_best_first_paths_are_optimal(sim, strategy, weight):
+    engine = RouteEngine(sim.hop_table, sim.communication_range, strategy, weight)
+    for source, destination in pairs(sim):
+        costs = naive.dijkstra(source, lambda a, b: link_cost(weight, a, b, sim.communication_range))
+        path = engine.route(source, destination)
+        if destination not in costs:
+            assert path is None
+            continue
+        assert_valid(path, source, destination)
+        assert engine.cost(path) == pytest.approx(costs[destination])
+
+
+@pytest.mark.parametrize("strategy", ["bfs", "bidirectional"])
+def test_breadth_first_paths_are_shortest(sim, strategy):
+    engine = RouteEngine(sim.hop_table, sim.communication_range, strategy, "hops")
+    index = {node: i for i, node in enumerate(sim.nodes)}
+    neighbors = [{index[neighbor] for neighbor in node.neighbors} for node in sim.nodes]
+    for source, destination in pairs(sim):
+        hops = naive.bfs(neighbors, index[source])
+        path = engine.route(source, destination)
+        if index[destination] not in hops:
+            assert path is None
+            continue
+        assert_valid(path, source, destination)
+        assert len(path) - 1 == hops[index[destination]]
+
+
+def test_greedy_paths_only_get_closer(sim):
+    engine = RouteEngine(sim.hop_table, sim.communication_range, "greedy")
+    for source, destination in pairs(sim):
+        path = engine.route(source, destination)
+        if path is not None:
+            assert_valid(path, source, destination)
+            remaining = [node.distance_to(destination) for node in path]
+            assert remaining == sorted(remaining, reverse=True)
@@ -0,0 +1,51 @@
+import pytest
+
+import naive
+from engine import Simulation
+from hop_table import UNREACHABLE, HopTable
+
+
+def neighbor_lists(sim):
+    index = {node: i for i, node in enumerate(sim.nodes)}
+    return [{index[neighbor] for neighbor in node.neighbors} for node in sim.nodes]
+
+
+@pytest.mark.parametrize("dense_limit", [2048, 10])  # Full table, and the row cache used for big networks
+def test_hop_table_matches_bfs(dense_limit):
+    sim = Simulation(node_count=90, communication_range=120, bounds=(0, 0, 900, 600), seed=4)
+    table = HopTable(sim.nodes, dense_limit=dense_limit, max_rows=8)
+    for _ in range(10):
+        sim.move_nodes(dt=3.0)
+        table.invalidate()
+        neighbors = neighbor_lists(sim)
+        sources = sim.nodes[::3]
+        counts = table.hop_counts(sources)
+        for row, source in enumerate(sources):
+            hops = naive.bfs(neighbors, sim.nodes.index(source))
+            expected = [hops.get(i, UNREACHABLE) for i in range(len(sim.nodes))]
+            assert counts[row].tolist() == expected
+            for i, destination in enumerate(sim.nodes):
+                assert table.hop_count(source, destination) == hops.get(i)
+                path = table.path(source, destination)
+                if i in hops:
+                    assert path[0] is source and path[-1] is destination and len(path) == hops[i] + 1
+                    assert all(b in a.neighbors for a, b in zip(path, path[1:]))
+                else:
+                    assert path is None
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_distance_vector_converges_to_shortest_paths(seed):
+    sim = Simulation(node_count=80, bounds=(0, 0, 1200, 900), protocol="dsdv", seed=seed)
+    for _ in range(30):
+        sim.tick()
+        for source in sim.nodes[::5]:
+            for destination in sim.nodes:
+                if source is destination:
+                    continue
+                hops = sim.hop_table.hop_count(source, destination)
+                assert sim.distance_vector.hop_count(source, destination) == hops
+                if hops:
+                    path = sim.distance_vector.path(source, destination)
+                    assert len(path) - 1 == hops
+                    assert all(b in a.neighbors for a, b in zip(path, path[1:]))
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import naive
+from engine import Simulation
+from spatial_grid import pairs_in_range
+
+
+@pytest.mark.parametrize("radius", [5.0, 40.0, 300.0])
+def test_pairs_in_range_match_all_pairs(radius):
+    rng = np.random.default_rng(3)
+    points = rng.uniform(-100, 400, (300, 2))
+    points[:20] = points[20:40]  # Some nodes on top of each other
+    first, second = pairs_in_range(points, radius)
+    assert (first < second).all()
+    assert set(zip(first.tolist(), second.tolist())) == naive.links(points.tolist(), radius)
+
+
+@pytest.mark.parametrize("node_count, communication_range, seed", [(30, 60, 0), (80, 100, 1), (150, 60, 2),
+                                                                     (150, 150, 3)])
+def test_links_and_components_follow_the_nodes(node_count, communication_range, seed):
+    sim = Simulation(node_count=node_count, communication_range=communication_range, bounds=(0, 0, 700, 400),
+                     seed=seed)
+    index = {node: i for i, node in enumerate(sim.nodes)}
+    for tick in range(40):
+        sim.move_nodes(dt=5.0 if tick % 2 else 0.5)  # Long steps break and make many links at once
+        pairs = naive.links([(node.x, node.y) for node in sim.nodes], communication_range)
+        neighbors = naive.adjacency(node_count, pairs)
+        topology = sim.topology
+        assert {tuple(sorted((index[a], index[b]))) for a, b in topology.edges} == pairs
+        assert [{index[neighbor] for neighbor in node.neighbors} for node in sim.nodes] == neighbors
+        expected = naive.components(neighbors)
+        assert topology.component_count() == len(expected)
+        for members in expected:
+            nodes = {sim.nodes[i] for i in members}
+            assert topology.component_of(next(iter(nodes))) == nodes
@@ -0,0 +1,50 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import naive
+from graph import read_performance
+from trace_analyzer import TraceAnalyzer
+
+AWK_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "performance.awk")
+
+
+def rounded(value):
+    """``value`` with every float rounded, since sums taken in another order differ in the last bits."""
+    if isinstance(value, dict):
+        return {key: rounded(item) for key, item in value.items()}
+    return round(value, 9) if isinstance(value, float) else value
+
+
+def test_flows_match_a_line_by_line_parse(agent_trace):
+    report = TraceAnalyzer().analyze_file(agent_trace)
+    flows, drops, routing = naive.agent_flows(agent_trace)
+    assert set(report["flows"]) == set(flows)
+    for name, expected in flows.items():
+        summary = report["flows"][name]
+        assert (summary["sent"], summary["received"]) == (expected["sent"], expected["received"])
+        assert summary["avg_delay"] == pytest.approx(sum(expected["delays"]) / len(expected["delays"]))
+        assert summary["max_delay"] == pytest.approx(max(expected["delays"]))
+    assert report["drops"] == drops
+    assert report["total"]["routing_packets"] == routing
+
+
+def test_chunk_size_does_not_change_the_report(agent_trace):
+    whole = TraceAnalyzer(max_delay=0.3).analyze_file(agent_trace)
+    assert rounded(TraceAnalyzer(max_delay=0.3).analyze_file(agent_trace, chunk_size=4096)) == rounded(whole)
+    with open(agent_trace, "rb") as f:
+        assert rounded(TraceAnalyzer(max_delay=0.3).analyze_stream(f, chunk_size=1000)) == rounded(whole)
+    flows, _, _ = naive.agent_flows(agent_trace, max_delay=0.3)
+    assert {name: stats["received"] for name, stats in whole["flows"].items()} == \
+        {name: stats["received"] for name, stats in flows.items()}
+
+
+@pytest.mark.skipif(shutil.which("awk") is None, reason="awk is not installed")
+def test_pdr_matches_performance_awk(agent_trace, tmp_path):
+    # performance.awk writes performance.txt into the working directory
+    subprocess.run(["awk", "-f", AWK_SCRIPT, agent_trace], cwd=tmp_path, check=True)
+    expected = read_performance(str(tmp_path / "performance.txt"))
+    report = TraceAnalyzer().analyze_file(agent_trace)
+    assert round(report["total"]["pdr"], 2) == expected["pdr"]
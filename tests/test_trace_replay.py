@@ -0,0 +1,130 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import naive
+import trace_replay
+from trace_replay import TraceReplay, build_index
+
+NODES = 20
+DURATION = 30.0
+
+
+@pytest.fixture
+def replay_traces(tmp_path, monkeypatch):
+    """A seeded .tr and the .nam sim.tcl would write next to it, indexed with small samples and keyframes."""
+    rng = random.Random(1)
+    tr_path, nam_path = tmp_path / "run.tr", tmp_path / "run.nam"
+    with open(tr_path, "w") as tr, open(nam_path, "w") as nam:
+        nam.write("V -t * -v 1.0a5 -a 0\nW -t * -x 500 -y 400\n")
+        positions = {}
+        for node in range(NODES):
+            positions[node] = (rng.uniform(10, 490), rng.uniform(10, 390))
+            nam.write(f"n -t * -s {node} -x {positions[node][0]:.2f} -y {positions[node][1]:.2f} "
+                      f"-Z 0 -z 30 -v circle -c black\n")
+        uid = 0
+        for step in range(1, int(DURATION * 100)):
+            t = step / 100
+            if step % 20 == 0:
+                node = rng.randrange(NODES)
+                (x, y), (to_x, to_y), speed = positions[node], (rng.uniform(10, 490), rng.uniform(10, 390)), 20.0
+                distance = ((to_x - x) ** 2 + (to_y - y) ** 2) ** 0.5
+                nam.write(f"n -t {t:.9f} -s {node} -x {x:.2f} -y {y:.2f} -U {speed * (to_x - x) / distance:.2f} "
+                          f"-V {speed * (to_y - y) / distance:.2f} -T {distance / speed:.2f}\n")
+                tr.write(f"M {t:.5f} {node} ({x:.2f}, {y:.2f}, 0.00), ({to_x:.2f}, {to_y:.2f}), {speed:.2f}\n")
+                positions[node] = (to_x, to_y)
+            uid += 1
+            a, b = rng.sample(range(NODES), 2)
+            src, dst = rng.sample(range(NODES), 2)
+            header = f"------- [{src}:0 {dst}:0 32 0] [0 0] 0 0"
+            tr.write(f"s {t:.9f} _{src}_ AGT  --- {uid} tcp 1040 [0 0 0 0] {header}\n")
+            tr.write(f"s {t:.9f} _{a}_ RTR  --- {uid} tcp 1060 [0 0 0 0] {header}\n")
+            tr.write(f"r {t + 0.002:.9f} _{b}_ RTR  --- {uid} tcp 1060 [13a {b:x} {a:x} 800] {header}\n")
+            nam.write(f"h -t {t:.9f} -s {a} -d {b} -p tcp -e 1060 -c 2 -a 0 -i {uid} -k RTR\n")
+            if uid % 37 == 0:
+                tr.write(f"D {t + 0.003:.9f} _{b}_ RTR  NRTE {uid} tcp 1060 [0 0 0 0] {header}\n")
+                nam.write(f"d -t {t + 0.003:.9f} -s {b} -d -1 -p tcp -e 1060 -c 2 -a 0 -i {uid} -k RTR\n")
+            if uid % 50 == 0:
+                tr.write(f"s {t:.9f} _{a}_ AGT  --- {uid + 10 ** 6} AODV 48 [0 0 0 0] ------- "
+                         f"[{a}:255 -1:255 30 0] [0x2 1 1 [1 0] [0 4]] (REQUEST)\n")
+    monkeypatch.setattr(trace_replay, "KEYFRAME_MOVES", 1)  # A keyframe every NODES moves
+    for path in (tr_path, nam_path):
+        build_index(str(path), sample_bytes=4096)
+    return str(tr_path), str(nam_path)
+
+
+def tr_events(path):
+    events = []
+    for fields in naive.trace_lines(path):
+        event, time, node = fields[0], float(fields[1]), int(fields[2].strip("_"))
+        if event == "r" and int(fields[10], 16) != node:
+            events.append((time, "link", (int(fields[10], 16), node)))
+        elif event == "s" and fields[3] == "AGT" and fields[6] not in naive.ROUTING_TYPES:
+            events.append((time, "flow", (int(fields[13][1:].split(":")[0]), int(fields[14].split(":")[0]))))
+        elif event in "Dd":
+            events.append((time, "drop", (node, fields[4])))
+    return events
+
+
+def nam_lines(path):
+    """(kind, {flag: value}) of every line of a .nam file."""
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            yield fields[0], dict(zip(fields[1::2], fields[2::2]))
+
+
+def nam_events(path):
+    events = []
+    for kind, flags in nam_lines(path):
+        if kind == "h" and int(flags["-d"]) >= 0:
+            events.append((float(flags["-t"]), "link", (int(flags["-s"]), int(flags["-d"]))))
+        elif kind == "d":
+            events.append((float(flags["-t"]), "drop", (int(flags["-s"]), "IFQ")))
+    return events
+
+
+def nam_positions(path, t):
+    positions = np.full((NODES, 2), np.nan)
+    for kind, flags in nam_lines(path):
+        if kind != "n":
+            continue
+        start = 0.0 if flags["-t"] == "*" else float(flags["-t"])
+        if start > t:
+            break
+        elapsed = min(t - start, float(flags.get("-T", 0)))
+        positions[int(flags["-s"])] = (float(flags["-x"]) + float(flags.get("-U", 0)) * elapsed,
+                                       float(flags["-y"]) + float(flags.get("-V", 0)) * elapsed)
+    return positions
+
+
+def window_counts(events, t, window):
+    counts = {"link": Counter(), "flow": Counter(), "drop": Counter()}
+    for time, kind, key in events:
+        if t - window < time <= t:
+            counts[kind][key] += 1
+    return counts
+
+
+@pytest.mark.parametrize("nam", [False, True])
+def test_frames_match_a_full_parse(replay_traces, nam):
+    path = replay_traces[nam]
+    events = (nam_events if nam else tr_events)(path)
+    replay = TraceReplay(path, window=1.0)
+    rng = random.Random(3)
+    times = [rng.uniform(-1, DURATION + 1) for _ in range(20)]  # Seeks, also past either end
+    t = 5.0
+    while t < 12:  # Playback
+        times.append(t)
+        t += rng.uniform(0.01, 0.4)
+    times += [11.0, 3.5]  # Backwards
+    for t in times:
+        frame = replay.frame(t)
+        expected = window_counts(events, frame.time, 1.0)
+        assert frame.links == dict(expected["link"])
+        assert frame.flows == dict(expected["flow"])
+        assert frame.drops == dict(expected["drop"])
+        np.testing.assert_allclose(frame.positions, nam_positions(replay_traces[1], frame.time), atol=1e-6)
+    replay.close()
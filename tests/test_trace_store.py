@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import naive
+from trace_analyzer import TraceAnalyzer
+from trace_store import TraceStore, convert, flow_metrics, parse_numbers
+
+
+def test_columns_match_a_line_by_line_parse(agent_trace, tmp_path):
+    store = TraceStore(convert(agent_trace, str(tmp_path / "agent.trc"), chunk_size=4096))
+    lines = naive.trace_lines(agent_trace)
+    assert len(store) == len(lines)
+    assert store["time"].tolist() == [float(fields[1]) for fields in lines]
+    assert store["uid"].tolist() == [int(fields[5]) for fields in lines]
+    assert [store.strings["layer"][code] for code in store["layer"]] == [fields[3] for fields in lines]
+
+
+def test_flow_metrics_match_the_analyzer(agent_trace, tmp_path):
+    store = TraceStore(convert(agent_trace, str(tmp_path / "agent.trc")))
+    metrics = flow_metrics(store)
+    report = TraceAnalyzer().analyze_file(agent_trace)
+    assert set(metrics["flows"]) == set(report["flows"])
+    for name, flow in metrics["flows"].items():
+        expected = report["flows"][name]
+        assert (flow["sent"], flow["received"]) == (expected["sent"], expected["received"])
+        assert flow["avg_delay"] == pytest.approx(expected["avg_delay"])
+    assert metrics["routing_packets"] == report["total"]["routing_packets"]
+
+
+def test_agent_drops_alone_make_no_flow(tmp_path):
+    trace = tmp_path / "drops.tr"
+    trace.write_text(
+        "s 1.000000000 _0_ AGT  --- 1 cbr 512 [0 0 0 0] ------- [0:0 1:0 32 0] [0] 0 0\n"
+        "r 1.500000000 _1_ AGT  --- 1 cbr 512 [0 0 0 0] ------- [0:0 1:0 32 0] [0] 0 0\n"
+        "D 2.000000000 _4_ AGT  CBK 2 cbr 512 [0 0 0 0] ------- [4:0 1:0 32 0] [0] 0 0\n"
+    )
+    metrics = flow_metrics(TraceStore(convert(str(trace))))
+    assert list(metrics["flows"]) == ["0:0->1:0 cbr"]
+    assert metrics["flows"]["0:0->1:0 cbr"]["avg_delay"] == pytest.approx(0.5)
+
+
+def test_parse_numbers_rejects_garbage():
+    assert parse_numbers([b"1", b"", b"3"], np.int32).tolist() == [1, -1, 3]
+    with pytest.raises(ValueError):
+        parse_numbers([b"1", b"x"], np.float64)
@@ -0,0 +1,289 @@
+from collections import deque
+
+import numpy as np
+
+from spatial_grid import pairs_in_range
+
+LOCAL_SEARCH = 128  # Nodes searched from each node that linked to a cut-off part to find the others
+
+
+class TopologyDelta:
+    """Links that came up and links that broke in one topology update."""
+
+    __slots__ = ("added", "broken")
+
+    def __init__(self, added, broken):
+        self.added = added
+        self.broken = broken
+
+    def __bool__(self):
+        return bool(self.added or self.broken)
+
+
+class Topology:
+    """Unit-disk link layer that reports what changed instead of rebuilding.
+
+    ``update`` finds the links in range with a vectorized grid search, diffs
+    them as sorted int64 keys (``i * n + j`` for the node indices i < j)
+    against the previous ones and only touches the neighbor sets of nodes
+    whose links changed. Subscribers get the resulting TopologyDelta, so they
+    can do work proportional to the churn. Connected components are kept up
+    to date incrementally: new links merge the smaller component into the
+    larger one, and the two ends of every broken link search outwards until
+    they meet or one of them has found a part that got cut off, so a split
+    costs about the size of the smaller part.
+    """
+
+    def __init__(self, nodes, communication_range):
+        self.nodes = nodes
+        self.communication_range = communication_range
+        self.keys = np.zeros(0, np.int64)  # Sorted i * n + j of the links between nodes[i] and nodes[j], i < j
+        self.edge_cache = set()
+        self.subscribers = []
+        self.component = {}  # node -> component id
+        self.members = {}  # component id -> set of nodes
+        self.next_component = 0
+        self.churn = []  # (links added, links broken) per update
+        for node in nodes:
+            node.neighbors = set()
+            self.new_component({node})
+
+    def subscribe(self, callback):
+        """Call ``callback(delta)`` after every update that changed a link."""
+        self.subscribers.append(callback)
+
+    def new_component(self, members):
+        component = self.next_component
+        self.next_component += 1
+        self.members[component] = members
+        for node in members:
+            self.component[node] = component
+        return component
+
+    def update(self, positions=None):
+        """Re-detect links at the current node positions and return the TopologyDelta.
+
+        ``positions`` is an (n, 2) array of the node coordinates in the order
+        of ``nodes``; without it they are read from the nodes.
+        """
+        nodes = self.nodes
+        if positions is None:
+            positions = [(node.x, node.y) for node in nodes]
+        first, second = pairs_in_range(positions, self.communication_range)
+        keys = np.sort(first * len(nodes) + second)
+        added = np.setdiff1d(keys, self.keys, assume_unique=True)
+        broken = np.setdiff1d(self.keys, keys, assume_unique=True)
+        self.keys = keys
+
+        delta = TopologyDelta(self.edge_set(added), self.edge_set(broken))
+        self.churn.append((len(delta.added), len(delta.broken)))
+        if not delta:
+            return delta
+        self.edge_cache = None
+
+        for node_a, node_b in delta.broken:
+            node_a.neighbors.discard(node_b)
+            node_b.neighbors.discard(node_a)
+        for node_a, node_b in delta.added:
+            node_a.neighbors.add(node_b)
+            node_b.neighbors.add(node_a)
+            self.merge(node_a, node_b)
+        if delta.broken:
+            self.split_broken(delta.broken)
+
+        for callback in self.subscribers:
+            callback(delta)
+        return delta
+
+    @property
+    def edges(self):
+        """Undirected links as (node_a, node_b) with node_a.node_id < node_b.node_id.
+
+        The set is built from ``keys`` on first use after a change and never
+        changed afterwards, so snapshots can hold on to it.
+        """
+        if self.edge_cache is None:
+            self.edge_cache = self.edge_set(self.keys)
+        return self.edge_cache
+
+    def edge_count(self):
+        return len(self.keys)
+
+    def edge_set(self, keys):
+        """The links encoded as ``keys`` as a set of node pairs ordered by node_id."""
+        nodes = self.nodes
+        first, second = np.divmod(keys, len(nodes))
+        edges = set()
+        for a, b in zip(first.tolist(), second.tolist()):
+            node_a, node_b = nodes[a], nodes[b]
+            edges.add((node_a, node_b) if node_a.node_id < node_b.node_id else (node_b, node_a))
+        return edges
+
+    def split_broken(self, broken):
+        """Relabel the parts of components that the ``broken`` links cut off.
+
+        Every link's ends search until they meet or one runs out of nodes,
+        which makes what it found a component of its own. What is left of the
+        old component stays connected as long as the nodes that linked to a
+        cut-off part (or to parts cut off next to it) still reach each other,
+        which a short search around them normally shows; if it doesn't, the
+        rest is split from all of those nodes at once.
+        """
+        component = self.component
+        pieces = {}  # component cut off in this update -> nodes that linked to it
+        for node_a, node_b in broken:
+            if component[node_a] == component[node_b] and component[node_a] not in pieces:
+                piece = self.cut_off(node_a, node_b)
+                if piece is not None:
+                    pieces[piece] = set()
+            for node, other in ((node_a, node_b), (node_b, node_a)):
+                if component[node] in pieces and component[other] != component[node]:
+                    pieces[component[node]].add(other)
+        if not pieces:
+            return
+
+        # Parts cut off next to each other are one detour
+        parent = {piece: piece for piece in pieces}
+
+        def find(piece):
+            while parent[piece] != piece:
+                parent[piece] = parent[parent[piece]]
+                piece = parent[piece]
+            return piece
+
+        for piece, ends in pieces.items():
+            for end in ends:
+                if component[end] in pieces:
+                    parent[find(component[end])] = find(piece)
+        detours = {}  # (root piece, remaining component) -> nodes that linked to the pieces
+        for piece, ends in pieces.items():
+            for end in ends:
+                if component[end] not in pieces:
+                    detours.setdefault((find(piece), component[end]), set()).add(end)
+        unsure = {rest for (_, rest), ends in detours.items() if len(ends) > 1 and len(self.distinct_nearby(ends)) > 1}
+        for rest in unsure:
+            ends = set().union(*(ends for (_, other), ends in detours.items() if other == rest))
+            self.split(rest, self.distinct_nearby(ends))
+
+    def cut_off(self, node_a, node_b):
+        """Search from both nodes, a node at a time each, until the searches meet.
+
+        If one runs out of nodes first, what it found is no longer connected
+        to the other node: it becomes a new component, whose id is returned.
+        """
+        queues = (deque([node_a]), deque([node_b]))
+        seen = ({node_a}, {node_b})
+        while True:
+            for side in (0, 1):
+                queue, mine, other = queues[side], seen[side], seen[1 - side]
+                if not queue:
+                    self.members[self.component[node_a]] -= mine
+                    return self.new_component(mine)
+                for neighbor in queue.popleft().neighbors:
+                    if neighbor in other:
+                        return None
+                    if neighbor not in mine:
+                        mine.add(neighbor)
+                        queue.append(neighbor)
+
+    def distinct_nearby(self, ends, limit=LOCAL_SEARCH):
+        """One node of every group of ``ends`` that searches of at most ``limit`` nodes from each connect."""
+        parent = {end: end for end in ends}
+
+        def find(node):
+            while parent[node] is not node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for end in ends:
+            seen = {end}
+            queue = deque([end])
+            while queue and len(seen) < limit:
+                for neighbor in queue.popleft().neighbors:
+                    if neighbor in seen:
+                        continue
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+                    if neighbor in parent:
+                        parent[find(neighbor)] = find(end)
+        return {find(end) for end in ends}
+
+    def merge(self, node_a, node_b):
+        big, small = self.component[node_a], self.component[node_b]
+        if big == small:
+            return
+        if len(self.members[big]) < len(self.members[small]):
+            big, small = small, big
+        moved = self.members.pop(small)
+        for node in moved:
+            self.component[node] = big
+        self.members[big] |= moved
+
+    def split(self, component, ends):
+        """Relabel the parts of ``component`` that lost their connection after link breaks.
+
+        Every part that got cut off contains an end of a broken link, so one
+        search grows from each end, round-robin. Searches that meet are merged;
+        a search that runs out of nodes has found a whole part. Once a single
+        search is left, everything it has not reached yet belongs to it.
+        """
+        owner = {}  # node -> search id that reached it
+        parent = {}  # search id -> search it was merged into
+        regions = {}  # live search id -> (queue, nodes)
+        for end in ends:
+            owner[end] = end.node_id
+            parent[end.node_id] = end.node_id
+            regions[end.node_id] = (deque([end]), {end})
+
+        def find(search):
+            while parent[search] != search:
+                parent[search] = parent[parent[search]]
+                search = parent[search]
+            return search
+
+        while len(regions) > 1:
+            for search in list(regions):
+                if search not in regions:
+                    continue  # Merged into another search earlier in this round
+                queue, nodes = regions[search]
+                if not queue:
+                    del regions[search]
+                    self.members[component] -= nodes
+                    self.new_component(nodes)
+                    if len(regions) == 1:
+                        break
+                    continue
+                node = queue.popleft()
+                for neighbor in node.neighbors:
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = search
+                        nodes.add(neighbor)
+                        queue.append(neighbor)
+                        continue
+                    other = find(other)
+                    if other != search:
+                        # Two searches met: keep the bigger one going
+                        if len(regions[other][1]) > len(nodes):
+                            search, other = other, search
+                            queue, nodes = regions[search]
+                        other_queue, other_nodes = regions.pop(other)
+                        queue.extend(other_queue)
+                        nodes |= other_nodes
+                        parent[other] = search
+                if len(regions) == 1:
+                    break
+
+    def connected(self, node_a, node_b):
+        return self.component[node_a] == self.component[node_b]
+
+    def component_of(self, node):
+        """Set of nodes in the same connected component as ``node``."""
+        return self.members[self.component[node]]
+
+    def component_count(self):
+        return len(self.members)
+
+    def largest_component(self):
+        return max(len(members) for members in self.members.values()) if self.members else 0
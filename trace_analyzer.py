@@ -0,0 +1,645 @@
+"""Streaming analyzer for NS2 wireless (old format) trace files.
+
+Replaces performance.awk: matches every agent-level send with its receive by
+packet UID to get true end-to-end delay, splits the metrics per flow and per
+time window, and counts routing control traffic. The trace is scanned in
+chunks through mmap (or a plain stream such as a pipe), so memory stays
+bounded by the number of packets in flight, not by the size of the trace.
+Lines are sorted out with numpy by their event byte and AGT/RTR layer field,
+so the bulk of a trace (MAC and forwarding events) is skipped without a regex.
+Reading from a pipe, ``--live`` prints every window as soon as it is final
+and ``--abort-pdr`` gives up on a run whose delivery ratio stays hopeless.
+
+    python trace_analyzer.py AODV_10.tr --window 5 --windows-csv windows.csv
+    ns sim.tcl 50 AODV 0 1 2 3 1 -trace /tmp/trace.fifo &
+    python trace_analyzer.py /tmp/trace.fifo --live --abort-pdr 5
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import re
+import sys
+from collections import defaultdict, deque
+
+import numpy as np
+
+CHUNK_SIZE = 16 * 1024 * 1024
+BATCH_SIZE = 4 * 1024 * 1024
+
+ROUTING_TYPES = (b"AODV", b"AOMDV", b"DSDV", b"OLSR", b"DSR", b"message")
+
+# Fields of an old-format line, split on single spaces:
+#   s 10.000000000 _0_ AGT  --- 0 tcp 40 [0 0 0 0] ------- [0:0 1:0 32 0] [0 0] 0 0
+# The reason is printed as %4s, so "---" leaves an empty field after the layer
+# that a reason like NRTE doesn't; fields past the layer are counted without it.
+TIME, LAYER, REASON, UID, PTYPE, SIZE, IP_SOURCE, IP_DESTINATION = 1, 3, 4, 5, 6, 7, 13, 14
+
+PADDING = 64  # Bytes around a batch, more than any fixed-width read around a field
+MAX_DIGITS = 16  # Longest number read, two words' worth
+MAX_KEY = 32  # Bytes of a packet type or address field that tell flows apart
+
+# D 12.300000000 _5_ RTR  NRTE 123 tcp 1060 ...
+DROP_EVENT = re.compile(rb"[Dd] \S+ _\d+_ (\w+)\s+(\S+) \d+ (\S+) ")
+
+# Sends waiting for their receive, sorted by uid
+IN_FLIGHT = np.dtype([("uid", np.int64), ("time", np.float64), ("flow", np.int64)])
+
+# Masks keeping the first n bytes of a little-endian word
+KEEP = np.array([(1 << 8 * n) - 1 for n in range(9)], "<u8")
+
+
+class TraceLines:
+    """Field offsets of the complete lines in ``buffer[pos:endpos]``.
+
+    Lines are picked by their event byte and layer field, and only the fields
+    the metrics use are parsed, a whole column at a time, so the many lines
+    that don't matter never cost a regex match or a Python loop iteration.
+
+    All offsets index ``chars``, a copy of the batch laid out as::
+
+        PADDING x "~" | the lines | IP_DESTINATION + 2 spaces | PADDING x "~"
+
+    * Every byte up to and including the space separates fields, and
+      ``separators`` lists their offsets in order. Line ``r`` ends at the
+      newline ``ends[r]``, and the separator after its field ``k`` is
+      ``separators[line_first[r] + k]`` (counting the event as field 0), for
+      fields up to the layer; ``space`` adds one for the empty field that a
+      "---" reason leaves after the layer.
+    * A line with fewer fields than asked for borrows separators from the
+      next line, so whoever reads its last field checks that it ends before
+      ``ends``. The spaces after the last line give it empty fields instead
+      of running off the array.
+    * ``words[i]`` holds ``chars[i:i + 8]`` as a little-endian integer, so a
+      short field is read with one gather per 8 bytes. Keys are read forward
+      from a field start (up to MAX_KEY + 8 bytes) and numbers backward from
+      a field end (MAX_DIGITS bytes); the padding keeps both in the array.
+    """
+
+    def __init__(self, buffer, pos, endpos):
+        size = endpos - pos
+        self.chars = chars = np.full(PADDING + size + IP_DESTINATION + 2 + PADDING, ord("~"), np.uint8)
+        chars[PADDING:PADDING + size] = np.frombuffer(buffer, np.uint8, size, pos)
+        chars[PADDING + size:-PADDING] = ord(" ")
+        self.offset = pos - PADDING  # Position in ``buffer`` of chars[0]
+        self.words = np.ndarray((len(chars) - 7,), "<u8", chars, 0, (1,))
+        self.separators = np.flatnonzero(chars <= ord(" "))
+        newlines = np.flatnonzero(chars[self.separators] == ord("\n"))
+        self.ends = self.separators[newlines]
+        self.starts = np.concatenate(([PADDING], self.ends[:-1] + 1))[:len(newlines)]
+        self.line_first = np.concatenate(([0], newlines[:-1] + 1))[:len(newlines)]  # Each line's first separator
+        self.events = chars[self.starts]
+        self.rows = None
+        # The layer field with the space after it, so e.g. "AGT" doesn't also match "AGTX" or a last field
+        before = self.separators[self.line_first + LAYER - 1]
+        self.layers = self.words[before + 1] & KEEP[4] * (before < self.ends)
+
+    def select(self, events, layer=None):
+        """Indices of the lines with an event in ``events`` and, if given, ``layer`` (e.g. b"AGT") as their layer."""
+        matches = self.events == events[0]
+        for event in events[1:]:
+            matches |= self.events == event
+        if layer is not None:
+            matches &= self.layers == int.from_bytes(layer + b" ", "little")
+        return np.flatnonzero(matches)
+
+    def field(self, rows, index):
+        """Start and end offsets of field ``index`` in each of ``rows``.
+
+        Fields past the last one of a line run into the next line, so callers
+        check the end of the last field they use against ``ends``.
+        """
+        return self.space(rows, index - 1, index > LAYER) + 1, self.space(rows, index, index > LAYER)
+
+    def space(self, rows, index, past_layer):
+        """Offsets of the space after field ``index`` in each of ``rows``."""
+        if rows is not self.rows:
+            # Neighbouring fields share their spaces, so each is looked up once per set of rows
+            self.rows, self.row_spaces = rows, {}
+            self.first, self.shifted = self.line_first[rows], None
+        spaces = self.row_spaces
+        if (index, past_layer) not in spaces:
+            if past_layer and self.shifted is None:
+                self.shifted = self.first + (self.space(rows, LAYER + 1, False) == self.space(rows, LAYER, False) + 1)
+            spaces[index, past_layer] = self.separators[(self.shifted if past_layer else self.first) + index]
+        return spaces[index, past_layer]
+
+    def numbers(self, rows, index):
+        """Field ``index`` of ``rows`` as floats, and which rows held a plain decimal number there."""
+        return parse_decimals(self.words, *self.field(rows, index))
+
+    def line(self, row):
+        return self.offset + self.starts[row], self.offset + self.ends[row]
+
+
+def read_words(words, start, end, count):
+    """The bytes from ``start`` to ``end`` (at most 8 * ``count``) as ``count`` zero-padded words per row."""
+    length = end - start
+    return np.stack([words[start + 8 * word] & KEEP[np.clip(length - 8 * word, 0, 8)] for word in range(count)], 1)
+
+
+def parse_decimals(words, start, end):
+    """The unsigned decimal numbers between ``start`` and ``end``, and a mask of the fields that were one.
+
+    The fields are read right-aligned into a block with a column per field,
+    so row ``k`` from the bottom holds the digit worth 10**k of an integer.
+    A field with its point in row ``p`` is the integer of its other digits
+    (rows above the point worth one power less) divided by 10**p. Both are
+    exact in a float for up to 15 digits, so the quotient is rounded just
+    like float() rounds the text. Fields that share the row of their point
+    take one matrix product; NS2 prints all times with the same number of
+    decimals, so that is one or two products per column.
+    """
+    length = end - start
+    valid = (length > 0) & (length <= MAX_DIGITS)
+    width = min(int(length.max(initial=1)), MAX_DIGITS)
+    count = -(-width // 8)
+    block = np.stack([words[end - 8 * (count - word)] for word in range(count)], 1)
+    block = block.view(np.uint8).reshape(len(start), 8 * count).T[8 * count - width:].copy()
+    powers = np.arange(width)[::-1]
+    inside = powers[:, None] < length
+    point = inside & (block == ord("."))
+    digits = (block - np.uint8(ord("0"))) * (inside & ~point)
+    has_point = point.any(0)
+    valid &= (digits < 10).all(0) & (point.sum(0) <= 1)
+
+    values = np.zeros(len(start))
+    rest = np.ones(len(start), bool)
+    while rest.any():
+        # The fields with their point in the same row as the first unparsed one, or with none like it
+        column = point[:, rest.argmax()]
+        if column.any():
+            power = powers[column.argmax()]
+            rows = rest & point[column.argmax()]
+            weights, scale = 10.0 ** (powers - (powers > power)), 10.0 ** power
+        else:
+            rows = rest & ~has_point
+            weights, scale = 10.0 ** powers, 1.0
+        values[rows] = weights @ (digits if rows.all() else digits[:, rows]) / scale
+        rest &= ~rows
+    return values, valid
+
+
+def group_rows(words, spans):
+    """Group rows by their byte strings over ``spans``, a list of (start, end) arrays into ``words``.
+
+    Returns the first row of every group and the group of every row. Only
+    the first MAX_KEY bytes of a string tell it apart.
+    """
+    keys = []
+    for start, end in spans:
+        end = np.minimum(end, start + MAX_KEY)
+        keys.append(read_words(words, start, end, max(-(-int((end - start).max(initial=1)) // 8), 1)))
+    keys = np.hstack(keys)
+    # Rows of several words compare as single byte strings
+    keys = keys.ravel() if keys.shape[1] == 1 else keys.view(np.dtype((np.void, 8 * keys.shape[1]))).ravel()
+    _, first, groups = np.unique(keys, return_index=True, return_inverse=True)
+    return first, groups.ravel()
+
+
+class HopelessScenario(Exception):
+    """Raised from a window callback to stop analyzing a run early."""
+
+    def __init__(self, reason, time):
+        super().__init__(reason)
+        self.time = time
+
+
+class FlowStats:
+    __slots__ = ("sent", "received", "bytes_received", "delay_sum", "max_delay", "first_send", "last_receive")
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.bytes_received = 0
+        self.delay_sum = 0.0
+        self.max_delay = 0.0
+        self.first_send = None
+        self.last_receive = None
+
+    def summary(self, duration=None):
+        if duration is None:
+            start = self.first_send or 0.0
+            duration = (self.last_receive or start) - start
+        return {
+            "sent": self.sent,
+            "received": self.received,
+            "lost": max(self.sent - self.received, 0),
+            "throughput_kbps": self.bytes_received * 8 / duration / 1000 if duration > 0 else 0.0,
+            "pdr": self.received / self.sent * 100 if self.sent else 0.0,
+            "loss": max(self.sent - self.received, 0) / self.sent * 100 if self.sent else 0.0,
+            "avg_delay": self.delay_sum / self.received if self.received else 0.0,
+            "max_delay": self.max_delay,
+        }
+
+
+class TraceAnalyzer:
+    """Incremental per-flow and windowed metrics over NS2 trace events.
+
+    Feed it complete lines with ``feed``; every time window of ``window``
+    seconds that can no longer change is handed to ``on_window`` as a list of
+    row dicts. Sends that have not been received after ``max_delay`` seconds
+    are forgotten and count as lost.
+    """
+
+    def __init__(self, window=1.0, max_delay=30.0, on_window=None):
+        self.window = window
+        self.max_delay = max_delay
+        self.on_window = on_window
+        self.flows = defaultdict(FlowStats)  # "src:port->dst:port type" -> totals
+        self.windows = defaultdict(lambda: defaultdict(FlowStats))  # window index -> flow -> stats
+        self.window_routing = defaultdict(int)  # window index -> routing packets
+        self.in_flight = np.zeros(0, IN_FLIGHT)
+        self.flow_ids = {}  # (packet type, raw header fields) -> index into flow_names
+        self.flow_names = []
+        self.routing_packets = 0
+        self.routing_bytes = 0
+        self.drops = defaultdict(int)  # (layer, reason) -> data packets dropped
+        self.last_time = 0.0
+
+    def feed(self, buffer, pos=0, endpos=None):
+        """Process the complete trace lines in ``buffer[pos:endpos]``."""
+        endpos = len(buffer) if endpos is None else endpos
+        while pos < endpos:
+            # Batches small enough for their row arrays to stay in the CPU cache
+            end = buffer.rfind(b"\n", pos, pos + BATCH_SIZE) + 1 if pos + BATCH_SIZE < endpos else endpos
+            end = end or endpos
+            self.scan(buffer, pos, end)
+            pos = end
+
+        last_time = self.last_time
+        self.expire(last_time - self.max_delay)
+        # A window is final once the trace has moved a full window past it
+        self.flush_windows(int(last_time // self.window) - 1)
+
+    def scan(self, buffer, pos, endpos):
+        lines = TraceLines(buffer, pos, endpos)
+        self.scan_agent(lines)
+        self.scan_routing(lines)
+        self.scan_drops(lines, buffer)
+
+    def scan_agent(self, lines):
+        rows = lines.select(b"sr", b"AGT")
+        times, valid = lines.numbers(rows, TIME)
+        uids, valid_uids = lines.numbers(rows, UID)
+        sizes = lines.field(rows, SIZE)
+        ptypes = lines.field(rows, PTYPE)
+        headers = lines.field(rows, IP_SOURCE)[0], lines.field(rows, IP_DESTINATION)[1]
+        valid &= valid_uids & (lines.chars[headers[0]] == ord("[")) & (headers[1] < lines.ends[rows])
+        if not valid.any():
+            return
+        self.last_time = max(self.last_time, float(times[valid].max()))
+        uids = uids.astype(np.int64)
+        sends = valid & (lines.events[rows] == ord("s"))
+        receives = valid & ~sends
+        if sends.any():
+            keys = [(start[sends], end[sends]) for start, end in (ptypes, headers)]
+            self.add_sends(lines, times[sends], uids[sends], keys)
+        if receives.any() and len(self.in_flight):
+            # Only received sizes count, so only those are parsed
+            sizes, valid_sizes = parse_decimals(lines.words, sizes[0][receives], sizes[1][receives])
+            self.match_receives(times[receives][valid_sizes], uids[receives][valid_sizes], sizes[valid_sizes])
+
+    def add_sends(self, lines, times, uids, keys):
+        """Start tracking sends, whose packet type and IP header span ``keys`` in ``lines``."""
+        chars = lines.chars
+        first, groups = group_rows(lines.words, keys)
+        ptypes, headers = keys
+        flows = []
+        for row in first.tolist():
+            ptype = chars[ptypes[0][row]:ptypes[1][row]].tobytes()
+            header = chars[headers[0][row]:headers[1][row]].tobytes()
+            flow = self.flow_ids.get((ptype, header))
+            if flow is None:
+                src, dst = header[1:].decode().split()
+                flow = self.flow_ids[(ptype, header)] = len(self.flow_names)
+                self.flow_names.append(f"{src}->{dst} {ptype.decode()}")
+            flows.append(flow)
+        sent = np.zeros(len(times), IN_FLIGHT)
+        sent["uid"], sent["time"], sent["flow"] = uids, times, np.array(flows)[groups]
+        self.count_sends(sent)
+        in_flight = np.concatenate((self.in_flight, sent))
+        if (in_flight["uid"][1:] < in_flight["uid"][:-1]).any():
+            in_flight = in_flight[np.argsort(in_flight["uid"], kind="stable")]
+        self.in_flight = in_flight
+
+    def match_receives(self, times, uids, sizes):
+        """Pair receives with the latest send of their uid, once.
+
+        Duplicates, expired sends and receives more than ``max_delay`` after
+        their send don't count, whichever chunk the send was in.
+        """
+        in_flight = self.in_flight
+        match = np.searchsorted(in_flight["uid"], uids, side="right") - 1
+        found = np.flatnonzero((match >= 0) & (in_flight["uid"][match] == uids))
+        if np.bincount(match[found], minlength=len(in_flight)).max(initial=0) > 1:
+            _, once = np.unique(match[found], return_index=True)
+            found = found[np.sort(once)]
+        match = match[found]
+        keep = np.ones(len(in_flight), bool)
+        keep[match] = False
+        self.in_flight = in_flight[keep]
+        received = in_flight[match]
+        received["time"] = times[found] - received["time"]
+        on_time = received["time"] <= self.max_delay
+        self.count_receives(times[found][on_time], received[on_time], sizes[found][on_time])
+
+    def count_sends(self, sent):
+        names = self.flow_names
+        cells, counts = np.unique((sent["time"] // self.window).astype(np.int64) * len(names) + sent["flow"],
+                                  return_counts=True)
+        for cell, count in zip(cells.tolist(), counts.tolist()):
+            index, flow = divmod(cell, len(names))
+            self.windows[index][names[flow]].sent += count
+            self.flows[names[flow]].sent += count
+        flows, first = np.unique(sent["flow"], return_index=True)
+        for flow, time in zip(flows.tolist(), sent["time"][first].tolist()):
+            stats = self.flows[names[flow]]
+            if stats.first_send is None:
+                stats.first_send = time
+
+    def count_receives(self, times, received, sizes):
+        """Add receives at ``times`` of the IN_FLIGHT ``received``, whose times hold the delays."""
+        names = self.flow_names
+        cells, groups = np.unique((times // self.window).astype(np.int64) * len(names) + received["flow"],
+                                  return_inverse=True)
+        counts = np.bincount(groups)
+        sizes = np.bincount(groups, sizes)
+        delays = np.bincount(groups, received["time"])
+        max_delays = np.zeros(len(cells))
+        np.maximum.at(max_delays, groups, received["time"])
+        for cell, count, size, delay, max_delay in zip(cells.tolist(), counts.tolist(), sizes.tolist(),
+                                                       delays.tolist(), max_delays.tolist()):
+            index, flow = divmod(cell, len(names))
+            for entry in (self.flows[names[flow]], self.windows[index][names[flow]]):
+                entry.received += count
+                entry.bytes_received += int(size)
+                entry.delay_sum += delay
+                if max_delay > entry.max_delay:
+                    entry.max_delay = max_delay
+        flows, last = np.unique(received["flow"][::-1], return_index=True)
+        for flow, time in zip(flows.tolist(), times[::-1][last].tolist()):
+            self.flows[names[flow]].last_receive = time
+
+    def scan_routing(self, lines):
+        rows = lines.select(b"sf", b"RTR")
+        times, valid = lines.numbers(rows, TIME)
+        ptypes = lines.field(rows, PTYPE)
+        start, end = lines.field(rows, SIZE)
+        sizes, valid_sizes = parse_decimals(lines.words, start, end)
+        valid &= valid_sizes & (end < lines.ends[rows])
+        if not valid.any():
+            return
+        first, groups = group_rows(lines.words, [ptypes])
+        routing = np.array([lines.chars[ptypes[0][row]:ptypes[1][row]].tobytes() in ROUTING_TYPES
+                            for row in first.tolist()])[groups] & valid
+        self.routing_packets += int(routing.sum())
+        self.routing_bytes += int(sizes[routing].sum())
+        windows, counts = np.unique((times[routing] // self.window).astype(np.int64), return_counts=True)
+        for index, count in zip(windows.tolist(), counts.tolist()):
+            self.window_routing[index] += count
+
+    def scan_drops(self, lines, buffer):
+        rows = lines.select(b"Dd")
+        if not len(rows):
+            return
+        # Drops of a kind look alike up to the packet type, so one line of each kind is parsed
+        first, groups = group_rows(lines.words, [(lines.field(rows, LAYER)[0], lines.field(rows, REASON)[1]),
+                                                 lines.field(rows, PTYPE)])
+        for row, count in zip(first.tolist(), np.bincount(groups).tolist()):
+            match = DROP_EVENT.match(buffer, *lines.line(rows[row]))
+            if match and match[3] not in ROUTING_TYPES:
+                self.drops[(match[1].decode(), match[2].decode())] += count
+
+    def expire(self, cutoff):
+        in_flight = self.in_flight
+        if len(in_flight) and in_flight["time"].min() < cutoff:
+            self.in_flight = in_flight[in_flight["time"] >= cutoff]
+
+    def flush_windows(self, before):
+        """Emit and forget every window whose index is below ``before``."""
+        done = sorted(index for index in set(self.windows) | set(self.window_routing) if index < before)
+        for index in done:
+            flows = self.windows.pop(index, {})
+            routing = self.window_routing.pop(index, 0)
+            if self.on_window is None:
+                continue
+            rows = []
+            for flow, stats in sorted(flows.items()):
+                row = {"window_start": index * self.window, "flow": flow, "routing_packets": routing}
+                row.update(stats.summary(self.window))
+                rows.append(row)
+            if not rows:
+                rows.append({"window_start": index * self.window, "flow": None, "routing_packets": routing})
+            self.on_window(rows)
+
+    def analyze_stream(self, stream, chunk_size=CHUNK_SIZE):
+        """Analyze a binary stream (e.g. a pipe) chunk by chunk."""
+        # read1 returns what a pipe has buffered instead of waiting for a full chunk, so windows stay live
+        read = getattr(stream, "read1", stream.read)
+        remainder = b""
+        while True:
+            block = read(chunk_size)
+            if not block:
+                break
+            block = remainder + block
+            cut = block.rfind(b"\n") + 1
+            remainder = block[cut:]
+            self.feed(block, 0, cut)
+        if remainder:
+            self.feed(remainder + b"\n")
+        return self.finish()
+
+    def analyze_file(self, path, chunk_size=CHUNK_SIZE):
+        """Analyze a trace file through mmap, ``chunk_size`` bytes at a time."""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0 or not os.path.isfile(path):
+                return self.analyze_stream(f, chunk_size)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                pos = 0
+                while pos < size:
+                    end = min(pos + chunk_size, size)
+                    if end < size:
+                        end = mm.rfind(b"\n", pos, end) + 1 or size
+                    self.feed(mm, pos, end)
+                    pos = end
+        return self.finish()
+
+    def finish(self):
+        self.flush_windows(float("inf"))
+        return self.report()
+
+    def report(self):
+        return build_report(self.flows, self.routing_packets, self.routing_bytes, self.drops)
+
+
+def build_report(flows, routing_packets, routing_bytes, drops):
+    """Totals, per-flow summaries and drop counts from {flow: FlowStats} and {(layer, reason): count}."""
+    data = [stats for flow, stats in flows.items() if not flow.endswith(" ack")]
+    total = FlowStats()
+    for stats in data:
+        total.sent += stats.sent
+        total.received += stats.received
+        total.bytes_received += stats.bytes_received
+        total.delay_sum += stats.delay_sum
+        total.max_delay = max(total.max_delay, stats.max_delay)
+        if stats.first_send is not None and (total.first_send is None or stats.first_send < total.first_send):
+            total.first_send = stats.first_send
+        if stats.last_receive is not None and (total.last_receive is None or stats.last_receive > total.last_receive):
+            total.last_receive = stats.last_receive
+    summary = total.summary()
+    transmitted = routing_packets + total.sent
+    summary["routing_packets"] = routing_packets
+    summary["routing_bytes"] = routing_bytes
+    summary["overhead"] = routing_packets / transmitted * 100 if transmitted else 0.0
+    summary["normalized_routing_load"] = routing_packets / total.received if total.received else 0.0
+    return {
+        "total": summary,
+        "flows": {flow: stats.summary() for flow, stats in sorted(flows.items())},
+        "drops": {f"{layer} {reason}": count for (layer, reason), count in sorted(drops.items())},
+    }
+
+
+def window_totals(rows):
+    """Sum the data flows (not TCP acks) of one window's rows into a single row."""
+    data = [row for row in rows if row["flow"] and not row["flow"].endswith(" ack")]
+    sent = sum(row["sent"] for row in data)
+    received = sum(row["received"] for row in data)
+    delay_sum = sum(row["avg_delay"] * row["received"] for row in data)
+    return {
+        "window_start": rows[0]["window_start"],
+        "sent": sent,
+        "received": received,
+        "throughput_kbps": sum(row["throughput_kbps"] for row in data),
+        "pdr": received / sent * 100 if sent else 0.0,
+        "avg_delay": delay_sum / received if received else 0.0,
+        "routing_packets": rows[0]["routing_packets"],
+    }
+
+
+def print_window(rows):
+    total = window_totals(rows)
+    print(f"[{total['window_start']:8.1f}s] throughput {total['throughput_kbps']:8.2f} kbps  "
+          f"PDR {total['pdr']:6.2f}%  delay {total['avg_delay']:.4f}s  routing {total['routing_packets']}",
+          flush=True)
+
+
+class EarlyAbort:
+    """Window callback that raises HopelessScenario once a run cannot recover.
+
+    From ``after`` seconds of simulated time on, a run whose PDR over the
+    last ``windows`` windows is below ``min_pdr`` percent is given up on.
+    Windows in which nothing was sent (e.g. TCP backing off) do not count
+    either way. Every window is passed on to ``on_window`` first.
+    """
+
+    def __init__(self, min_pdr, after=30.0, windows=10, on_window=None):
+        self.min_pdr = min_pdr
+        self.after = after
+        self.on_window = on_window
+        self.recent = deque(maxlen=windows)
+
+    def __call__(self, rows):
+        if self.on_window is not None:
+            self.on_window(rows)
+        total = window_totals(rows)
+        self.recent.append((total["sent"], total["received"]))
+        sent = sum(sent for sent, _ in self.recent)
+        if total["window_start"] < self.after or not sent:
+            return
+        pdr = sum(received for _, received in self.recent) / sent * 100
+        if pdr < self.min_pdr:
+            raise HopelessScenario(f"PDR {pdr:.2f}% over the last {len(self.recent)} windows "
+                                   f"is below {self.min_pdr:g}%", total["window_start"])
+
+
+def write_performance(report, path):
+    """Write the totals in the performance.txt format graph.py reads."""
+    total = report["total"]
+    with open(path, "w") as f:
+        f.write(f"Throughput (kbps): {total['throughput_kbps']:.2f}\n")
+        f.write(f"PDR (%): {total['pdr']:.2f}\n")
+        f.write(f"Average Delay (s): {total['avg_delay']:.2f}\n")
+        f.write(f"Packet Loss (%): {total['loss']:.2f}\n")
+        f.write(f"Overhead (%): {total['overhead']:.2f}\n")
+
+
+WINDOW_FIELDS = ["window_start", "flow", "sent", "received", "lost", "throughput_kbps", "pdr", "loss",
+                 "avg_delay", "max_delay", "routing_packets"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-flow and windowed metrics for an NS2 trace.")
+    parser.add_argument("trace", help="trace file or FIFO, or - to read from stdin")
+    parser.add_argument("--window", type=float, default=1.0, help="window length in seconds")
+    parser.add_argument("--max-delay", type=float, default=30.0,
+                        help="seconds after which an undelivered packet counts as lost")
+    parser.add_argument("--performance", default="performance.txt",
+                        help="where to write the totals for graph.py (empty to skip)")
+    parser.add_argument("--json", help="write the full report as JSON to this file")
+    parser.add_argument("--windows-csv", help="write the per-window rows to this CSV file")
+    parser.add_argument("--live", action="store_true", help="print the totals of every window as soon as it is final")
+    parser.add_argument("--abort-pdr", type=float,
+                        help="stop (exit status 3) once the PDR stays below this many percent")
+    parser.add_argument("--abort-after", type=float, default=30.0,
+                        help="simulated seconds before --abort-pdr is checked")
+    parser.add_argument("--abort-windows", type=int, default=10, help="windows the --abort-pdr PDR is taken over")
+    args = parser.parse_args(argv)
+
+    sinks = []
+    windows_file = open(args.windows_csv, "w", newline="") if args.windows_csv else None
+    if windows_file:
+        writer = csv.DictWriter(windows_file, fieldnames=WINDOW_FIELDS, restval="")
+        writer.writeheader()
+        sinks.append(writer.writerows)
+        if args.live:
+            sinks.append(lambda rows: windows_file.flush())  # Readable while the run goes on
+    if args.live:
+        sinks.append(print_window)
+
+    def on_window(rows):
+        for sink in sinks:
+            sink(rows)
+
+    if args.abort_pdr is not None:
+        on_window = EarlyAbort(args.abort_pdr, args.abort_after, args.abort_windows, on_window)
+    analyzer = TraceAnalyzer(window=args.window, max_delay=args.max_delay,
+                             on_window=on_window if sinks or args.abort_pdr is not None else None)
+    aborted = None
+    try:
+        if args.trace == "-":
+            report = analyzer.analyze_stream(sys.stdin.buffer)
+        else:
+            report = analyzer.analyze_file(args.trace)
+    except HopelessScenario as abort:
+        aborted = abort
+        report = analyzer.report()
+        report["aborted"] = {"time": abort.time, "reason": str(abort)}
+    if windows_file:
+        windows_file.close()
+
+    if args.performance:
+        write_performance(report, args.performance)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    total = report["total"]
+    print(f"Throughput (kbps): {total['throughput_kbps']:.2f}")
+    print(f"PDR (%): {total['pdr']:.2f}")
+    print(f"Average Delay (s): {total['avg_delay']:.4f}")
+    print(f"Packet Loss (%): {total['loss']:.2f}")
+    print(f"Overhead (%): {total['overhead']:.2f}")
+    for flow, stats in report["flows"].items():
+        print(f"  {flow}: sent {stats['sent']}, received {stats['received']}, "
+              f"PDR {stats['pdr']:.2f}%, delay {stats['avg_delay']:.4f}s")
+    if aborted:
+        print(f"Aborted at {aborted.time:g}s: {aborted}")
+        sys.exit(3)
+
+
+if __name__ == "__main__":
+    main()
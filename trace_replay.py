@@ -0,0 +1,574 @@
+"""Seekable replay of NS2 .tr and .nam files on the Tk network canvas.
+
+The first time a trace is opened, one streaming pass writes a sidecar index
+next to it (``<trace>.idx``): the simulated time of a line every
+SAMPLE_BYTES, plus every node movement (``M`` lines of a .tr, ``n`` lines of
+a .nam). The index is tiny next to the trace and memory-mapped when loaded.
+Seeking to a time is a binary search over the samples followed by a scan of
+at most one sample's worth of lines, and node positions come from the
+nearest keyframe of the movement arrays plus the few moves after it, so
+scrubbing through a multi-GB run never reads more than the window on
+screen. While playing forward only the lines added since the last frame
+are parsed, and CanvasRenderer redraws only what changed.
+
+A .tr does not record where nodes start, so positions are taken from the
+.nam written next to it by sim.tcl when there is one (or from ``--movement``).
+
+    python trace_replay.py view AODV_50.tr             # uses AODV_50.nam for positions
+    python trace_replay.py index big.tr                # build the index ahead of time
+    python trace_replay.py frame AODV_50.tr --time 42.5
+"""
+
+import argparse
+import json
+import os
+import re
+import struct
+from collections import Counter, deque
+
+import numpy as np
+
+from engine import Node
+from renderer import CanvasRenderer
+from trace_analyzer import CHUNK_SIZE, ROUTING_TYPES
+from trace_store import align
+
+MAGIC = b"MANETIDX"
+VERSION = 2
+SAMPLE_BYTES = 64 * 1024  # Bytes between two time samples; bounds the scan after a binary search
+MAX_WINDOW_BYTES = 32 * 1024 * 1024  # Parsed per frame at most; older events in a huge window are left out
+KEYFRAME_MOVES = 4096  # Moves between two position keyframes (at least one per node)
+
+# Name -> (dtype, columns per row; None for one per node)
+ARRAYS = [
+    ("sample_time", np.float64, 1),  # Time of the first timed line at or after each sample point
+    ("sample_offset", np.int64, 1),  # Byte offset of that line
+    ("move_time", np.float64, 1),  # Node movements in trace order: from move_time on, node
+    ("move_node", np.int32, 1),  # move_node is at move_position + move_velocity * elapsed,
+    ("move_position", np.float64, 2),  # until move_until
+    ("move_velocity", np.float64, 2),
+    ("move_until", np.float64, 1),
+    ("keyframe_last", np.int32, None),  # Row k: each node's last move among the first (k + 1) * keyframe_moves, or -1
+]
+
+# Timestamp of any event line: "s 10.000000000 _0_ ..." (.tr) or "+ -t 10.000000000 -s 0 ..." (.nam)
+LINE_TIME = re.compile(rb"\n\S+ (?:-t )?([\d.]+)")
+# M 10.00000 0 (83.36, 239.43, 0.00), (412.00, 97.00), 12.00
+TR_MOVE = re.compile(
+    rb"\nM ([\d.]+) (\d+) \((-?[\d.]+), (-?[\d.]+), -?[\d.]+\), \((-?[\d.]+), (-?[\d.]+)\), ([\d.]+)"
+)
+# n -t * -s 0 -x 83.36 -y 239.43 -Z 0 -z 30 ...    n -t 15.0 -s 0 -x 83.36 -y 239.43 -U 2.5 -V 1.2 -T 40.0
+NAM_MOVE = re.compile(
+    rb"\nn -t (\S+) -s (\d+) -x (-?[\d.]+) -y (-?[\d.]+)(?:.*? -U (\S+) -V (\S+) -T (\S+))?"
+)
+NAM_AREA = re.compile(rb"\nW -t \* -x (\S+) -y (\S+)")
+# r 10.003000000 _7_ RTR  --- 1 tcp 1060 [13a 7 0 800] ------- [0:0 1:0 32 0] ...
+TR_EVENT = re.compile(
+    rb"\n([srDd]) ([\d.]+) _(\d+)_ (\w+)\s+(\S+) \d+ (\S+) \d+ \[[0-9a-f]+ [0-9a-f]+ ([0-9a-f]+)[^\]\n]*\]"
+    rb"(?: \S+ \[(-?\d+):-?\d+ (-?\d+):-?\d+)?"
+)
+# h -t 10.003 -s 0 -d 7 -p tcp ...    d -t 12.5 -s 3 -d -1 -p tcp ...
+NAM_EVENT = re.compile(rb"\n([hd]) -t ([\d.]+) -s (\d+) -d (-?\d+) -p (\S+)")
+
+
+def index_path(path):
+    return path + ".idx"
+
+
+def is_nam(path):
+    return path.endswith(".nam")
+
+
+def build_index(path, output=None, chunk_size=CHUNK_SIZE, sample_bytes=SAMPLE_BYTES):
+    """Scan a .tr or .nam once and write its sidecar index; returns the index path."""
+    output = output or index_path(path)
+    nam = is_nam(path)
+    samples = []  # (time, offset)
+    moves = []  # (time, node, x, y, vx, vy, until)
+    area = None
+    last_time = 0.0
+    next_sample = 0
+    base = 0  # File offset of the current chunk
+    with open(path, "rb") as f:
+        remainder = b""
+        while True:
+            block = f.read(chunk_size)
+            data = remainder + block
+            cut = len(data) if not block else data.rfind(b"\n") + 1
+            remainder = data[cut:]
+            if cut:
+                # A leading newline lets every regex anchor on line starts, and a position in
+                # the buffer is then exactly the chunk offset of the line after that newline
+                buffer = b"\n" + data[:cut]
+                while next_sample < base + cut:
+                    match = LINE_TIME.search(buffer, max(next_sample - base, 0))
+                    if match is None:
+                        break
+                    samples.append((float(match.group(1)), base + match.start()))
+                    next_sample = max(next_sample + sample_bytes, base + match.start() + 1)
+                tail = LINE_TIME.search(buffer, buffer.rfind(b"\n", 0, len(buffer) - 1))
+                if tail is not None:
+                    last_time = float(tail.group(1))
+                if nam:
+                    if area is None:
+                        match = NAM_AREA.search(buffer)
+                        area = match and (float(match.group(1)), float(match.group(2)))
+                    for time, node, x, y, vx, vy, duration in NAM_MOVE.findall(buffer):
+                        start = 0.0 if time == b"*" else float(time)
+                        if vx:
+                            moves.append((start, int(node), float(x), float(y), float(vx), float(vy),
+                                          start + float(duration)))
+                        else:
+                            moves.append((start, int(node), float(x), float(y), 0.0, 0.0, start))
+                else:
+                    for time, node, x, y, dest_x, dest_y, speed in TR_MOVE.findall(buffer):
+                        start, x, y, speed = float(time), float(x), float(y), float(speed)
+                        dx, dy = float(dest_x) - x, float(dest_y) - y
+                        distance = np.hypot(dx, dy)
+                        if speed > 0 and distance > 0:
+                            moves.append((start, int(node), x, y, speed * dx / distance, speed * dy / distance,
+                                          start + distance / speed))
+                        else:
+                            moves.append((start, int(node), x, y, 0.0, 0.0, start))
+            base += cut
+            if not block:
+                break
+
+    if not samples:
+        samples.append((0.0, 0))
+    sample_time = np.maximum.accumulate(np.array([time for time, _ in samples]))  # Guard against stray jitter
+    moves.sort(key=lambda move: move[0])  # Stable, so a node's moves at the same time keep their order
+    arrays = {
+        "sample_time": sample_time,
+        "sample_offset": np.array([offset for _, offset in samples], dtype=np.int64),
+        "move_time": np.array([move[0] for move in moves], dtype=np.float64),
+        "move_node": np.array([move[1] for move in moves], dtype=np.int32),
+        "move_position": np.array([move[2:4] for move in moves], dtype=np.float64).reshape(-1, 2),
+        "move_velocity": np.array([move[4:6] for move in moves], dtype=np.float64).reshape(-1, 2),
+        "move_until": np.array([move[6] for move in moves], dtype=np.float64),
+    }
+    if area is None and moves:
+        points = np.concatenate((arrays["move_position"],
+                                 arrays["move_position"] + arrays["move_velocity"] *
+                                 (arrays["move_until"] - arrays["move_time"])[:, None]))
+        area = tuple(points.max(axis=0).tolist())
+
+    nodes = int(arrays["move_node"].max()) + 1 if moves else 0
+    keyframe_moves = max(KEYFRAME_MOVES, nodes)  # Keeps the keyframes no larger than the moves themselves
+    last = np.full(nodes, -1, dtype=np.int32)
+    keyframes = []
+    for end in range(keyframe_moves, len(moves) + 1, keyframe_moves):
+        latest_moves(last, arrays["move_node"], end - keyframe_moves, end)
+        keyframes.append(last.copy())
+    arrays["keyframe_last"] = np.array(keyframes, dtype=np.int32).reshape(-1, nodes)
+
+    stat = os.stat(path)
+    layout = []
+    offset = 0
+    for name, dtype, _ in ARRAYS:
+        length = arrays[name].size * np.dtype(dtype).itemsize
+        layout.append({"name": name, "dtype": np.dtype(dtype).str, "offset": offset, "length": length})
+        offset = align(offset + length)
+    header = json.dumps({
+        "version": VERSION,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime_ns,
+        "format": "nam" if nam else "tr",
+        "nodes": nodes,
+        "area": area,
+        "start": float(sample_time[0]),
+        "end": max(last_time, float(sample_time[-1])),
+        "samples": len(samples),
+        "moves": len(moves),
+        "keyframe_moves": keyframe_moves,
+        "keyframes": len(keyframes),
+        "arrays": layout,
+    }).encode()
+    data_start = align(len(MAGIC) + 8 + len(header))
+    with open(output + ".tmp", "wb") as out:
+        out.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+        for entry, (name, dtype, _) in zip(layout, ARRAYS):
+            out.seek(data_start + entry["offset"])
+            out.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+        out.truncate(data_start + offset)
+    os.replace(output + ".tmp", output)
+    return output
+
+
+def latest_moves(last, move_node, start, end):
+    """Record in ``last`` each node's last move among moves [start, end)."""
+    if end <= start:
+        return
+    nodes, first = np.unique(move_node[start:end][::-1], return_index=True)
+    last[nodes] = end - 1 - first
+
+
+class TraceIndex:
+    """Memory-mapped sidecar index of one trace; see ``build_index``."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a trace index")
+            version, header_length = struct.unpack("<II", f.read(8))
+            if version != VERSION:
+                raise ValueError(f"unsupported trace index version {version}")
+            self.header = json.loads(f.read(header_length))
+        data_start = align(len(MAGIC) + 8 + header_length)
+        self.arrays = {}
+        for entry, (name, _, width) in zip(self.header["arrays"], ARRAYS):
+            if name.startswith("sample"):
+                rows = self.header["samples"]
+            elif name.startswith("keyframe"):
+                rows, width = self.header["keyframes"], self.header["nodes"]
+            else:
+                rows = self.header["moves"]
+            shape = (rows, width) if width != 1 else (rows,)
+            if rows == 0:
+                self.arrays[name] = np.zeros(shape, dtype=entry["dtype"])
+                continue
+            self.arrays[name] = np.memmap(path, dtype=entry["dtype"], mode="r",
+                                          offset=data_start + entry["offset"], shape=shape)
+        self.node_count = self.header["nodes"]
+        self.start = self.header["start"]
+        self.end = self.header["end"]
+        self.area = self.header["area"]
+        self.last = np.full(self.node_count, -1, dtype=np.int32)  # Each node's last move among the first applied
+        self.applied = 0
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def positions(self, t):
+        """(n, 2) positions of all nodes at time ``t``; NaN for nodes not placed yet."""
+        move_time = self.arrays["move_time"]
+        count = int(np.searchsorted(move_time, t, side="right"))
+        step = self.header["keyframe_moves"]
+        if not self.applied <= count <= self.applied + step:
+            # A jump: start over from the keyframe just before t instead of the moves seen so far
+            keyframe = count // step
+            if keyframe:
+                self.last = np.array(self.arrays["keyframe_last"][keyframe - 1])
+            else:
+                self.last = np.full(self.node_count, -1, dtype=np.int32)
+            self.applied = keyframe * step
+        latest_moves(self.last, self.arrays["move_node"], self.applied, count)
+        self.applied = count
+        positions = np.full((self.node_count, 2), np.nan)
+        nodes = np.flatnonzero(self.last >= 0)
+        last = self.last[nodes]
+        elapsed = np.minimum(t, self.arrays["move_until"][last]) - move_time[last]
+        positions[nodes] = self.arrays["move_position"][last] + self.arrays["move_velocity"][last] * elapsed[:, None]
+        return positions
+
+
+def load_index(path):
+    """Index of ``path``, built first if it is missing or older than the trace."""
+    index_file = index_path(path)
+    stat = os.stat(path)
+    if os.path.exists(index_file):
+        try:
+            index = TraceIndex(index_file)
+        except ValueError:
+            index = None
+        if index is not None and (index.header["source_size"], index.header["source_mtime"]) == \
+                (stat.st_size, stat.st_mtime_ns):
+            return index
+    return TraceIndex(build_index(path))
+
+
+class ReplayFrame:
+    """What to draw at one moment: positions plus the traffic of the last ``window`` seconds."""
+
+    __slots__ = ("time", "positions", "links", "flows", "drops")
+
+    def __init__(self, time, positions, links, flows, drops):
+        self.time = time
+        self.positions = positions  # (n, 2) array, NaN where unknown
+        self.links = links  # {(sender, receiver): receptions}
+        self.flows = flows  # {(source, destination): packets sent}
+        self.drops = drops  # {(node, reason): drops}
+
+
+class TraceReplay:
+    """Seekable view of one trace, with positions from its own index or a ``movement`` trace.
+
+    ``frame(t)`` returns a ReplayFrame for time ``t``. Moving forward by less
+    than ``window`` reuses the events already parsed and reads only the new
+    lines; any other jump reads the window afresh.
+    """
+
+    def __init__(self, path, movement=None, window=1.0):
+        self.path = path
+        self.index = load_index(path)
+        if movement is None and not is_nam(path):
+            sibling = os.path.splitext(path)[0] + ".nam"
+            movement = sibling if os.path.exists(sibling) else None
+        self.movement = load_index(movement) if movement else self.index
+        self.nam = is_nam(path)
+        self.window = window
+        self.file = open(path, "rb")
+        self.start = min(self.index.start, self.movement.start)
+        self.end = max(self.index.end, self.movement.end)
+        self.node_count = self.movement.node_count
+        self.area = self.movement.area or self.index.area
+        self.reset()
+
+    def reset(self):
+        self.events = deque()  # (time, kind, key) within the window, oldest first
+        self.counts = {"link": Counter(), "flow": Counter(), "drop": Counter()}
+        self.time = None
+        self.read_until = 0
+
+    def close(self):
+        self.file.close()
+
+    def offset(self, t):
+        """Byte offset of the first line later than ``t``: binary search, then a short scan."""
+        sample_time = self.index["sample_time"]
+        slot = max(int(np.searchsorted(sample_time, t, side="right")) - 1, 0)
+        position = int(self.index["sample_offset"][slot]) if len(sample_time) else 0
+        self.file.seek(position)
+        remainder = b""
+        while True:
+            block = self.file.read(SAMPLE_BYTES)
+            data = remainder + block
+            cut = len(data) if not block else data.rfind(b"\n") + 1
+            for match in LINE_TIME.finditer(b"\n" + data[:cut]):
+                if float(match.group(1)) > t:
+                    return position + match.start()
+            if not block:
+                return position + cut
+            position += cut
+            remainder = data[cut:]
+
+    def parse(self, start, end):
+        """Events of the lines in [start, end) as (time, kind, key) tuples."""
+        clamped = end - start > MAX_WINDOW_BYTES
+        if clamped:
+            start = end - MAX_WINDOW_BYTES
+        self.file.seek(start)
+        data = self.file.read(end - start)
+        if clamped:
+            data = data[data.find(b"\n") + 1:]  # Start at the first complete line
+        buffer = b"\n" + data
+        events = []
+        if self.nam:
+            for event, time, node, peer, _ in NAM_EVENT.findall(buffer):
+                if event == b"h":
+                    if int(peer) >= 0:
+                        events.append((float(time), "link", (int(node), int(peer))))
+                else:
+                    events.append((float(time), "drop", (int(node), "IFQ")))
+            return events
+        for event, time, node, layer, reason, ptype, mac_src, ip_src, ip_dst in TR_EVENT.findall(buffer):
+            if event == b"r":
+                sender = int(mac_src, 16)
+                if sender != int(node):
+                    events.append((float(time), "link", (sender, int(node))))
+            elif event == b"s":
+                if layer == b"AGT" and ip_src and ptype not in ROUTING_TYPES:
+                    events.append((float(time), "flow", (int(ip_src), int(ip_dst))))
+            else:
+                events.append((float(time), "drop", (int(node), reason.decode())))
+        return events
+
+    def frame(self, t):
+        t = min(max(t, self.start), self.end)
+        end = self.offset(t)
+        if self.time is None or t < self.time or t - self.window > self.time:
+            self.reset()
+            new = self.parse(self.offset(t - self.window), end)
+        else:
+            new = self.parse(self.read_until, end) if end > self.read_until else []
+        for event in new:
+            self.events.append(event)
+            self.counts[event[1]][event[2]] += 1
+        cutoff = t - self.window
+        while self.events and self.events[0][0] <= cutoff:
+            _, kind, key = self.events.popleft()
+            counts = self.counts[kind]
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+        self.time = t
+        self.read_until = end
+        return ReplayFrame(t, self.movement.positions(t), dict(self.counts["link"]), dict(self.counts["flow"]),
+                           dict(self.counts["drop"]))
+
+
+class ReplayView:
+    """Plays a TraceReplay on a canvas drawn by CanvasRenderer, like the simulation GUIs.
+
+    The slider seeks, the space bar plays and pauses, and the arrow keys
+    step by a tenth of the window. Links are the hops with a reception in the
+    last window, sources and destinations of active flows are green and
+    yellow, and nodes that dropped packets in the window are red.
+    """
+
+    FRAME_MS = 40
+    MARGIN = 30
+
+    def __init__(self, root, replay, speed=1.0):
+        import tkinter as tk  # Only the viewer needs a display
+
+        self.root = root
+        self.replay = replay
+        self.speed = speed
+        self.playing = False
+        self.time = replay.start
+        self.drawn_time = None
+        self.nodes = [Node(i, 0.0, 0.0) for i in range(replay.node_count)]
+
+        self.root.configure(bg="#282c34")
+        self.canvas = tk.Canvas(root, bg="#282c34", width=650, height=500, highlightthickness=0)
+        self.canvas.grid(row=0, column=0, columnspan=4, padx=20, pady=20, sticky="nsew")
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        radius = 20 if replay.node_count <= 50 else 8 if replay.node_count <= 500 else 3
+        self.renderer = CanvasRenderer(self.canvas, node_radius=radius, outline_width=3 if radius == 20 else 1,
+                                       font=("Arial", 10, "bold") if radius == 20 else ("Arial", 6))
+
+        self.play_button = tk.Button(
+            root, text="Play", width=8, font=("Helvetica", 12, "bold"), bg="#61afef", fg="white",
+            activebackground="#98c379", activeforeground="black", command=self.toggle
+        )
+        self.play_button.grid(row=1, column=0, padx=20, pady=5, sticky="w")
+        self.time_var = tk.DoubleVar(value=self.time)
+        self.slider = tk.Scale(
+            root, from_=replay.start, to=replay.end, resolution=0.01, orient="horizontal", variable=self.time_var,
+            showvalue=False, bg="#282c34", fg="white", highlightthickness=0, command=self.seek
+        )
+        self.slider.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+        self.speed_var = tk.StringVar(value=f"{speed:g}")
+        tk.Spinbox(root, values=("0.1", "0.25", "0.5", "1", "2", "5", "10", "50", "100"), width=5,
+                   textvariable=self.speed_var, command=self.set_speed).grid(row=1, column=2, padx=5, pady=5)
+        self.status = tk.Label(root, bg="#282c34", fg="white", font=("Consolas", 11), anchor="w")
+        self.status.grid(row=2, column=0, columnspan=4, padx=20, pady=(0, 20), sticky="ew")
+
+        root.grid_rowconfigure(0, weight=1)
+        root.grid_columnconfigure(1, weight=1)
+        root.bind("<space>", lambda event: self.toggle())
+        root.bind("<Left>", lambda event: self.step(-replay.window / 10))
+        root.bind("<Right>", lambda event: self.step(replay.window / 10))
+        root.protocol("WM_DELETE_WINDOW", self.close)
+        self.redraw()
+        self.tick()
+
+    def set_speed(self):
+        self.speed = float(self.speed_var.get())
+
+    def toggle(self):
+        self.playing = not self.playing
+        self.play_button.config(text="Pause" if self.playing else "Play")
+
+    def seek(self, value):
+        # The slider also reports the values tick() sets, rounded to its resolution; only a drag seeks
+        if abs(float(value) - self.time) > self.slider.cget("resolution"):
+            self.time = float(value)
+
+    def step(self, seconds):
+        self.time = min(max(self.time + seconds, self.replay.start), self.replay.end)
+        self.time_var.set(self.time)
+
+    def tick(self):
+        if self.playing:
+            self.time = min(self.time + self.speed * self.FRAME_MS / 1000, self.replay.end)
+            self.time_var.set(self.time)
+            if self.time >= self.replay.end:
+                self.toggle()
+        if self.time != self.drawn_time:
+            self.redraw()
+        self.root.after(self.FRAME_MS, self.tick)
+
+    def transform(self):
+        """Scale factor and offsets from trace meters to canvas pixels, y pointing up as in nam."""
+        width, height = self.replay.area or (1000.0, 1000.0)
+        canvas_width = max(self.canvas.winfo_width(), 2 * self.MARGIN + 1)
+        canvas_height = max(self.canvas.winfo_height(), 2 * self.MARGIN + 1)
+        scale = min((canvas_width - 2 * self.MARGIN) / width, (canvas_height - 2 * self.MARGIN) / height)
+        return scale, self.MARGIN, canvas_height - self.MARGIN
+
+    def redraw(self):
+        frame = self.replay.frame(self.time)
+        self.drawn_time = self.time
+        scale, left, bottom = self.transform()
+        known = ~np.isnan(frame.positions[:, 0])
+        pixels = np.column_stack((left + frame.positions[:, 0] * scale, bottom - frame.positions[:, 1] * scale))
+        nodes = [node for node, present in zip(self.nodes, known.tolist()) if present]
+        positions = {node: tuple(pixels[node.node_id].tolist()) for node in nodes}
+
+        edges = set()
+        for sender, receiver in frame.links:
+            if sender < len(self.nodes) and receiver < len(self.nodes) and known[sender] and known[receiver]:
+                a, b = sorted((sender, receiver))
+                edges.add((self.nodes[a], self.nodes[b]))
+        highlights = {}
+        for source, destination in frame.flows:
+            for node, color in ((source, "#98c379"), (destination, "#e5c07b")):
+                if node < len(self.nodes) and known[node]:
+                    highlights[self.nodes[node]] = color
+        dropped = Counter()
+        for (node, reason), count in frame.drops.items():
+            dropped[reason] += count
+            if node < len(self.nodes) and known[node]:
+                highlights[self.nodes[node]] = "#e06c75"
+        self.renderer.render(nodes, edges, highlights, positions=positions)
+
+        drops = ", ".join(f"{reason} {count}" for reason, count in dropped.most_common(4)) or "none"
+        self.status.config(text=f"t = {frame.time:8.2f} s   x{self.speed:g}   links {len(edges)}   "
+                                f"flows {len(frame.flows)}   drops: {drops}")
+
+    def close(self):
+        self.replay.close()
+        self.root.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and replay NS2 .tr and .nam files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index_cmd = commands.add_parser("index", help="build (or rebuild) the sidecar index of a trace")
+    index_cmd.add_argument("trace")
+    for name, help_text in (("view", "replay a trace in a window"), ("frame", "print what is on screen at --time")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("trace")
+        command.add_argument("--movement", help=".nam or .tr with the node positions (default: the trace itself, "
+                                                "or the .nam next to a .tr)")
+        command.add_argument("--window", type=float, default=1.0, help="seconds of traffic shown at once")
+        if name == "view":
+            command.add_argument("--speed", type=float, default=1.0, help="simulated seconds per second")
+        else:
+            command.add_argument("--time", type=float, required=True, help="simulated time to show")
+    args = parser.parse_args(argv)
+
+    if args.command == "index":
+        path = build_index(args.trace)
+        print(json.dumps({key: value for key, value in TraceIndex(path).header.items() if key != "arrays"},
+                         indent=2))
+        return
+
+    replay = TraceReplay(args.trace, args.movement, args.window)
+    if args.command == "frame":
+        frame = replay.frame(args.time)
+        placed = ~np.isnan(frame.positions[:, 0])
+        print(json.dumps({
+            "time": frame.time,
+            "nodes": replay.node_count,
+            "placed": int(placed.sum()),
+            "links": sorted([a, b, count] for (a, b), count in frame.links.items()),
+            "flows": sorted([a, b, count] for (a, b), count in frame.flows.items()),
+            "drops": sorted([node, reason, count] for (node, reason), count in frame.drops.items()),
+        }))
+        replay.close()
+        return
+
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.title(f"MANET Trace Replay: {os.path.basename(args.trace)}")
+    root.geometry("900x700")
+    ReplayView(root, replay, args.speed)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
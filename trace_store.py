@@ -0,0 +1,365 @@
+"""Compact columnar binary storage for NS2 wireless traces.
+
+``convert`` parses a .tr once and writes a single .trc file: a small JSON
+header (column layout, string tables, time index) followed by one aligned raw
+NumPy array per column. ``TraceStore`` memory-maps those columns, so metric
+computations and time-range queries run as vectorized operations without
+re-reading the text trace.
+
+    python trace_store.py convert AODV_10.tr
+    python trace_store.py metrics AODV_10.trc --start 20 --end 80 --window 5
+"""
+
+import argparse
+import json
+import os
+import re
+import struct
+import tempfile
+
+import numpy as np
+
+from trace_analyzer import CHUNK_SIZE, ROUTING_TYPES
+
+MAGIC = b"MANETTRC"
+VERSION = 1
+ALIGNMENT = 64
+INDEX_STEP = 1.0  # Seconds between two entries of the time index
+
+COLUMNS = [
+    ("event", np.uint8),  # ASCII code of the event: s r f D d
+    ("time", np.float64),
+    ("node", np.int32),
+    ("layer", np.uint8),  # Index into the "layer" string table
+    ("reason", np.uint8),  # Index into the "reason" string table
+    ("uid", np.int64),
+    ("ptype", np.uint16),  # Index into the "ptype" string table
+    ("size", np.int32),
+    ("src", np.int32),  # IP header fields, -1 where the line has none
+    ("sport", np.int32),
+    ("dst", np.int32),
+    ("dport", np.int32),
+]
+CATEGORICAL = {"layer", "reason", "ptype"}
+
+# s 10.000000000 _0_ AGT  --- 0 tcp 40 [0 0 0 0] ------- [0:0 1:0 32 0] [0 0] 0 0
+PACKET_EVENT = re.compile(
+    rb"\n([srfDd]) ([\d.]+) _(\d+)_ (\w+)\s+(\S+) (\d+) (\S+) (\d+) \[[^\]\n]*\]"
+    rb"(?: \S+ \[(-?\d+):(-?\d+) (-?\d+):(-?\d+))?"
+)
+
+
+def iter_chunks(f, chunk_size=CHUNK_SIZE):
+    """Yield blocks of complete lines, each prefixed with a newline for PACKET_EVENT."""
+    remainder = b""
+    while True:
+        block = f.read(chunk_size)
+        if not block:
+            break
+        block = remainder + block
+        cut = block.rfind(b"\n") + 1
+        remainder = block[cut:]
+        yield b"\n" + block[:cut]
+    if remainder:
+        yield b"\n" + remainder + b"\n"
+
+
+def convert(trace_path, output_path=None, chunk_size=CHUNK_SIZE):
+    """Convert a text trace to the columnar format and return the output path."""
+    output_path = output_path or os.path.splitext(trace_path)[0] + ".trc"
+    strings = {name: {} for name in CATEGORICAL}  # value -> code, in order of first appearance
+    rows = 0
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as tmp:
+        # Columns are spooled to one raw file each, so memory stays bounded by the chunk size
+        spools = {name: open(os.path.join(tmp, name), "wb") for name, _ in COLUMNS}
+        with open(trace_path, "rb") as f:
+            for chunk in iter_chunks(f, chunk_size):
+                matches = PACKET_EVENT.findall(chunk)
+                if not matches:
+                    continue
+                rows += len(matches)
+                (events, times, nodes, layers, reasons, uids, ptypes, sizes,
+                 srcs, sports, dsts, dports) = zip(*matches)
+                raw = {
+                    "event": np.frombuffer(b"".join(events), dtype=np.uint8),
+                    "time": parse_numbers(times, np.float64),
+                    "node": parse_numbers(nodes, np.int32),
+                    "uid": parse_numbers(uids, np.int64),
+                    "size": parse_numbers(sizes, np.int32),
+                    "src": parse_numbers(srcs, np.int32),
+                    "sport": parse_numbers(sports, np.int32),
+                    "dst": parse_numbers(dsts, np.int32),
+                    "dport": parse_numbers(dports, np.int32),
+                }
+                for name, values in (("layer", layers), ("reason", reasons), ("ptype", ptypes)):
+                    table = strings[name]
+                    raw[name] = np.array([table.setdefault(value, len(table)) for value in values],
+                                         dtype=dict(COLUMNS)[name])
+                for name, dtype in COLUMNS:
+                    spools[name].write(raw[name].astype(dtype, copy=False).tobytes())
+        for spool in spools.values():
+            spool.close()
+
+        time_index = build_time_index(np.fromfile(os.path.join(tmp, "time"), dtype=np.float64))
+        layout = []
+        offset = 0
+        for name, dtype in COLUMNS:
+            length = rows * np.dtype(dtype).itemsize
+            layout.append({"name": name, "dtype": np.dtype(dtype).str, "offset": offset, "length": length})
+            offset = align(offset + length)
+        header = json.dumps({
+            "version": VERSION,
+            "rows": rows,
+            "columns": layout,
+            "strings": {name: [value.decode() for value in table] for name, table in strings.items()},
+            "index_step": INDEX_STEP,
+            "time_index": time_index.tolist(),
+        }).encode()
+        data_start = align(len(MAGIC) + 8 + len(header))
+
+        with open(output_path, "wb") as out:
+            out.write(MAGIC + struct.pack("<II", VERSION, len(header)) + header)
+            for column, (name, _) in zip(layout, COLUMNS):
+                out.seek(data_start + column["offset"])
+                with open(os.path.join(tmp, name), "rb") as spool:
+                    while True:
+                        block = spool.read(chunk_size)
+                        if not block:
+                            break
+                        out.write(block)
+            out.truncate(data_start + offset)
+    return output_path
+
+
+def parse_numbers(values, dtype):
+    """Parse a sequence of ASCII numbers in one vectorized call; empty fields become -1.
+
+    A value that is not a number raises ValueError rather than cutting the
+    column short.
+    """
+    if b"" in values:
+        values = [value or b"-1" for value in values]
+    return np.array(values).astype(np.float64 if dtype == np.float64 else np.int64).astype(dtype)
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def build_time_index(times, step=INDEX_STEP):
+    """Row offset of the first event at or after every multiple of ``step`` seconds."""
+    if not len(times):
+        return np.zeros(1, dtype=np.int64)
+    marks = np.arange(0.0, times[-1] + step, step)
+    return np.searchsorted(times, marks, side="left")
+
+
+class TraceStore:
+    """Memory-mapped view of a .trc file.
+
+    Columns are available as read-only NumPy arrays through ``store[name]``;
+    nothing is read from disk until a column is actually touched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a converted trace")
+            version, header_length = struct.unpack("<II", f.read(8))
+            if version != VERSION:
+                raise ValueError(f"unsupported trace store version {version}")
+            header = json.loads(f.read(header_length))
+        self.rows = header["rows"]
+        self.strings = header["strings"]
+        self.index_step = header["index_step"]
+        self.time_index = np.array(header["time_index"], dtype=np.int64)
+        data_start = align(len(MAGIC) + 8 + header_length)
+        self.columns = {}
+        for column in header["columns"]:
+            if self.rows == 0:
+                self.columns[column["name"]] = np.zeros(0, dtype=column["dtype"])
+                continue
+            self.columns[column["name"]] = np.memmap(
+                path, dtype=column["dtype"], mode="r", offset=data_start + column["offset"], shape=(self.rows,)
+            )
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def code(self, table, value):
+        """Numeric code of a string value, or -1 if it never appears in the trace."""
+        try:
+            return self.strings[table].index(value)
+        except ValueError:
+            return -1
+
+    def row_range(self, start=None, end=None):
+        """(first, last) row bounds of the events with start <= time < end.
+
+        The time index narrows the search to one index step on each side, then
+        a binary search over that slice of the time column finds the exact row.
+        """
+        times = self.columns["time"]
+        first = 0 if start is None else self.find_row(times, start)
+        last = self.rows if end is None else self.find_row(times, end)
+        return first, max(first, last)
+
+    def find_row(self, times, t):
+        slot = int(t // self.index_step)
+        if slot < 0:
+            return 0
+        if slot >= len(self.time_index) - 1:
+            lo = int(self.time_index[-1])
+            hi = self.rows
+        else:
+            lo = int(self.time_index[slot])
+            hi = int(self.time_index[slot + 1])
+        return lo + int(np.searchsorted(times[lo:hi], t, side="left"))
+
+    def select(self, start=None, end=None, columns=None):
+        """Column slices (still memory-mapped) for the events in [start, end)."""
+        first, last = self.row_range(start, end)
+        names = columns or self.columns
+        return {name: self.columns[name][first:last] for name in names}
+
+
+def unique_rows(fields):
+    """Distinct combinations of non-negative integer columns and the id of each row.
+
+    The columns are packed into a single int64 key when their ranges allow it,
+    which sorts an order of magnitude faster than ``np.unique(axis=0)``.
+    """
+    if not len(fields[0]):
+        return np.zeros((0, len(fields)), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ranges = [int(field.max()) + 1 for field in fields]
+    capacity = 1
+    for size in ranges:
+        capacity *= size
+    if capacity >= 2 ** 63:
+        keys, inverse = np.unique(np.stack(fields, axis=1), axis=0, return_inverse=True)
+        return keys, inverse.reshape(-1)
+
+    packed = np.zeros(len(fields[0]), dtype=np.int64)
+    for field, size in zip(fields, ranges):
+        packed = packed * size + field
+    unique, inverse = np.unique(packed, return_inverse=True)
+    keys = np.empty((len(unique), len(fields)), dtype=np.int64)
+    for column in range(len(fields) - 1, -1, -1):
+        unique, keys[:, column] = np.divmod(unique, ranges[column])
+    return keys, inverse.reshape(-1)
+
+
+def flow_metrics(store, start=None, end=None, window=None):
+    """Per-flow agent metrics over [start, end), computed with vectorized NumPy.
+
+    Sends and receives are matched by packet UID for the end-to-end delay.
+    With ``window`` set, the received bytes are also binned into windows of
+    that many seconds for each flow.
+    """
+    rows = store.select(start, end)
+    agent = rows["layer"] == store.code("layer", "AGT")
+    sends = agent & (rows["event"] == ord("s"))
+    receives = agent & (rows["event"] == ord("r"))
+    # Agent drops alone don't make a flow
+    traffic = sends | receives
+
+    # Flow id per agent send and receive from its IP header and packet type
+    fields = [rows[name][traffic].astype(np.int64) + 1 for name in ("src", "sport", "dst", "dport")]
+    fields.append(rows["ptype"][traffic].astype(np.int64))
+    flow_keys, flow_of = unique_rows(fields)
+    flow_ids = np.full(len(traffic), -1, dtype=np.int64)
+    flow_ids[traffic] = flow_of
+    flow_count = len(flow_keys)
+
+    send_uids = rows["uid"][sends]
+    send_times = rows["time"][sends]
+    order = np.argsort(send_uids, kind="stable")
+    send_uids = send_uids[order]
+    send_times = send_times[order]
+
+    recv_uids = rows["uid"][receives]
+    recv_times = rows["time"][receives]
+    recv_flows = flow_ids[receives]
+    recv_sizes = rows["size"][receives].astype(np.int64)
+    # Keep only receives whose send is inside the range, and count each packet once
+    if len(send_uids):
+        slot = np.minimum(np.searchsorted(send_uids, recv_uids), len(send_uids) - 1)
+        matched = send_uids[slot] == recv_uids
+    else:
+        slot = np.zeros(len(recv_uids), dtype=np.int64)
+        matched = np.zeros(len(recv_uids), dtype=bool)
+    _, first_delivery = np.unique(recv_uids, return_index=True)
+    unique = np.zeros(len(recv_uids), dtype=bool)
+    unique[first_delivery] = True
+    matched &= unique
+    delays = recv_times[matched] - send_times[slot[matched]]
+    recv_flows = recv_flows[matched]
+
+    sent = np.bincount(flow_ids[sends], minlength=flow_count)
+    received = np.bincount(recv_flows, minlength=flow_count)
+    received_bytes = np.bincount(recv_flows, weights=recv_sizes[matched], minlength=flow_count)
+    delay_sum = np.bincount(recv_flows, weights=delays, minlength=flow_count)
+
+    times = rows["time"]
+    duration = (times[-1] - times[0]) if len(times) else 0.0
+    ptypes = store.strings["ptype"]
+    flows = {}
+    for i, (src, sport, dst, dport, ptype) in enumerate(flow_keys.tolist()):
+        name = f"{src - 1}:{sport - 1}->{dst - 1}:{dport - 1} {ptypes[ptype]}"
+        flows[name] = {
+            "sent": int(sent[i]),
+            "received": int(received[i]),
+            "throughput_kbps": received_bytes[i] * 8 / duration / 1000 if duration > 0 else 0.0,
+            "pdr": received[i] / sent[i] * 100 if sent[i] else 0.0,
+            "avg_delay": delay_sum[i] / received[i] if received[i] else 0.0,
+        }
+
+    routing_codes = [store.code("ptype", name.decode()) for name in ROUTING_TYPES]
+    routing = (np.isin(rows["ptype"], routing_codes) & np.isin(rows["event"], [ord("s"), ord("f")])
+               & (rows["layer"] == store.code("layer", "RTR")))
+    report = {"flows": flows, "routing_packets": int(routing.sum())}
+
+    if window and len(times):
+        origin = times[0] if start is None else start
+        bins = ((recv_times[matched] - origin) // window).astype(np.int64)
+        bin_count = int(bins.max()) + 1 if len(bins) else 0
+        per_window = np.zeros((flow_count, bin_count))
+        np.add.at(per_window, (recv_flows, bins), recv_sizes[matched])
+        report["windows"] = {
+            name: (per_window[i] * 8 / window / 1000).tolist() for i, name in enumerate(flows)
+        }
+        report["window_start"] = float(origin)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert NS2 traces to a columnar format and query them.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = commands.add_parser("convert", help="convert a .tr file")
+    convert_cmd.add_argument("trace")
+    convert_cmd.add_argument("-o", "--output", help="output file (default: <trace>.trc)")
+    metrics_cmd = commands.add_parser("metrics", help="per-flow metrics of a converted trace")
+    metrics_cmd.add_argument("store")
+    metrics_cmd.add_argument("--start", type=float, help="start of the time range")
+    metrics_cmd.add_argument("--end", type=float, help="end of the time range")
+    metrics_cmd.add_argument("--window", type=float, help="also bin throughput into windows of this length")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        path = convert(args.trace, args.output)
+        store = TraceStore(path)
+        print(f"{len(store)} events written to {path} ({os.path.getsize(path)} bytes)")
+        return
+
+    report = flow_metrics(TraceStore(args.store), args.start, args.end, args.window)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()